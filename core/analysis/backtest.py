@@ -0,0 +1,120 @@
+"""
+Simulación de backtest sobre arrays de NumPy (sin ORM ni Decimal).
+
+Reproduce las reglas de `dashboard.backtest.run_backtest`: una sola posición,
+BUY con todo el balance, SELL de toda la posición, fee y slippage
+porcentuales y TP/SL opcional evaluado sobre los cierres posteriores a la
+compra. Los timestamps son enteros (epoch en µs) y deben venir ordenados.
+"""
+import numpy as np
+
+# tamaño inicial de la ventana en la que se busca la salida TP/SL; se dobla
+# mientras no haya salida para no recorrer toda la serie en cada compra
+_EXIT_WINDOW = 1024
+
+
+def first_exit(px_close: np.ndarray, start: int, take: float, stop: float) -> int:
+    """
+    Índice del primer cierre en `px_close[start:]` que toca `take` (≥) o
+    `stop` (≤); -1 si no hay ninguno.
+    """
+    n = px_close.size
+    lo, width = start, _EXIT_WINDOW
+    while lo < n:
+        window = px_close[lo:lo + width]
+        hits = np.flatnonzero((window >= take) | (window <= stop))
+        if hits.size:
+            return lo + int(hits[0])
+        lo += width
+        width *= 2
+    return -1
+
+
+def simulate(sig_ts: np.ndarray, sig_buy: np.ndarray, sig_price: np.ndarray,
+             px_ts: np.ndarray, px_close: np.ndarray,
+             initial_usd: float = 1000.0,
+             fee_pct: float = 0.001,
+             slippage_pct: float = 0.001,
+             pct_take_profit: float = None,
+             pct_stop_loss: float = None,
+             qty_precision: int = 8):
+    """
+    Ejecuta las señales (`sig_buy` True = BUY, False = SELL) y devuelve un
+    dict con:
+      - trades: lista de (side, price, qty, ts_signal, ts_fill)
+      - final_usd: balance final
+      - equity: lista de (ts, balance) tras cada señal ejecutada
+      - ledger: lista de (ts_fill, balance, posición) tras cada trade,
+        la entrada de `mark_to_market`
+    """
+    balance = float(initial_usd)
+    position_qty = 0.0
+    use_exits = bool(pct_take_profit or pct_stop_loss)
+    take_mult = 1 + float(pct_take_profit or 0)
+    stop_mult = 1 - float(pct_stop_loss or 0)
+    fee_pct, slippage_pct = float(fee_pct), float(slippage_pct)
+
+    trades, equity, ledger = [], [], []
+    for ts, is_buy, price in zip(sig_ts.tolist(), sig_buy.tolist(), sig_price.tolist()):
+        if is_buy and position_qty == 0:
+            slipped = price * (1 + slippage_pct)
+            position_qty = round(balance / slipped, qty_precision)
+            balance = -(position_qty * slipped * fee_pct)
+            trades.append(("BUY", slipped, position_qty, ts, ts))
+            ledger.append((ts, balance, position_qty))
+            equity.append((ts, balance))
+
+            if use_exits:
+                start = int(np.searchsorted(px_ts, ts, side="right"))
+                hit = first_exit(px_close, start, slipped * take_mult, slipped * stop_mult)
+                if hit >= 0:
+                    slipped_sell = float(px_close[hit]) * (1 - slippage_pct)
+                    gross = position_qty * slipped_sell
+                    balance = gross - gross * fee_pct
+                    exit_ts = int(px_ts[hit])
+                    trades.append(("SELL", slipped_sell, position_qty, exit_ts, exit_ts))
+                    position_qty = 0.0
+                    ledger.append((exit_ts, balance, position_qty))
+
+        elif not is_buy and position_qty > 0:
+            slipped = price * (1 - slippage_pct)
+            gross = position_qty * slipped
+            balance = gross - gross * fee_pct
+            trades.append(("SELL", slipped, position_qty, ts, ts))
+            position_qty = 0.0
+            ledger.append((ts, balance, position_qty))
+            equity.append((ts, balance))
+
+    return {"trades": trades, "final_usd": balance, "equity": equity, "ledger": ledger}
+
+
+def mark_to_market(ledger, px_ts: np.ndarray, px_close: np.ndarray,
+                   initial_usd: float) -> np.ndarray:
+    """
+    Equity en cada vela de `px_ts`: balance + posición · cierre, aplicando
+    en cada vela el último trade con ts_fill <= timestamp de la vela.
+    """
+    if not ledger:
+        return np.full(px_ts.size, float(initial_usd))
+    # el ledger puede no venir ordenado: una salida TP/SL puede ser
+    # posterior a la siguiente señal
+    rows = sorted(ledger, key=lambda row: row[0])
+    fill_ts = np.array([row[0] for row in rows], dtype=np.int64)
+    cash = np.array([row[1] for row in rows], dtype=float)
+    qty = np.array([row[2] for row in rows], dtype=float)
+
+    last = np.searchsorted(fill_ts, px_ts, side="right") - 1
+    safe = np.clip(last, 0, None)
+    equity = cash[safe] + qty[safe] * px_close
+    return np.where(last < 0, float(initial_usd), equity)
+
+
+def final_equity(ledger, last_close: float, initial_usd: float) -> float:
+    """
+    Equity en la última vela (último valor de `mark_to_market`) sin
+    calcular la curva completa: una posición abierta vale a `last_close`.
+    """
+    if not ledger:
+        return float(initial_usd)
+    _, cash, qty = max(enumerate(ledger), key=lambda item: (item[1][0], item[0]))[1]
+    return cash + qty * float(last_close)
@@ -0,0 +1,38 @@
+"""
+Reducción de series para gráficos.
+
+`lttb` (Largest-Triangle-Three-Buckets, S. Steinarsson) elige `threshold`
+puntos de la serie conservando su forma visual: el primero, el último y, en
+cada bucket intermedio, el punto que forma el triángulo de mayor área con
+el punto elegido en el bucket anterior y la media del bucket siguiente.
+"""
+import numpy as np
+
+
+def lttb(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    Índices (ordenados) de los `threshold` puntos elegidos de (x, y). Si la
+    serie ya cabe en el presupuesto se devuelven todos.
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    # threshold - 2 buckets entre el primer y el último punto
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    idx = np.empty(threshold, dtype=np.int64)
+    idx[0], idx[-1] = 0, n - 1
+
+    a = 0
+    for i in range(threshold - 2):
+        lo, hi = edges[i], edges[i + 1]
+        next_hi = edges[i + 2] if i + 2 < edges.size else n
+        avg_x, avg_y = x[hi:next_hi].mean(), y[hi:next_hi].mean()
+
+        area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a])
+                      - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(np.argmax(area))
+        idx[i + 1] = a
+    return idx
@@ -0,0 +1,131 @@
+"""
+Versión incremental de los indicadores de `core.analysis.indicators`.
+
+Cada función recibe el estado persistido (dict serializable a JSON, o None
+para empezar desde cero) y SOLO las velas nuevas; devuelve el estado
+actualizado y las señales de esas velas. El coste por llamada es O(velas
+nuevas) y las señales coinciden con las del cálculo completo sobre toda la
+serie.
+
+Los índices de las señales son relativos al array `closes` recibido.
+"""
+import math
+
+import numpy as np
+
+
+def _nan_to_none(value):
+    return None if value is None or math.isnan(value) else float(value)
+
+
+# ───────────────────────── SMA cross ─────────────────────────
+
+def ma_cross_update(state, closes: np.ndarray, short: int, long: int):
+    """
+    Avanza el cruce de SMAs `short`/`long` con las velas `closes`.
+
+    Estado: número de velas vistas, ventana con los últimos `max(short,
+    long)` cierres, sumas móviles de ambas medias y las medias de la vela
+    anterior (para el “cruce inicial” y los cruces normales).
+    """
+    state = dict(state or {"n": 0, "window": [], "sum_short": 0.0, "sum_long": 0.0,
+                           "prev_short": None, "prev_long": None})
+    width = max(short, long)
+    window = list(state["window"])
+    n = state["n"]
+    sum_s, sum_l = state["sum_short"], state["sum_long"]
+    prev_s, prev_l = state["prev_short"], state["prev_long"]
+
+    buy_idx, sell_idx = [], []
+    for i, close in enumerate(np.asarray(closes, dtype=float).tolist()):
+        window.append(close)
+        sum_s += close
+        sum_l += close
+        if len(window) > short:
+            sum_s -= window[-short - 1]
+        if len(window) > long:
+            sum_l -= window[-long - 1]
+        if len(window) > width:
+            window.pop(0)
+        n += 1
+
+        cur_s = sum_s / short if n >= short else None
+        cur_l = sum_l / long if n >= long else None
+
+        # misma lógica que ma_cross_signals: la vela 0 nunca genera señal
+        if n > 1 and cur_s is not None and cur_l is not None:
+            if prev_s is None or prev_l is None:
+                if cur_s > cur_l:
+                    buy_idx.append(i)
+                elif cur_s < cur_l:
+                    sell_idx.append(i)
+            elif prev_s <= prev_l and cur_s > cur_l:
+                buy_idx.append(i)
+            elif prev_s >= prev_l and cur_s < cur_l:
+                sell_idx.append(i)
+        prev_s, prev_l = cur_s, cur_l
+
+    # re-anclamos las sumas sobre la ventana para que el error de redondeo
+    # no se acumule entre checkpoints
+    if window:
+        sum_s = math.fsum(window[-short:])
+        sum_l = math.fsum(window[-long:])
+
+    state.update(n=n, window=window, sum_short=sum_s, sum_long=sum_l,
+                 prev_short=prev_s, prev_long=prev_l)
+    return state, {"BUY": buy_idx, "SELL": sell_idx}
+
+
+# ───────────────────────── RSI ─────────────────────────
+
+def rsi_update(state, closes: np.ndarray, period: int, low: float, high: float):
+    """
+    Avanza el RSI `period` (misma EMA que `indicators._ema`) y detecta los
+    cruces de `low` (BUY) y `high` (SELL).
+
+    Estado: número de velas vistas, último cierre, últimas medias de
+    ganancia/pérdida y el RSI de la vela anterior.
+
+    Devuelve (estado, señales, valores RSI de las velas nuevas).
+    """
+    state = dict(state or {"n": 0, "last_close": None, "avg_gain": None,
+                           "avg_loss": None, "prev_rsi": None})
+    alpha = 2 / (period + 1)
+    n = state["n"]
+    last_close = state["last_close"]
+    avg_gain, avg_loss = state["avg_gain"], state["avg_loss"]
+    prev_rsi = state["prev_rsi"]
+
+    closes = np.asarray(closes, dtype=float)
+    values = np.full(closes.size, np.nan)
+    buy_idx, sell_idx = [], []
+    for i, close in enumerate(closes.tolist()):
+        delta = close - last_close if last_close is not None else math.nan
+        gain = delta if delta > 0 else 0.0
+        loss = -delta if delta < 0 else 0.0
+
+        if avg_gain is None:
+            avg_gain, avg_loss = gain, loss
+        else:
+            avg_gain = gain * alpha + avg_gain * (1 - alpha)
+            avg_loss = loss * alpha + avg_loss * (1 - alpha)
+
+        cur = None
+        if n >= period:
+            rs = math.inf if avg_loss == 0 else avg_gain / avg_loss
+            cur = 100 - (100 / (1 + rs))
+            values[i] = cur
+
+        if prev_rsi is not None and cur is not None:
+            if prev_rsi >= low and cur < low:
+                buy_idx.append(i)
+            elif prev_rsi <= high and cur > high:
+                sell_idx.append(i)
+
+        prev_rsi = cur
+        last_close = close
+        n += 1
+
+    state.update(n=n, last_close=_nan_to_none(last_close), avg_gain=avg_gain,
+                 avg_loss=avg_loss, prev_rsi=prev_rsi)
+    return state, {"BUY": buy_idx, "SELL": sell_idx}, values
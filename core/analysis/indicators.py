@@ -1,71 +1,81 @@
 import numpy as np
-from numpy.lib.stride_tricks import sliding_window_view
+
+from core.indicators.ema import ewm
+from core.indicators.sma import rolling_mean, sma_matrix
 
 
 def sma(series: np.ndarray, period: int) -> np.ndarray:
     """
-    Simple Moving Average (SMA) puro NumPy.
-    Devuelve un array con NaN en los primeros `period-1` valores.
+    Simple Moving Average (SMA) puro NumPy, O(n) para cualquier periodo.
+    Devuelve un array con NaN en los primeros `period-1` valores
+    (todo NaN si no hay suficientes datos).
+    """
+    return rolling_mean(series, period)
+
+
+def _cross_masks(ma_short: np.ndarray, ma_long: np.ndarray):
+    """
+    Máscaras booleanas BUY/SELL a partir de las medias (arrays 1-D o 2-D,
+    el tiempo en el último eje). Misma semántica que el antiguo bucle:
+    la vela 0 nunca genera señal y el primer punto con ambas medias
+    cuenta como “cruce inicial”.
     """
-    if period < 1:
-        raise ValueError("period must be >= 1")
-    if series.size < period:
-        # todo NaN: no hay suficientes datos
-        return np.full(series.size, np.nan)
-    window = sliding_window_view(series, window_shape=period)
-    sma_vals = window.mean(axis=1)
-    # Prepend NaN para alinear tamaño
-    return np.concatenate((np.full(period - 1, np.nan), sma_vals))
+    valid = ~np.isnan(ma_short) & ~np.isnan(ma_long)
+    above = ma_short > ma_long
+    below = ma_short < ma_long
+
+    # valores de la vela anterior (desplazados una posición)
+    prev_valid = np.zeros_like(valid)
+    prev_le = np.zeros_like(valid)
+    prev_ge = np.zeros_like(valid)
+    prev_valid[..., 1:] = valid[..., :-1]
+    prev_le[..., 1:] = (ma_short <= ma_long)[..., :-1]
+    prev_ge[..., 1:] = (ma_short >= ma_long)[..., :-1]
+
+    # una comparación con NaN es False, así que prev_le/prev_ge ya
+    # implican que ayer existían ambas medias
+    buy = valid & above & (~prev_valid | prev_le)
+    sell = valid & below & (~prev_valid | prev_ge)
+    buy[..., 0] = False
+    sell[..., 0] = False
+    return buy, sell
 
 
 def ma_cross_signals(close: np.ndarray, short: int = 9, long: int = 21):
     """
     Cruces de SMA corta y larga.
-    Detecta BUY cuando la corta pasa de ≤ a >, incluso si el día anterior
+    Detecta BUY cuando la corta pasa de ≤ a >, incluso si el día anterior
     la SMA larga era NaN (primer punto calculable).
+    Devuelve los índices como arrays de NumPy.
     """
-    ma_short = sma(close, short)
-    ma_long = sma(close, long)
-
-    buy_idx, sell_idx = [], []
-    for i in range(1, len(close)):
-        cur_s, cur_l = ma_short[i], ma_long[i]
-        prev_s, prev_l = ma_short[i - 1], ma_long[i - 1]
-
-        # saltamos si la media larga aún no existe hoy
-        if np.isnan(cur_s) or np.isnan(cur_l):
-            continue
+    buy, sell = _cross_masks(sma(close, short), sma(close, long))
+    return {"BUY": np.flatnonzero(buy), "SELL": np.flatnonzero(sell)}
 
-        # si ayer faltaba alguna media, tomamos ese “cruce inicial”
-        if np.isnan(prev_s) or np.isnan(prev_l):
-            if cur_s > cur_l:
-                buy_idx.append(i)
-            elif cur_s < cur_l:
-                sell_idx.append(i)
-            continue
 
-        # cruces normales
-        if prev_s <= prev_l and cur_s > cur_l:
-            buy_idx.append(i)
-        elif prev_s >= prev_l and cur_s < cur_l:
-            sell_idx.append(i)
+def ma_cross_grid(close: np.ndarray, pairs):
+    """
+    Cruces para muchos pares (short, long) en una sola llamada, pensado para
+    barridos de parámetros. Cada periodo distinto se calcula una sola vez.
+    Devuelve {(short, long): {"BUY": idx, "SELL": idx}}.
+    """
+    pairs = [(int(s), int(l)) for s, l in pairs]
+    if not pairs:
+        return {}
+    periods = sorted({p for pair in pairs for p in pair})
+    row = {p: i for i, p in enumerate(periods)}
+    mas = sma_matrix(close, periods)
 
-    return {"BUY": buy_idx, "SELL": sell_idx}
+    buy, sell = _cross_masks(mas[[row[s] for s, _ in pairs]],
+                             mas[[row[l] for _, l in pairs]])
+    return {
+        pair: {"BUY": np.flatnonzero(buy[k]), "SELL": np.flatnonzero(sell[k])}
+        for k, pair in enumerate(pairs)
+    }
 
 
 def _ema(arr: np.ndarray, period: int):
-    alpha = 2 / (period + 1)
-    ema = np.empty_like(arr, dtype=float)
-    ema[:] = np.nan
-    for i, val in enumerate(arr):
-        if i == 0:
-            ema[i] = val
-        else:
-            if np.isnan(ema[i-1]):
-                ema[i] = val
-            else:
-                ema[i] = val * alpha + ema[i-1] * (1 - alpha)
-    return ema
+    """EMA con alpha = 2 / (period + 1); acepta 1-D o 2-D (tiempo en el último eje)."""
+    return ewm(arr, 2 / (period + 1))
 
 
 # --- nuevo indicador ---
@@ -73,15 +83,17 @@ def rsi(close: np.ndarray, period: int = 14) -> np.ndarray:
     """
     Relative Strength Index (RSI) puro NumPy.
     Devuelve array aligned (primeros `period`-1 NaN).
+    Con un array 2-D calcula una fila por símbolo.
     """
-    delta = np.diff(close, prepend=np.nan)
+    delta = np.diff(close, axis=-1, prepend=np.nan)
     gains = np.where(delta > 0, delta, 0.0)
     losses = np.where(delta < 0, -delta, 0.0)
 
     avg_gain = _ema(gains, period)
     avg_loss = _ema(losses, period)
 
-    rs = np.where(avg_loss == 0, np.inf, avg_gain / avg_loss)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rs = np.where(avg_loss == 0, np.inf, avg_gain / avg_loss)
     rsi_vals = 100 - (100 / (1 + rs))
-    rsi_vals[:period] = np.nan  # los primeros no son válidos
+    rsi_vals[..., :period] = np.nan  # los primeros no son válidos
     return rsi_vals
\ No newline at end of file
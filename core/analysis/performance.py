@@ -0,0 +1,112 @@
+"""
+Métricas de rendimiento de un backtest sobre arrays de NumPy.
+
+Se calculan a partir del ledger de `core.analysis.backtest.simulate`
+[(ts_fill, balance, posición), ...] y de la equity marcada a mercado en
+cada vela (`mark_to_market`): los rendimientos por vela dan drawdown,
+Sharpe y Sortino; las operaciones cerradas (compra → venta) dan win rate y
+profit factor. Las métricas que no se pueden calcular (sin ventas, sin
+variación de la equity) son None.
+"""
+import numpy as np
+
+from core.analysis.backtest import mark_to_market
+
+YEAR_US = 365 * 24 * 3600 * 1_000_000
+
+
+def round_trip_pnl(ledger, initial_usd: float) -> np.ndarray:
+    """
+    PnL neto (con fees y slippage) de cada fila del ledger: en las ventas,
+    balance tras la venta - balance antes de la compra que abrió la
+    posición; NaN en las compras. Alineado con la lista de trades.
+    """
+    if not ledger:
+        return np.empty(0)
+    cash = np.array([row[1] for row in ledger], dtype=float)
+    qty = np.array([row[2] for row in ledger], dtype=float)
+    before = np.concatenate(([float(initial_usd)], cash[:-1]))
+    is_buy = qty > 0
+    # balance previo a la última compra anterior (o igual) a cada fila
+    last_buy = np.maximum.accumulate(np.where(is_buy, np.arange(cash.size), -1))
+    entry = before[np.clip(last_buy, 0, None)]
+    return np.where(is_buy | (last_buy < 0), np.nan, cash - entry)
+
+
+def equity_metrics(equity: np.ndarray, stamps: np.ndarray, initial_usd: float) -> dict:
+    """
+    total_return, max_drawdown, sharpe y sortino de una curva. Sharpe y
+    Sortino se anualizan con el intervalo mediano entre `stamps` (µs); sin
+    timestamps quedan en None.
+    """
+    equity = np.asarray(equity, dtype=float)
+    if equity.size == 0:
+        return {"total_return": 0.0, "max_drawdown": 0.0, "sharpe": None, "sortino": None}
+
+    peak = np.maximum.accumulate(np.maximum(equity, float(initial_usd)))
+    drawdown = 1 - equity / peak
+    metrics = {
+        "total_return": float(equity[-1] / float(initial_usd) - 1),
+        "max_drawdown": float(drawdown.max()),
+        "sharpe": None,
+        "sortino": None,
+    }
+    if equity.size < 3 or stamps is None or len(stamps) != equity.size:
+        return metrics
+
+    prev = equity[:-1]
+    returns = np.divide(np.diff(equity), prev, out=np.zeros(prev.size), where=prev != 0)
+    step = np.median(np.diff(stamps))
+    scale = np.sqrt(YEAR_US / step) if step > 0 else 1.0
+    mean, std = returns.mean(), returns.std()
+    downside = np.sqrt(np.mean(np.minimum(returns, 0) ** 2))
+    if std > 0:
+        metrics["sharpe"] = float(mean / std * scale)
+    if downside > 0:
+        metrics["sortino"] = float(mean / downside * scale)
+    return metrics
+
+
+def trade_metrics(pnl: np.ndarray) -> dict:
+    """win_rate y profit_factor de las operaciones cerradas (NaN = compra)."""
+    closed = pnl[~np.isnan(pnl)]
+    if closed.size == 0:
+        return {"win_rate": None, "profit_factor": None}
+    gains = closed[closed > 0].sum()
+    losses = -closed[closed < 0].sum()
+    return {
+        "win_rate": float((closed > 0).mean()),
+        "profit_factor": float(gains / losses) if losses > 0 else None,
+    }
+
+
+def performance_metrics(ledger, px_ts: np.ndarray, px_close: np.ndarray,
+                        initial_usd: float, equity: np.ndarray = None) -> dict:
+    """
+    Bloque completo de métricas de un run: las de `equity_metrics` sobre la
+    equity marcada a mercado en las velas `px_ts`, las de `trade_metrics`,
+    la exposición (fracción de velas con posición abierta) y el nº de trades.
+    `equity` evita recalcular `mark_to_market` si ya se tiene.
+    """
+    pnl = round_trip_pnl(ledger, initial_usd)
+    exposure = 0.0
+    if px_ts.size:
+        if equity is None:
+            equity = mark_to_market(ledger, px_ts, px_close, initial_usd)
+        if ledger:
+            rows = sorted(ledger, key=lambda row: row[0])
+            fill_ts = np.array([row[0] for row in rows], dtype=np.int64)
+            qty = np.array([row[2] for row in rows], dtype=float)
+            last = np.searchsorted(fill_ts, px_ts, side="right") - 1
+            exposure = float(((last >= 0) & (qty[np.clip(last, 0, None)] > 0)).mean())
+    else:
+        # sin velas: solo los balances tras cerrar posición, sin Sharpe/Sortino
+        equity = np.array([float(initial_usd)] + [row[1] for row in ledger if row[2] == 0])
+        px_ts = None
+
+    return {
+        **equity_metrics(equity, px_ts, initial_usd),
+        **trade_metrics(pnl),
+        "exposure": exposure,
+        "trade_count": len(ledger),
+    }
@@ -0,0 +1,36 @@
+"""
+Remuestreo de velas de 1 minuto a marcos temporales mayores.
+
+HistoricalPrice solo guarda el cierre de cada vela de 1m, así que la vela
+agregada se construye con esos cierres: open = primer cierre del intervalo,
+high/low = máximo/mínimo de los cierres, close = último cierre, y `count`
+velas de 1m (en lugar de volumen, que no se guarda).
+
+Los intervalos se alinean a múltiplos de `step_us` desde epoch (UTC) y se
+identifican por su hora de apertura. Todo se calcula con `reduceat` sobre
+los límites de cada grupo, sin bucles en Python.
+"""
+import numpy as np
+
+
+def resample_ohlc(stamps: np.ndarray, closes: np.ndarray, step_us: int):
+    """
+    (open_time µs, open, high, low, close, count) de las velas de `step_us`
+    construidas con los cierres `closes` en `stamps` (µs, ordenados). Los
+    intervalos sin velas no aparecen.
+    """
+    if stamps.size == 0:
+        empty = np.empty(0)
+        return np.empty(0, dtype=np.int64), empty, empty, empty, empty, np.empty(0, dtype=np.int64)
+
+    buckets = stamps // step_us
+    starts = np.flatnonzero(np.diff(buckets, prepend=buckets[0] - 1))
+    ends = np.append(starts[1:], stamps.size) - 1
+
+    closes = np.asarray(closes, dtype=float)
+    return (buckets[starts] * step_us,
+            closes[starts],
+            np.maximum.reduceat(closes, starts),
+            np.minimum.reduceat(closes, starts),
+            closes[ends],
+            np.diff(np.append(starts, stamps.size)))
@@ -0,0 +1,168 @@
+"""
+Barrido de parámetros de backtest en paralelo.
+
+La rejilla se agrupa por parámetros de señal (SMA short/long o RSI
+period/low/high): cada grupo calcula sus señales una sola vez y simula
+todas las combinaciones de ejecución (TP/SL, fee, slippage) sobre ellas.
+
+Los precios se pasan una vez a cada proceso del pool (initializer), no por
+combinación; con `fork` los workers los heredan sin copiarlos.
+
+Las combinaciones se comparan por su equity marcada a mercado en el último
+cierre (`final_equity`), no por el balance en efectivo: una combinación que
+termina con la posición abierta no cuenta como pérdida total.
+"""
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from core.analysis.backtest import final_equity, simulate
+from core.analysis.indicators import _cross_masks, rsi
+from core.indicators.sma import rolling_mean
+
+# arrays de precios y cachés de indicadores del proceso actual
+_PRICES = {}
+_CACHE = {}
+
+
+def _values(grid: dict, key: str, default):
+    value = grid.get(key, default)
+    return list(value) if isinstance(value, (list, tuple)) else [value]
+
+
+def expand_grid(grid: dict):
+    """
+    Convierte la rejilla en [(signal_params, [exec_params, ...]), ...].
+
+    grid admite: short, long (SMA), period, low, high (RSI), take_profit,
+    stop_loss, fee, slippage. Cada valor puede ser escalar o lista; None en
+    take_profit/stop_loss significa sin TP/SL.
+    """
+    signals = []
+    if "short" in grid or "long" in grid:
+        for short, long in itertools.product(_values(grid, "short", 5), _values(grid, "long", 20)):
+            if short < long:
+                signals.append({"strategy": "ma_cross", "short": int(short), "long": int(long)})
+    if "period" in grid:
+        for period, low, high in itertools.product(_values(grid, "period", 14),
+                                                   _values(grid, "low", 30.0),
+                                                   _values(grid, "high", 70.0)):
+            if low < high:
+                signals.append({"strategy": "rsi", "period": int(period),
+                                "low": float(low), "high": float(high)})
+
+    executions = [
+        {"take_profit": tp, "stop_loss": sl, "fee": fee, "slippage": slip}
+        for tp, sl, fee, slip in itertools.product(_values(grid, "take_profit", None),
+                                                   _values(grid, "stop_loss", None),
+                                                   _values(grid, "fee", 0.001),
+                                                   _values(grid, "slippage", 0.001))
+    ]
+    return [(sig, executions) for sig in signals]
+
+
+def _init_worker(closes: np.ndarray, stamps: np.ndarray):
+    _PRICES["close"] = closes
+    _PRICES["ts"] = stamps
+    _CACHE.clear()
+
+
+def _cached(kind: str, period: int):
+    key = (kind, period)
+    if key not in _CACHE:
+        fn = rolling_mean if kind == "sma" else rsi
+        _CACHE[key] = fn(_PRICES["close"], period)
+    return _CACHE[key]
+
+
+def signal_indices(params: dict):
+    """
+    (índices ordenados, es_buy) de las señales de `params` sobre la serie
+    completa del proceso; se calculan una vez y quedan en caché.
+    """
+    key = ("signals",) + tuple(sorted(params.items()))
+    if key not in _CACHE:
+        _CACHE[key] = _signal_indices(params)
+    return _CACHE[key]
+
+
+def _signal_indices(params: dict):
+    if params["strategy"] == "ma_cross":
+        buy, sell = _cross_masks(_cached("sma", params["short"]), _cached("sma", params["long"]))
+    else:
+        vals = _cached("rsi", params["period"])
+        low, high = params["low"], params["high"]
+        buy = np.zeros(vals.size, dtype=bool)
+        sell = np.zeros(vals.size, dtype=bool)
+        buy[1:] = (vals[:-1] >= low) & (vals[1:] < low)
+        sell[1:] = (vals[:-1] <= high) & (vals[1:] > high)
+    idx = np.flatnonzero(buy | sell)
+    return idx, buy[idx]
+
+
+def simulate_slice(signal_params: dict, ex: dict, initial_usd: float,
+                   lo: int = 0, hi: int = None):
+    """
+    Simula `signal_params` + `ex` usando solo las velas [lo, hi) de la serie
+    del proceso. Las señales salen de los indicadores de la serie completa,
+    así que un tramo no inventa un “cruce inicial” en su primera vela.
+    Añade al resultado `final_equity`, la equity en el último cierre del tramo.
+    """
+    closes, stamps = _PRICES["close"][lo:hi], _PRICES["ts"][lo:hi]
+    idx, is_buy = signal_indices(signal_params)
+    if lo or hi is not None:
+        end = _PRICES["close"].size if hi is None else hi
+        keep = (idx >= lo) & (idx < end)
+        idx, is_buy = idx[keep] - lo, is_buy[keep]
+    res = simulate(stamps[idx], is_buy, closes[idx], stamps, closes,
+                   initial_usd=initial_usd,
+                   fee_pct=ex["fee"],
+                   slippage_pct=ex["slippage"],
+                   pct_take_profit=ex["take_profit"],
+                   pct_stop_loss=ex["stop_loss"])
+    res["final_equity"] = final_equity(res["ledger"], closes[-1] if closes.size else 0.0,
+                                       initial_usd)
+    return res
+
+
+def _run_group(signal_params: dict, executions, initial_usd: float):
+    results = []
+    for ex in executions:
+        res = simulate_slice(signal_params, ex, initial_usd)
+        results.append({
+            "params": {**signal_params, **ex},
+            "final_usd": res["final_equity"],
+            "total_return": res["final_equity"] / initial_usd - 1,
+            "trades": len(res["trades"]),
+        })
+    return results
+
+
+def run_sweep(closes: np.ndarray, stamps: np.ndarray, grid: dict,
+              initial_usd: float = 1000.0, workers: int = None):
+    """
+    Evalúa todas las combinaciones de `grid` y devuelve la lista de
+    resultados ordenada por `final_usd` (equity marcada a mercado en el
+    último cierre) descendente.
+    workers=1 ejecuta en el proceso actual (útil en tests).
+    """
+    groups = expand_grid(grid)
+    workers = workers or os.cpu_count() or 1
+
+    if workers == 1 or len(groups) <= 1:
+        _init_worker(closes, stamps)
+        nested = [_run_group(sig, ex, initial_usd) for sig, ex in groups]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(closes, stamps)) as pool:
+            nested = list(pool.map(_run_group,
+                                   [sig for sig, _ in groups],
+                                   [ex for _, ex in groups],
+                                   itertools.repeat(initial_usd),
+                                   chunksize=max(1, len(groups) // (workers * 4))))
+
+    results = [r for group in nested for r in group]
+    results.sort(key=lambda r: r["final_usd"], reverse=True)
+    return results
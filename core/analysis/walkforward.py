@@ -0,0 +1,103 @@
+"""
+Optimización walk-forward.
+
+La serie se divide en ventanas móviles in-sample / out-of-sample: en cada
+ventana se elige la mejor combinación de la rejilla sobre el tramo
+in-sample (por su equity marcada a mercado al final del tramo) y se evalúa
+sobre el tramo out-of-sample siguiente. Las curvas
+out-of-sample se encadenan en una sola curva de equity.
+
+Las ventanas se reparten entre procesos (mismo pool e initializer que
+`core.analysis.sweep`); en cada proceso los indicadores y las señales se
+calculan una sola vez sobre la serie completa y se reutilizan en todas las
+ventanas que se solapan.
+"""
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from core.analysis import sweep
+from core.analysis.backtest import mark_to_market
+
+
+def make_windows(stamps: np.ndarray, in_sample_us: int, out_sample_us: int):
+    """
+    Ventanas [(is_lo, is_hi, oos_lo, oos_hi), ...] como rangos de índices
+    semiabiertos sobre `stamps`. Avanzan de out-of-sample en out-of-sample,
+    así que los tramos OOS son contiguos y no se solapan.
+    """
+    if stamps.size == 0:
+        return []
+    windows = []
+    t0, last = int(stamps[0]), int(stamps[-1])
+    for k in itertools.count():
+        is_start = t0 + k * out_sample_us
+        oos_start = is_start + in_sample_us
+        if oos_start > last:
+            break
+        is_lo, oos_lo, oos_hi = np.searchsorted(
+            stamps, [is_start, oos_start, oos_start + out_sample_us], side="left")
+        if oos_hi > oos_lo and oos_lo > is_lo:
+            windows.append((int(is_lo), int(oos_lo), int(oos_lo), int(oos_hi)))
+    return windows
+
+
+def _run_window(window, groups, initial_usd: float):
+    is_lo, is_hi, oos_lo, oos_hi = window
+    best = None
+    for signal_params, executions in groups:
+        for ex in executions:
+            res = sweep.simulate_slice(signal_params, ex, initial_usd, is_lo, is_hi)
+            # misma medida que el tramo OOS: equity a mercado al final del tramo
+            if best is None or res["final_equity"] > best[0]:
+                best = (res["final_equity"], signal_params, ex)
+
+    is_final, signal_params, ex = best
+    res = sweep.simulate_slice(signal_params, ex, initial_usd, oos_lo, oos_hi)
+    curve = mark_to_market(res["ledger"], sweep._PRICES["ts"][oos_lo:oos_hi],
+                           sweep._PRICES["close"][oos_lo:oos_hi], initial_usd)
+    return {
+        "window": window,
+        "params": {**signal_params, **ex},
+        "is_final_usd": is_final,
+        "oos_final_usd": float(curve[-1]),
+        "oos_trades": len(res["trades"]),
+        "oos_curve": curve,
+    }
+
+
+def walk_forward(closes: np.ndarray, stamps: np.ndarray, grid: dict,
+                 in_sample_us: int, out_sample_us: int,
+                 initial_usd: float = 1000.0, workers: int = None):
+    """
+    Ejecuta el walk-forward y devuelve (ventanas, ts, equity): el detalle de
+    cada ventana y la curva OOS encadenada (cada tramo empieza con la equity
+    con la que terminó el anterior, marcada a mercado en cada vela).
+    """
+    groups = sweep.expand_grid(grid)
+    windows = make_windows(stamps, in_sample_us, out_sample_us)
+    workers = workers or os.cpu_count() or 1
+    if not windows or not groups:
+        return [], np.empty(0, dtype=np.int64), np.empty(0)
+
+    if workers == 1 or len(windows) == 1:
+        sweep._init_worker(closes, stamps)
+        results = [_run_window(w, groups, initial_usd) for w in windows]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=sweep._init_worker,
+                                 initargs=(closes, stamps)) as pool:
+            results = list(pool.map(_run_window, windows,
+                                    itertools.repeat(groups), itertools.repeat(initial_usd)))
+
+    # encadenado: cada curva OOS se escala por la equity acumulada
+    ts_parts, eq_parts, capital = [], [], float(initial_usd)
+    for res in results:
+        _, _, oos_lo, oos_hi = res["window"]
+        curve = res.pop("oos_curve") / initial_usd * capital
+        ts_parts.append(stamps[oos_lo:oos_hi])
+        eq_parts.append(curve)
+        res["oos_start_equity"] = capital
+        capital = float(curve[-1])
+    return results, np.concatenate(ts_parts), np.concatenate(eq_parts)
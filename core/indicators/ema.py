@@ -0,0 +1,79 @@
+"""
+EMA vectorizada (sin bucle por elemento).
+
+La recurrencia  ema[t] = alpha·x[t] + (1-alpha)·ema[t-1]  tiene forma cerrada
+dentro de un bloque:
+
+    ema[t] = d^t · Σ_{k≤t} d^-k · z[k]      con d = 1 - alpha
+
+así que cada bloque se resuelve con una suma acumulada. El tamaño de bloque
+se elige para que d^-k no desborde y el último valor de cada bloque se
+arrastra al siguiente. Con alpha = 1/period se obtiene el suavizado de Wilder.
+
+Semántica de NaN (la del antiguo bucle de `indicators._ema`): el primer
+valor siembra la media, un NaN en la entrada da NaN en la salida y el
+siguiente valor válido vuelve a sembrar.
+"""
+import numpy as np
+
+# d^-k se mantiene por debajo de 1e200 dentro de cada bloque
+_LOG_LIMIT = np.log(1e200)
+MAX_BLOCK = 4096
+
+
+def _block_size(decay: float) -> int:
+    return int(max(1, min(MAX_BLOCK, _LOG_LIMIT // -np.log(decay))))
+
+
+def _ewm_block(x: np.ndarray, carry: np.ndarray, alpha: float, decay: float):
+    """Resuelve un bloque (m, b) partiendo de `carry` (m,), que puede ser NaN."""
+    b = x.shape[1]
+    k = np.arange(b)
+    nan = np.isnan(x)
+
+    prev_nan = np.empty_like(nan)
+    prev_nan[:, 0] = np.isnan(carry)
+    prev_nan[:, 1:] = nan[:, :-1]
+    seed = prev_nan & ~nan
+
+    # las semillas entran con peso 1, el resto con alpha; los NaN no suman
+    z = np.where(nan, 0.0, np.where(seed, x, alpha * x))
+    acc = np.cumsum(z * decay ** -k, axis=1)
+
+    # contribución desde la última semilla (o desde el inicio del bloque)
+    last_seed = np.maximum.accumulate(np.where(seed, k, -1), axis=1)
+    before = np.take_along_axis(acc, np.clip(last_seed - 1, 0, None), axis=1)
+    acc = acc - np.where(last_seed > 0, before, 0.0)
+
+    out = decay ** k * acc
+    # sin semilla en el bloque, la media que venía del bloque anterior decae
+    from_carry = last_seed < 0
+    out += np.where(from_carry, np.nan_to_num(carry)[:, None] * decay ** (k + 1), 0.0)
+    out[nan] = np.nan
+    return out
+
+
+def ewm(arr: np.ndarray, alpha: float) -> np.ndarray:
+    """
+    Media móvil exponencial con factor `alpha` a lo largo del último eje.
+    Acepta 1-D o 2-D (una fila por símbolo).
+    """
+    if not 0 < alpha <= 1:
+        raise ValueError("alpha must be in (0, 1]")
+    x = np.asarray(arr, dtype=float)
+    rows = np.atleast_2d(x)
+    n = rows.shape[1]
+    decay = 1.0 - alpha
+
+    if decay == 0.0:
+        # alpha = 1: la media es la propia serie
+        return x.copy()
+
+    out = np.empty_like(rows)
+    carry = np.full(rows.shape[0], np.nan)
+    block = _block_size(decay)
+    for start in range(0, n, block):
+        part = _ewm_block(rows[:, start:start + block], carry, alpha, decay)
+        out[:, start:start + block] = part
+        carry = part[:, -1]
+    return out.reshape(x.shape)
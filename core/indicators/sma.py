@@ -0,0 +1,99 @@
+"""
+Kernels O(n) para medias móviles simples.
+
+Las sumas de ventana salen de sumas acumuladas, así que el coste no depende
+del periodo (una SMA 200 cuesta lo mismo que una SMA 3). Para que el error
+de redondeo no crezca con la longitud de la serie, la suma acumulada se
+reinicia en bloques de tamaño `>= period`: cada ventana cruza como mucho
+una frontera de bloque y solo resta valores de su bloque o del anterior.
+
+Una ventana que contiene algún NaN devuelve NaN, igual que
+`sliding_window_view(...).mean(axis=1)`.
+"""
+import numpy as np
+
+MIN_BLOCK = 4096
+
+
+def _block_prefix(x: np.ndarray, block: int) -> np.ndarray:
+    """Suma acumulada de `x` reiniciada cada `block` elementos."""
+    n = x.size
+    full = n - n % block
+    prefix = np.empty(n)
+    if full:
+        np.cumsum(x[:full].reshape(-1, block), axis=1, out=prefix[:full].reshape(-1, block))
+    np.cumsum(x[full:], out=prefix[full:])
+    return prefix
+
+
+def _window_sums(prefix: np.ndarray, period: int, block: int) -> np.ndarray:
+    """
+    Suma de cada ventana que termina en i, para i en [period-1, n-1], a partir
+    del prefijo por bloques de `_block_prefix`.
+    """
+    n = prefix.size
+    sums = prefix[period - 1:].copy()
+    sums[1:] -= prefix[:n - period]
+
+    # en las ventanas que cruzan una frontera de bloque el valor restado es
+    # del bloque anterior: hay que sumarles el total de ese bloque
+    for start in range(block, n, block):
+        sums[start - period + 1:min(start, n - period) + 1] += prefix[start - 1]
+    return sums
+
+
+def _nan_windows(nan: np.ndarray, period: int) -> np.ndarray:
+    """True para cada ventana que contiene al menos un NaN."""
+    count = np.cumsum(nan, dtype=np.int64)
+    inside = count[period - 1:].copy()
+    inside[1:] -= count[:-period]
+    return inside > 0
+
+
+def _means(x: np.ndarray, prefix: np.ndarray, nan, period: int, block: int) -> np.ndarray:
+    out = np.full(x.size, np.nan)
+    if period > x.size:
+        return out
+    means = _window_sums(prefix, period, block) / period
+    if nan is not None:
+        means[_nan_windows(nan, period)] = np.nan
+    out[period - 1:] = means
+    return out
+
+
+def _prepare(series, longest: int):
+    x = np.asarray(series, dtype=float)
+    block = max(longest, MIN_BLOCK)
+    nan = np.isnan(x)
+    if nan.any():
+        return x, _block_prefix(np.where(nan, 0.0, x), block), nan, block
+    return x, _block_prefix(x, block), None, block
+
+
+def rolling_mean(series: np.ndarray, period: int) -> np.ndarray:
+    """
+    SMA O(n) alineada con `series`: NaN en las primeras `period` - 1
+    posiciones (todo NaN si la serie es más corta que `period`).
+    """
+    if period < 1:
+        raise ValueError("period must be >= 1")
+    x, prefix, nan, block = _prepare(series, period)
+    return _means(x, prefix, nan, period, block)
+
+
+def sma_matrix(series: np.ndarray, periods) -> np.ndarray:
+    """
+    SMAs de varios periodos a partir de una sola pasada de suma acumulada.
+    Devuelve una matriz (len(periods), len(series)); la fila k es
+    `rolling_mean(series, periods[k])`.
+    """
+    periods = [int(p) for p in periods]
+    if any(p < 1 for p in periods):
+        raise ValueError("period must be >= 1")
+    if not periods:
+        return np.empty((0, np.asarray(series).size))
+    x, prefix, nan, block = _prepare(series, max(periods))
+    out = np.empty((len(periods), x.size))
+    for k, period in enumerate(periods):
+        out[k] = _means(x, prefix, nan, period, block)
+    return out
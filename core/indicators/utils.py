@@ -2,7 +2,9 @@
 Simple Moving Average (SMA) puro NumPy.
 """
 import numpy as np
-from numpy.lib.stride_tricks import sliding_window_view
+
+from core.indicators.sma import rolling_mean
+
 
 def sma(series: np.ndarray, period: int) -> np.ndarray:
     """
@@ -23,8 +25,4 @@ def sma(series: np.ndarray, period: int) -> np.ndarray:
     if period < 1 or period > series.size:
         raise ValueError("period out of bounds")
 
-    window = sliding_window_view(series, window_shape=period)
-    sma_vals = window.mean(axis=1)
-
-    # Pre‑pend NaNs para alinear con la serie original
-    return np.concatenate([np.full(period - 1, np.nan), sma_vals])
+    return rolling_mean(series, period)
@@ -0,0 +1,49 @@
+import json
+
+import numpy as np
+from core.analysis.indicators import ma_cross_signals, rsi
+from core.analysis.incremental import ma_cross_update, rsi_update
+
+
+def _random_walk(n=600, seed=7):
+    rng = np.random.default_rng(seed)
+    return 100 + np.cumsum(rng.normal(0, 1, n))
+
+
+def _feed(update, prices, chunks, *args):
+    """Alimenta `update` por trozos, serializando el estado como en la BD."""
+    state, offset = None, 0
+    out = {"BUY": [], "SELL": []}
+    values = []
+    for chunk in np.array_split(prices, chunks):
+        res = update(state, chunk, *args)
+        state = json.loads(json.dumps(res[0]))
+        for kind in out:
+            out[kind] += [offset + i for i in res[1][kind]]
+        if len(res) > 2:
+            values.append(res[2])
+        offset += chunk.size
+    return out, values
+
+
+def test_ma_cross_incremental_igual_que_batch():
+    prices = _random_walk()
+    expected = ma_cross_signals(prices, short=5, long=20)
+
+    for chunks in (1, 7, len(prices)):
+        got, _ = _feed(ma_cross_update, prices, chunks, 5, 20)
+        assert list(got["BUY"]) == list(expected["BUY"])
+        assert list(got["SELL"]) == list(expected["SELL"])
+
+
+def test_rsi_incremental_igual_que_batch():
+    prices = _random_walk()
+    rsi_vals = rsi(prices, period=14)
+    exp_buy = np.where((rsi_vals[:-1] >= 30) & (rsi_vals[1:] < 30))[0] + 1
+    exp_sell = np.where((rsi_vals[:-1] <= 70) & (rsi_vals[1:] > 70))[0] + 1
+
+    for chunks in (1, 9, len(prices)):
+        got, values = _feed(rsi_update, prices, chunks, 14, 30.0, 70.0)
+        assert got["BUY"] == exp_buy.tolist()
+        assert got["SELL"] == exp_sell.tolist()
+        np.testing.assert_allclose(np.concatenate(values), rsi_vals, equal_nan=True)
@@ -1,5 +1,5 @@
 import numpy as np
-from core.analysis.indicators import sma, ma_cross_signals, rsi
+from core.analysis.indicators import sma, ma_cross_signals, ma_cross_grid, rsi
 
 def test_sma_basico():
     arr = np.arange(1, 6)  # [1,2,3,4,5]
@@ -16,8 +16,28 @@ def test_ma_cross_signals():
 
     sig = ma_cross_signals(prices, short=3, long=5)
 
-    assert sig["BUY"]  == [4]   # primer punto con ambas SMA y cruce al alza
-    assert sig["SELL"] == [19]  # cruce a la baja
+    np.testing.assert_array_equal(sig["BUY"], [4])   # primer punto con ambas SMA y cruce al alza
+    np.testing.assert_array_equal(sig["SELL"], [19])  # cruce a la baja
+
+
+def test_ma_cross_signals_cruce_inicial_a_la_baja():
+    prices = np.array([10, 9, 8, 7, 6, 7, 8, 9, 10, 11], dtype=float)
+    sig = ma_cross_signals(prices, short=2, long=3)
+    assert sig["SELL"][0] == 2  # primer punto calculable con la corta por debajo
+    assert sig["BUY"].tolist() == [6]
+
+
+def test_ma_cross_grid_igual_que_por_par():
+    rng = np.random.default_rng(3)
+    prices = 100 + np.cumsum(rng.normal(0, 1, 500))
+    pairs = [(3, 5), (5, 20), (9, 21), (20, 50)]
+
+    grid = ma_cross_grid(prices, pairs)
+
+    for short, long in pairs:
+        single = ma_cross_signals(prices, short=short, long=long)
+        np.testing.assert_array_equal(grid[(short, long)]["BUY"], single["BUY"])
+        np.testing.assert_array_equal(grid[(short, long)]["SELL"], single["SELL"])
 
 
 def test_rsi_basico():
@@ -38,3 +58,81 @@ def test_rsi_basico():
     assert rsi_vals[14] >= 70
 
 
+
+
+def _sma_ventana(arr, period):
+    """Referencia O(n·period) con sliding_window_view."""
+    from numpy.lib.stride_tricks import sliding_window_view
+    if arr.size < period:
+        return np.full(arr.size, np.nan)
+    return np.concatenate((np.full(period - 1, np.nan),
+                           sliding_window_view(arr, period).mean(axis=1)))
+
+
+def test_sma_kernel_on_igual_que_ventana():
+    rng = np.random.default_rng(11)
+    prices = 60000 + np.cumsum(rng.normal(0, 50, 20000))
+    prices[777] = np.nan  # las ventanas que lo contienen quedan en NaN
+
+    for period in (1, 3, 50, 200, 5000, 20001):
+        np.testing.assert_allclose(sma(prices, period), _sma_ventana(prices, period),
+                                   rtol=1e-12, equal_nan=True)
+
+
+def test_sma_matrix_una_fila_por_periodo():
+    from core.indicators.sma import sma_matrix
+
+    prices = np.arange(1, 301, dtype=float)
+    periods = [3, 5, 50, 200]
+    mat = sma_matrix(prices, periods)
+
+    assert mat.shape == (4, 300)
+    for row, period in zip(mat, periods):
+        np.testing.assert_allclose(row, sma(prices, period), equal_nan=True)
+
+
+def test_sma_utils_conserva_limites():
+    import pytest
+    from core.indicators.utils import sma as sma_utils
+
+    arr = np.arange(1, 6, dtype=float)
+    np.testing.assert_allclose(sma_utils(arr, 3), [np.nan, np.nan, 2, 3, 4], equal_nan=True)
+    with pytest.raises(ValueError):
+        sma_utils(arr, 6)
+    # la versión de analysis devuelve todo NaN en vez de fallar
+    assert np.isnan(sma(arr, 6)).all()
+
+
+def _ema_bucle(arr, alpha):
+    """Referencia: la recurrencia elemento a elemento que usaba `_ema`."""
+    ema = np.full(arr.size, np.nan)
+    for i, val in enumerate(arr):
+        if i == 0 or np.isnan(ema[i - 1]):
+            ema[i] = val
+        else:
+            ema[i] = val * alpha + ema[i - 1] * (1 - alpha)
+    return ema
+
+
+def test_ewm_igual_que_recurrencia_con_nan():
+    from core.indicators.ema import ewm
+
+    rng = np.random.default_rng(5)
+    prices = 60000 + np.cumsum(rng.normal(0, 50, 10000))
+    prices[[0, 500, 501, 9000]] = np.nan  # cada NaN vuelve a sembrar la media
+
+    for period in (1, 2, 14, 200):
+        alpha = 2 / (period + 1)
+        np.testing.assert_allclose(ewm(prices, alpha), _ema_bucle(prices, alpha),
+                                   rtol=1e-11, equal_nan=True)
+
+
+def test_rsi_2d_una_fila_por_simbolo():
+    rng = np.random.default_rng(8)
+    prices = 100 + np.cumsum(rng.normal(0, 1, (3, 400)), axis=1)
+
+    batch = rsi(prices, period=14)
+
+    assert batch.shape == prices.shape
+    for row, serie in zip(batch, prices):
+        np.testing.assert_allclose(row, rsi(serie, period=14), equal_nan=True)
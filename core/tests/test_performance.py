@@ -0,0 +1,58 @@
+import numpy as np
+from core.analysis.backtest import simulate
+from core.analysis.performance import (equity_metrics, performance_metrics, round_trip_pnl,
+                                       trade_metrics)
+
+MIN = 60_000_000  # 1 minuto en µs
+
+
+def test_pnl_por_operacion_cerrada():
+    # compra con 100, vende en 120; compra con 120, vende en 90
+    ledger = [(1, 0.0, 1.0), (2, 120.0, 0.0), (3, 0.0, 2.0), (4, 90.0, 0.0)]
+    pnl = round_trip_pnl(ledger, 100)
+    np.testing.assert_allclose(pnl, [np.nan, 20, np.nan, -30])
+
+    metrics = trade_metrics(pnl)
+    assert metrics["win_rate"] == 0.5
+    assert metrics["profit_factor"] == 20 / 30
+
+
+def test_drawdown_y_retorno():
+    equity = np.array([100, 120, 90, 110, 130], dtype=float)
+    metrics = equity_metrics(equity, np.arange(5) * MIN, 100)
+    assert np.isclose(metrics["total_return"], 0.3)
+    assert np.isclose(metrics["max_drawdown"], 0.25)
+    assert metrics["sharpe"] > 0 and metrics["sortino"] > 0
+
+    plana = equity_metrics(np.full(5, 100.0), np.arange(5) * MIN, 100)
+    assert plana["sharpe"] is None and plana["max_drawdown"] == 0
+
+
+def test_metricas_de_un_backtest():
+    closes = np.array([10, 11, 12, 13, 12, 11], dtype=float)
+    stamps = np.arange(6, dtype=np.int64) * MIN
+    res = simulate(stamps[[1, 3]], np.array([True, False]), closes[[1, 3]], stamps, closes,
+                   initial_usd=110, fee_pct=0, slippage_pct=0)
+
+    metrics = performance_metrics(res["ledger"], stamps, closes, 110)
+    assert metrics["trade_count"] == 2
+    assert np.isclose(metrics["total_return"], 130 / 110 - 1)
+    assert metrics["win_rate"] == 1.0 and metrics["profit_factor"] is None
+    assert np.isclose(metrics["exposure"], 2 / 6)
+
+    vacio = performance_metrics([], stamps, closes, 110)
+    assert vacio["trade_count"] == 0 and vacio["total_return"] == 0 and vacio["exposure"] == 0
+
+
+def test_lttb_conserva_extremos():
+    from core.analysis.downsample import lttb
+
+    x = np.arange(10_000, dtype=float)
+    y = np.sin(x / 500)
+    y[4321] = 5.0   # pico aislado
+    idx = lttb(x, y, 200)
+
+    assert idx.size == 200 and idx[0] == 0 and idx[-1] == 9999
+    assert np.all(np.diff(idx) > 0)
+    assert 4321 in idx
+    np.testing.assert_array_equal(lttb(x[:50], y[:50], 200), np.arange(50))
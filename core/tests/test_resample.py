@@ -0,0 +1,21 @@
+import numpy as np
+from core.analysis.resample import resample_ohlc
+
+MIN = 60_000_000  # 1 minuto en µs
+
+
+def test_ohlc_por_intervalo_con_huecos():
+    # close_time de las velas 1m (minuto + 59.999 s); falta el intervalo 10-14
+    minutes = np.array([0, 1, 2, 3, 4, 5, 6, 15, 16])
+    stamps = minutes * MIN + 59_999_000
+    closes = np.array([5, 7, 3, 4, 6, 8, 2, 9, 1], dtype=float)
+
+    t, o, h, l, c, n = resample_ohlc(stamps, closes, 5 * MIN)
+    np.testing.assert_array_equal(t, [0, 5 * MIN, 15 * MIN])
+    np.testing.assert_array_equal(o, [5, 8, 9])
+    np.testing.assert_array_equal(h, [7, 8, 9])
+    np.testing.assert_array_equal(l, [3, 2, 1])
+    np.testing.assert_array_equal(c, [6, 2, 1])
+    np.testing.assert_array_equal(n, [5, 2, 2])
+
+    assert all(a.size == 0 for a in resample_ohlc(np.empty(0, dtype=np.int64), np.empty(0), MIN))
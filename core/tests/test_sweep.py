@@ -0,0 +1,63 @@
+import numpy as np
+from core.analysis.backtest import mark_to_market, simulate
+from core.analysis.indicators import ma_cross_signals
+from core.analysis.sweep import expand_grid, run_sweep
+
+
+def _precios(n=2000, seed=2):
+    rng = np.random.default_rng(seed)
+    closes = 100 + np.cumsum(rng.normal(0, 1, n))
+    stamps = np.arange(n, dtype=np.int64) * 60_000_000  # 1 min en µs
+    return closes, stamps
+
+
+def test_expand_grid_agrupa_por_senal():
+    groups = expand_grid({"short": [3, 5, 30], "long": [20, 50],
+                          "take_profit": [None, 0.01], "fee": [0.001, 0.002]})
+    # (30, 20) se descarta por short >= long
+    assert [g[0]["short"] for g in groups] == [3, 3, 5, 5, 30]
+    assert all(len(ex) == 4 for _, ex in groups)
+
+
+def test_run_sweep_igual_que_simulacion_directa():
+    closes, stamps = _precios()
+    grid = {"short": [3, 5], "long": [20], "period": [14], "low": [30], "high": [70],
+            "take_profit": [None, 0.02], "stop_loss": [0.01]}
+
+    results = run_sweep(closes, stamps, grid, workers=1)
+
+    assert len(results) == 6
+    finals = [r["final_usd"] for r in results]
+    assert finals == sorted(finals, reverse=True)
+
+    res = next(r for r in results if r["params"]["strategy"] == "ma_cross"
+               and r["params"]["short"] == 5 and r["params"]["take_profit"] is None)
+    sig = ma_cross_signals(closes, 5, 20)
+    idx = np.sort(np.concatenate((sig["BUY"], sig["SELL"])))
+    expected = simulate(stamps[idx], np.isin(idx, sig["BUY"]), closes[idx], stamps, closes,
+                        pct_stop_loss=0.01)
+    assert res["final_usd"] == mark_to_market(expected["ledger"], stamps, closes, 1000.0)[-1]
+
+
+def test_run_sweep_valora_a_mercado_las_posiciones_abiertas():
+    # subida continua: el cruce compra pronto y nunca vende
+    closes = np.linspace(100, 200, 300)
+    closes[:30] = np.linspace(110, 100, 30)
+    stamps = np.arange(closes.size, dtype=np.int64) * 60_000_000
+
+    results = run_sweep(closes, stamps, {"short": [3], "long": [10], "fee": [0.0],
+                                         "slippage": [0.0]}, workers=1)
+
+    assert results[0]["trades"] == 1
+    assert results[0]["final_usd"] > 1000.0
+    assert results[0]["total_return"] == results[0]["final_usd"] / 1000.0 - 1
+
+
+def test_run_sweep_en_paralelo_igual_que_en_serie():
+    closes, stamps = _precios()
+    grid = {"short": [3, 5, 9], "long": [20, 50], "stop_loss": [None, 0.01]}
+
+    serie = run_sweep(closes, stamps, grid, workers=1)
+    paralelo = run_sweep(closes, stamps, grid, workers=2)
+
+    assert serie == paralelo
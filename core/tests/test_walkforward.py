@@ -0,0 +1,65 @@
+import numpy as np
+from core.analysis.backtest import mark_to_market, simulate
+from core.analysis.walkforward import make_windows, walk_forward
+
+MIN = 60_000_000  # 1 minuto en µs
+
+
+def _precios(n=3000, seed=4):
+    rng = np.random.default_rng(seed)
+    return 100 + np.cumsum(rng.normal(0, 1, n)), np.arange(n, dtype=np.int64) * MIN
+
+
+def test_ventanas_oos_contiguas():
+    _, stamps = _precios(1000)
+    windows = make_windows(stamps, in_sample_us=300 * MIN, out_sample_us=100 * MIN)
+
+    assert windows[0] == (0, 300, 300, 400)
+    for (_, _, _, prev_hi), (_, _, lo, _) in zip(windows, windows[1:]):
+        assert lo == prev_hi
+    assert windows[-1][3] == 1000
+
+
+def test_mark_to_market_en_cada_vela():
+    closes = np.array([10, 11, 12, 13, 12], dtype=float)
+    stamps = np.arange(5, dtype=np.int64)
+    res = simulate(np.array([1, 3]), np.array([True, False]), closes[[1, 3]], stamps, closes,
+                   initial_usd=110, fee_pct=0, slippage_pct=0)
+
+    equity = mark_to_market(res["ledger"], stamps, closes, 110)
+    np.testing.assert_allclose(equity, [110, 110, 120, 130, 130])
+
+
+def test_walk_forward_encadena_curvas_oos():
+    closes, stamps = _precios()
+    grid = {"short": [3, 5], "long": [20, 50], "stop_loss": [None, 0.01]}
+
+    windows, ts, equity = walk_forward(closes, stamps, grid, in_sample_us=1000 * MIN,
+                                       out_sample_us=500 * MIN, workers=1)
+
+    assert len(windows) == 4
+    assert ts.size == equity.size == 2000
+    np.testing.assert_array_equal(ts, stamps[1000:])
+    assert windows[0]["oos_start_equity"] == 1000.0
+    for prev, cur in zip(windows, windows[1:]):
+        _, _, _, hi = prev["window"]
+        assert cur["oos_start_equity"] == equity[hi - 1000 - 1]
+
+    paralelo = walk_forward(closes, stamps, grid, in_sample_us=1000 * MIN,
+                            out_sample_us=500 * MIN, workers=2)
+    np.testing.assert_array_equal(paralelo[2], equity)
+
+
+def test_in_sample_elige_por_equity_a_mercado():
+    # el cruce 3/10 compra al principio y sigue comprado al cerrar el in-sample;
+    # el 3/1000 no opera nunca
+    closes = np.linspace(100, 200, 300)
+    closes[:30] = np.linspace(110, 100, 30)
+    stamps = np.arange(closes.size, dtype=np.int64) * MIN
+    grid = {"short": [3], "long": [10, 1000], "fee": [0.0], "slippage": [0.0]}
+
+    windows, _, _ = walk_forward(closes, stamps, grid, in_sample_us=200 * MIN,
+                                 out_sample_us=100 * MIN, workers=1)
+
+    assert windows[0]["params"]["long"] == 10
+    assert windows[0]["is_final_usd"] > 1000.0
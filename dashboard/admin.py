@@ -1,10 +1,12 @@
-from django.contrib import admin
-from .models import HistoricalPrice, TradingSignal, BacktestRun, Trade, SimulatedTrade
-from decimal import Decimal
+from django.contrib import admin, messages
+from .models import (HistoricalPrice, TradingSignal, BacktestRun, Trade, SimulatedTrade, SweepResult,
+                     WalkForwardWindow, BackfillCheckpoint, Position, BacktestJob)
 from dashboard.backtest import run_backtest
 from django.urls import path
 from dashboard.admin_views.backtest_manual import backtest_manual_view
-from dashboard.admin_views.equity_chart import equity_chart
+from dashboard.admin_views.equity_chart import equity_chart, equity_data
+from dashboard.admin_views.backtest_jobs import backtest_job_cancel, backtest_job_status
+from dashboard.utils.backtest_jobs import cancel_job, rerun_params, submit_backtests
 from django.utils.html import format_html
 
 @admin.register(SimulatedTrade)
@@ -14,7 +16,7 @@ class SimulatedTradeAdmin(admin.ModelAdmin):
     ordering = ("-ts",)
 
     def pnl(self, obj):
-        result = obj.pnl
+        result = obj.realized_pnl
         if result is None:
             return "-"
         color = "green" if result > 0 else "red"
@@ -23,6 +25,14 @@ class SimulatedTradeAdmin(admin.ModelAdmin):
 
 
     pnl.short_description = "PnL"
+    pnl.admin_order_field = "realized_pnl"
+
+
+@admin.register(Position)
+class PositionAdmin(admin.ModelAdmin):
+    list_display = ("symbol", "qty", "avg_price", "open_lot", "updated_at")
+    ordering = ("symbol",)
+    raw_id_fields = ("open_lot",)
 
 
 @admin.register(HistoricalPrice)
@@ -33,6 +43,13 @@ class HistoricalPriceAdmin(admin.ModelAdmin):
     ordering = ("-timestamp",)
 
 
+@admin.register(BackfillCheckpoint)
+class BackfillCheckpointAdmin(admin.ModelAdmin):
+    list_display = ("symbol", "start", "cursor", "candles", "done", "updated_at")
+    list_filter = ("symbol", "done")
+    ordering = ("-updated_at",)
+
+
 @admin.register(TradingSignal)
 class TradingSignalAdmin(admin.ModelAdmin):
     list_display = ("symbol", "signal_type", "price", "timestamp")
@@ -41,12 +58,36 @@ class TradingSignalAdmin(admin.ModelAdmin):
     ordering = ("-timestamp",)
 
 
+class SweepResultInline(admin.TabularInline):
+    model = SweepResult
+    fields = ("rank", "final_usd", "total_return", "trades", "params")
+    readonly_fields = fields
+    extra = 0
+    can_delete = False
+    max_num = 0
+
+
+class WalkForwardWindowInline(admin.TabularInline):
+    model = WalkForwardWindow
+    fields = ("index", "is_start", "oos_start", "oos_end", "is_return", "oos_return", "oos_trades", "params")
+    readonly_fields = fields
+    extra = 0
+    can_delete = False
+    max_num = 0
+
+
 @admin.register(BacktestRun)
 class BacktestRunAdmin(admin.ModelAdmin):
-    list_display = ("id", "start", "end", "initial_usd", "final_usd", "created_at", "ver_equity")
+    list_display = ("id", "symbol", "kind", "start", "end", "initial_usd", "final_usd",
+                    "total_return", "max_drawdown", "sharpe", "sortino", "win_rate",
+                    "profit_factor", "exposure", "trade_count", "created_at", "ver_equity")
+    list_filter = ("kind", "symbol")
     ordering = ("-created_at",)
     date_hierarchy = "created_at"
-    readonly_fields = ("start", "end", "initial_usd", "final_usd", "created_at")
+    readonly_fields = ("symbol", "kind", "params", "start", "end", "initial_usd", "final_usd",
+                       "total_return", "max_drawdown", "sharpe", "sortino", "win_rate",
+                       "profit_factor", "exposure", "trade_count", "created_at")
+    inlines = [SweepResultInline, WalkForwardWindowInline]
     search_fields = ("id",)
     actions = ["reanudar_backtest"]
     change_list_template = "admin/backtest_changelist_with_button.html"
@@ -55,19 +96,18 @@ class BacktestRunAdmin(admin.ModelAdmin):
 
     @admin.action(description="🔁 Volver a ejecutar Backtest seleccionado")
     def reanudar_backtest(self, request, queryset):
-        from dashboard.backtest import run_backtest
-        for run in queryset:
-            new_run = run_backtest(
-                symbol="BTCUSDT",  # por ahora estático
-                start=run.start,
-                end=run.end,
-                initial_usd=run.initial_usd,
-                fee_pct=Decimal("0.001"),
-                slippage_pct=Decimal("0.001"),
-                pct_take_profit=None,
-                pct_stop_loss=None,
-            )
-            self.message_user(request, f"✔️ Backtest nuevo creado: ID {new_run.id}")
+        # un job de Celery por run, ejecutados en paralelo, con el símbolo y
+        # los parámetros de cada run
+        params = {run.id: rerun_params(run) for run in queryset}
+        skipped = sorted(run_id for run_id, p in params.items() if p is None)
+        jobs = submit_backtests([p for p in params.values() if p is not None])
+        if jobs:
+            self.message_user(request, f"✔️ {len(jobs)} backtests en cola: jobs "
+                                       + ", ".join(f"#{job.id}" for job in jobs))
+        if skipped:
+            self.message_user(request, "Solo se repiten backtests simples; omitidos los runs "
+                                       + ", ".join(f"#{run_id}" for run_id in skipped),
+                              level=messages.WARNING)
 
     def ver_equity(self, obj):
         return format_html(
@@ -79,22 +119,34 @@ class BacktestRunAdmin(admin.ModelAdmin):
 
 
 
+@admin.register(BacktestJob)
+class BacktestJobAdmin(admin.ModelAdmin):
+    list_display = ("id", "status", "progress", "run", "params", "created_at", "started_at", "finished_at")
+    list_filter = ("status",)
+    ordering = ("-created_at",)
+    readonly_fields = ("status", "params", "progress", "task_id", "cancel_requested", "run", "error",
+                       "created_at", "started_at", "finished_at")
+    actions = ["cancelar_jobs"]
+
+    @admin.action(description="⏹ Cancelar jobs seleccionados")
+    def cancelar_jobs(self, request, queryset):
+        cancelled = sum(cancel_job(job) for job in queryset)
+        self.message_user(request, f"⏹ {cancelled} jobs cancelados")
+
+
 @admin.register(Trade)
 class TradeAdmin(admin.ModelAdmin):
     list_display = ("id", "run", "symbol", "side", "price", "qty", "ts_fill", "pnl")
     list_filter = ("side", "symbol", "run")
+    list_select_related = ("run",)
     search_fields = ("symbol",)
     ordering = ("-ts_fill",)
 
+    @admin.display(description="PnL", ordering="pnl")
     def pnl(self, obj):
-        if obj.side != "SELL":
+        if obj.pnl is None:
             return "-"
-        # Buscar la operación BUY anterior de este run
-        buy = Trade.objects.filter(run=obj.run, symbol=obj.symbol, side="BUY").order_by("ts_fill").last()
-        if not buy:
-            return "N/A"
-        diff = (obj.price - buy.price) * obj.qty
-        return f"{diff:.2f}"
+        return f"{obj.pnl:.2f}"
 
 # Agregar la URL a la vista personalizada
 admin.site.get_urls = admin.site.get_urls  # evitar error si no existe
@@ -117,6 +169,10 @@ def add_custom_equity_chart_url(original_get_urls):
         urls = original_get_urls()
         custom = [
             path("equity-chart/<int:run_id>/", admin.site.admin_view(equity_chart), name="equity-chart"),
+            path("equity-chart/<int:run_id>/data/", admin.site.admin_view(equity_data), name="equity-data"),
+            path("backtest-job/<int:job_id>/", admin.site.admin_view(backtest_job_status), name="backtest-job"),
+            path("backtest-job/<int:job_id>/cancel/", admin.site.admin_view(backtest_job_cancel),
+                 name="backtest-job-cancel"),
         ]
         return custom + urls
     return new_get_urls
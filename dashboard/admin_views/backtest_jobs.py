@@ -0,0 +1,29 @@
+from django.http import JsonResponse
+from django.shortcuts import get_object_or_404
+from django.views.decorators.http import require_POST
+from dashboard.models import BacktestJob
+from dashboard.utils.backtest_jobs import cancel_job
+
+
+def _job_json(job):
+    return {
+        "id": job.id,
+        "status": job.status,
+        "progress": job.progress,
+        "run": job.run_id,
+        "error": job.error,
+        "cancel_requested": job.cancel_requested,
+    }
+
+
+def backtest_job_status(request, job_id):
+    """Estado del job para hacer polling."""
+    return JsonResponse(_job_json(get_object_or_404(BacktestJob, id=job_id)))
+
+
+@require_POST
+def backtest_job_cancel(request, job_id):
+    job = get_object_or_404(BacktestJob, id=job_id)
+    cancelled = cancel_job(job)
+    job.refresh_from_db()
+    return JsonResponse({**_job_json(job), "cancelled": cancelled})
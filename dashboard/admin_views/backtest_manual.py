@@ -3,8 +3,8 @@ from django.urls import path
 from django.shortcuts import render, redirect
 from django.contrib import admin, messages
 from decimal import Decimal
-from dashboard.backtest import run_backtest
 from dashboard.models import BacktestRun
+from dashboard.utils.backtest_jobs import submit_backtest
 from django.utils import timezone
 
 
@@ -29,7 +29,7 @@ def backtest_manual_view(request):
             now = timezone.now()
             start = now - timezone.timedelta(hours=2)
 
-            run = run_backtest(
+            job = submit_backtest(
                 symbol=symbol,
                 start=start,
                 end=now,
@@ -38,8 +38,9 @@ def backtest_manual_view(request):
                 pct_take_profit=tp,
                 pct_stop_loss=sl,
             )
-            messages.success(request, f"✅ Backtest creado: ID {run.id} - Resultado: {run.final_usd} USD")
-            return redirect("admin:dashboard_backtestrun_changelist")
+            messages.success(request, f"✅ Backtest en cola: job #{job.id} "
+                                      f"(estado en /admin/backtest-job/{job.id}/)")
+            return redirect("admin:dashboard_backtestjob_changelist")
     else:
         form = BacktestManualForm()
 
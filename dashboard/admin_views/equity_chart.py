@@ -1,37 +1,36 @@
-import matplotlib.pyplot as plt
-from io import BytesIO
-from django.http import HttpResponse
-from dashboard.models import Trade, BacktestRun
+from django.http import HttpResponse, JsonResponse
+from django.shortcuts import get_object_or_404
+from dashboard.models import BacktestRun
+from dashboard.utils.equity_curve import cached_png, downsampled
 
 
-def equity_chart(request, run_id):
-    run = BacktestRun.objects.get(id=run_id)
-    trades = Trade.objects.filter(run=run).order_by("ts_fill")
+def _int_param(request, name, default, lo, hi):
+    try:
+        value = int(request.GET.get(name, default))
+    except ValueError:
+        value = default
+    return min(max(value, lo), hi)
 
-    balance = run.initial_usd
-    qty = 0
-    timestamps = [run.start]
-    balances = [balance]
 
-    for trade in trades:
-        if trade.side == "BUY":
-            qty = trade.qty
-            balance = 0
-        elif trade.side == "SELL":
-            balance = trade.price * qty
-            qty = 0
-        timestamps.append(trade.ts_fill)
-        balances.append(balance)
+def equity_chart(request, run_id):
+    """PNG de la curva (?width=&height= en píxeles), cacheado por run y tamaño."""
+    run = get_object_or_404(BacktestRun, id=run_id)
+    width = _int_param(request, "width", 1000, 200, 2000)
+    height = _int_param(request, "height", 400, 150, 1200)
+    return HttpResponse(cached_png(run, width, height), content_type="image/png")
 
-    plt.figure(figsize=(10, 4))
-    plt.plot(timestamps, balances, marker="o")
-    plt.xlabel("Tiempo")
-    plt.ylabel("Balance (USD)")
-    plt.title(f"Curva de equity - Run #{run.id}")
-    plt.grid(True)
-    plt.tight_layout()
 
-    buffer = BytesIO()
-    plt.savefig(buffer, format="png")
-    buffer.seek(0)
-    return HttpResponse(buffer.getvalue(), content_type="image/png")
+def equity_data(request, run_id):
+    """
+    Curva reducida con LTTB a ?points= puntos:
+    {"run", "total_points", "timestamps" (epoch ms), "equity"}.
+    """
+    run = get_object_or_404(BacktestRun, id=run_id)
+    points = _int_param(request, "points", 500, 3, 10_000)
+    stamps, equity, total = downsampled(run, points)
+    return JsonResponse({
+        "run": run.id,
+        "total_points": total,
+        "timestamps": (stamps // 1000).tolist(),
+        "equity": equity.round(8).tolist(),
+    })
@@ -1,7 +1,20 @@
 # dashboard/api.py
+import hashlib
+
+from django.db.models import Max
+from django.http import StreamingHttpResponse
+from django.utils.dateparse import parse_datetime
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
 from rest_framework import serializers, viewsets, filters
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.response import Response
+from rest_framework.views import APIView
 from django_filters.rest_framework import DjangoFilterBackend
-from .models import TradingSignal
+from .models import TradingSignal, SimulatedTrade
+from .pagination import KeysetPagination
+from .utils.candles import TIMEFRAMES, get_candles
+from .utils.export import DATASETS, FORMATS, stream_export
 
 
 class TradingSignalSerializer(serializers.ModelSerializer):
@@ -10,17 +23,134 @@ class TradingSignalSerializer(serializers.ModelSerializer):
         fields = ["id", "symbol", "signal_type", "price", "timestamp", "meta"]
 
 
+def _latest_signal(request):
+    # una sola consulta por request para el ETag y el Last-Modified
+    if not hasattr(request, "_latest_signal"):
+        request._latest_signal = TradingSignal.objects.aggregate(
+            last_id=Max("id"), last_created=Max("created_at"))
+    return request._latest_signal
+
+
+def _signals_etag(request, *args, **kwargs):
+    # cambia con cada señal nueva; la query string distingue filtros y páginas
+    latest = _latest_signal(request)
+    key = f"{latest['last_id']}:{request.META.get('QUERY_STRING', '')}"
+    return hashlib.sha1(key.encode()).hexdigest()
+
+
+def _signals_last_modified(request, *args, **kwargs):
+    return _latest_signal(request)["last_created"]
+
+
+@method_decorator(condition(etag_func=_signals_etag, last_modified_func=_signals_last_modified),
+                  name="list")
 class TradingSignalViewSet(viewsets.ReadOnlyModelViewSet):
     """
     /api/trading-signals/?symbol=BTCUSDT&signal_type=BUY
     /api/trading-signals/?timestamp__gte=2025-04-19T00:00
+    /api/trading-signals/?ordering=timestamp&cursor=<next>
+
+    Paginación keyset sobre (timestamp, id) (ver dashboard.pagination).
+    El listado lleva ETag y Last-Modified de la última señal insertada:
+    con If-None-Match / If-Modified-Since se responde 304 sin ejecutar el listado.
     """
-    queryset = TradingSignal.objects.all().order_by("-timestamp")
+    queryset = TradingSignal.objects.all()
     serializer_class = TradingSignalSerializer
-    filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
+    pagination_class = KeysetPagination
+    filter_backends = [DjangoFilterBackend]
     filterset_fields = {
         "symbol": ["exact"],
         "signal_type": ["exact"],
         "timestamp": ["gte", "lte"],
     }
-    ordering_fields = ["timestamp", "price"]
+
+
+class SimulatedTradeSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = SimulatedTrade
+        fields = ["id", "symbol", "side", "qty", "price", "total", "ts",
+                  "remaining_qty", "realized_pnl"]
+
+
+class SimulatedTradeViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    /api/simulated-trades/?symbol=BTCUSDT&side=SELL
+    realized_pnl es una columna (FIFO al ejecutar), sin consultas por fila.
+    """
+    queryset = SimulatedTrade.objects.all().order_by("-ts", "-id")
+    serializer_class = SimulatedTradeSerializer
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
+    filterset_fields = {
+        "symbol": ["exact"],
+        "side": ["exact"],
+        "ts": ["gte", "lte"],
+    }
+    ordering_fields = ["ts", "realized_pnl"]
+
+
+class ExportView(APIView):
+    """
+    /api/export/<prices|signals|trades|simulated-trades>/?fmt=csv|ndjson|bin
+        &symbol=BTCUSDT&start=2025-01-01T00:00Z&end=...&run=<id, solo trades>
+
+    Respuesta en streaming leída con un cursor del servidor (ver
+    dashboard.utils.export); `fmt` en lugar de `format`, que DRF reserva
+    para la negociación de contenido.
+    """
+
+    def get(self, request, dataset):
+        if dataset not in DATASETS:
+            raise NotFound(f"dataset desconocido: {dataset}")
+        fmt = request.query_params.get("fmt", "csv")
+        if fmt not in FORMATS:
+            raise ValidationError({"fmt": f"uno de {sorted(FORMATS)}"})
+
+        filters = {"symbol": request.query_params.get("symbol")}
+        for name in ("start", "end"):
+            value = request.query_params.get(name)
+            if value:
+                filters[name] = parse_datetime(value)
+                if filters[name] is None:
+                    raise ValidationError({name: "fecha ISO 8601 no válida"})
+        if request.query_params.get("run", "").isdigit():
+            filters["run"] = int(request.query_params["run"])
+
+        response = StreamingHttpResponse(stream_export(dataset, fmt, **filters),
+                                         content_type=FORMATS[fmt])
+        response["Content-Disposition"] = f'attachment; filename="{dataset}.{fmt}"'
+        return response
+
+
+class CandlesView(APIView):
+    """
+    /api/candles/?symbol=BTCUSDT&timeframe=5m&start=...&end=...
+    /api/candles/?symbol=BTCUSDT&timeframe=1h&limit=200   (últimas velas)
+
+    Velas OHLC remuestreadas desde HistoricalPrice (ver
+    dashboard.utils.candles) como arrays paralelos en lugar de un objeto
+    por vela: {"symbol", "timeframe", "t", "o", "h", "l", "c", "n"}.
+    """
+    max_limit = 5000
+
+    def get(self, request):
+        symbol = request.query_params.get("symbol")
+        if not symbol:
+            raise ValidationError({"symbol": "obligatorio"})
+        timeframe = request.query_params.get("timeframe", "1m")
+        if timeframe not in TIMEFRAMES:
+            raise ValidationError({"timeframe": f"uno de {list(TIMEFRAMES)}"})
+        try:
+            limit = min(max(int(request.query_params.get("limit", 500)), 1), self.max_limit)
+        except ValueError:
+            raise ValidationError({"limit": "entero"})
+
+        bounds = {}
+        for name in ("start", "end"):
+            value = request.query_params.get(name)
+            if value:
+                bounds[name] = parse_datetime(value)
+                if bounds[name] is None:
+                    raise ValidationError({name: "fecha ISO 8601 no válida"})
+
+        data = get_candles(symbol, timeframe, limit=limit, **bounds)
+        return Response({"symbol": symbol, "timeframe": timeframe, **data})
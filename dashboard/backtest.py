@@ -1,11 +1,32 @@
 import decimal
+import numpy as np
+from django.db import transaction
 from django.utils import timezone
-from dashboard.models import BacktestRun, Trade, TradingSignal, HistoricalPrice
+from core.analysis.backtest import first_exit, mark_to_market, simulate
+from core.analysis.performance import equity_metrics, performance_metrics, round_trip_pnl
+from core.analysis.sweep import run_sweep
+from core.analysis.walkforward import walk_forward
+from dashboard.models import (BacktestRun, EquityCurve, SweepResult, Trade, TradingSignal,
+                              HistoricalPrice, WalkForwardWindow)
+from dashboard.utils.timeseries import (from_epoch_us, load_price_arrays, load_signal_arrays,
+                                        to_epoch_us)
 
 
 DEC = decimal.Decimal
 
 
+class BacktestCancelled(Exception):
+    """Lanzada desde el callback `progress` para interrumpir un backtest."""
+
+# margen relativo de los umbrales float frente a los Decimal: mucho mayor que
+# el error de convertir un close de la base a float64
+_EXIT_MARGIN = 1e-12
+
+# El motor vectorizado trabaja en float64; frente al motor Decimal el
+# final_usd coincide con un error relativo menor que esta tolerancia.
+VECTOR_RTOL = 1e-9
+
+
 def run_backtest(symbol: str,
                  start=None,
                  end=None,
@@ -14,27 +35,68 @@ def run_backtest(symbol: str,
                  slippage_pct: DEC = DEC("0.001"),     # 0.1% slippage
                  pct_take_profit: DEC = None,          # ej. 0.05 = 5%
                  pct_stop_loss: DEC = None,
-                 qty_precision: int = 8):
+                 qty_precision: int = 8,
+                 engine: str = "decimal",
+                 progress=None):
     """
     Simula ejecución de señales de trading con una sola posición activa.
     Opcional: TP/SL automáticos.
-    """
 
-    equity_history = [(start, initial_usd)]  # ← Lista de tu equity en el tiempo
+    engine="vector" carga señales y precios una sola vez en arrays de NumPy,
+    busca las salidas TP/SL con búsquedas sobre el array y guarda todos los
+    trades con un único bulk insert (ver VECTOR_RTOL).
+
+    `progress(done, total)` se llama durante la ejecución; si lanza una
+    excepción (p. ej. BacktestCancelled) el backtest se interrumpe sin dejar
+    un BacktestRun a medias.
+
+    Los parámetros de ejecución se guardan en `run.params` (Decimal como
+    texto) para poder repetir el run.
+    """
+    params = {"fee_pct": fee_pct, "slippage_pct": slippage_pct,
+              "pct_take_profit": pct_take_profit, "pct_stop_loss": pct_stop_loss,
+              "qty_precision": qty_precision, "engine": engine}
+    params = {k: str(v) if isinstance(v, DEC) else v for k, v in params.items()}
+    if engine == "vector":
+        return _run_backtest_vector(symbol, start, end, initial_usd, fee_pct, slippage_pct,
+                                    pct_take_profit, pct_stop_loss, qty_precision, progress,
+                                    params)
+    if engine != "decimal":
+        raise ValueError(f"engine desconocido: {engine}")
 
     start = start or timezone.make_aware(timezone.datetime.min)
     end = end or timezone.now()
 
-    run = BacktestRun.objects.create(start=start, end=end, initial_usd=initial_usd)
+    run = BacktestRun.objects.create(start=start, end=end, initial_usd=initial_usd, symbol=symbol,
+                                     params=params)
+    try:
+        _run_backtest_decimal(run, symbol, start, end, initial_usd, fee_pct, slippage_pct,
+                              pct_take_profit, pct_stop_loss, qty_precision, progress)
+    except Exception:
+        run.delete()
+        raise
+    return run
+
 
+def _run_backtest_decimal(run, symbol, start, end, initial_usd, fee_pct, slippage_pct,
+                          pct_take_profit, pct_stop_loss, qty_precision, progress):
     balance = initial_usd
+    entry_balance = balance
     position_qty = DEC("0")
+    ledger = []   # (ts_fill µs, balance, posición) tras cada trade, para las métricas
 
     signals = (TradingSignal.objects
                .filter(symbol=symbol, timestamp__gte=start, timestamp__lte=end)
                .order_by("timestamp"))
 
-    for sig in signals:
+    # precios posteriores a `start` cargados una vez para buscar las salidas TP/SL
+    px_close, px_ts = (load_price_arrays(symbol, start=start)
+                       if pct_take_profit or pct_stop_loss else (None, None))
+
+    total = signals.count() if progress else 0
+    for done, sig in enumerate(signals):
+        if progress:
+            progress(done, total)
         price = DEC(str(sig.price))
 
         # --- COMPRAR ---
@@ -42,6 +104,7 @@ def run_backtest(symbol: str,
             slipped_price = price * (1 + slippage_pct)
             position_qty = (balance / slipped_price).quantize(DEC("1e-{}".format(qty_precision)))
             fee = position_qty * slipped_price * fee_pct
+            entry_balance = balance
             balance = DEC("0") - fee
 
             Trade.objects.create(
@@ -53,8 +116,7 @@ def run_backtest(symbol: str,
                 ts_signal=sig.timestamp,
                 ts_fill=sig.timestamp,
             )
-            equity_history.append((sig.timestamp, balance))
-
+            ledger.append((to_epoch_us(sig.timestamp), float(balance), float(position_qty)))
 
             # --- TP/SL automático (opcional) ---
             if pct_take_profit or pct_stop_loss:
@@ -64,29 +126,27 @@ def run_backtest(symbol: str,
                 take_price = buy_price * (1 + (pct_take_profit or DEC("0")))
                 stop_price = buy_price * (1 - (pct_stop_loss or DEC("0")))
 
-                future_prices = HistoricalPrice.objects.filter(
-                    symbol=symbol, timestamp__gt=buy_ts
-                ).order_by("timestamp")
-
-                for p in future_prices:
+                p = _first_exit_candle(symbol, px_ts, px_close,
+                                       to_epoch_us(buy_ts), take_price, stop_price)
+                if p is not None:
                     p_price = DEC(str(p.close))
-                    if p_price >= take_price or p_price <= stop_price:
-                        slipped_sell = p_price * (1 - slippage_pct)
-                        gross = position_qty * slipped_sell
-                        fee = gross * fee_pct
-                        balance = gross - fee
-
-                        Trade.objects.create(
-                            run=run,
-                            symbol=symbol,
-                            side="SELL",
-                            price=slipped_sell,
-                            qty=position_qty,
-                            ts_signal=p.timestamp,
-                            ts_fill=p.timestamp,
-                        )
-                        position_qty = DEC("0")
-                        break
+                    slipped_sell = p_price * (1 - slippage_pct)
+                    gross = position_qty * slipped_sell
+                    fee = gross * fee_pct
+                    balance = gross - fee
+
+                    Trade.objects.create(
+                        run=run,
+                        symbol=symbol,
+                        side="SELL",
+                        price=slipped_sell,
+                        qty=position_qty,
+                        ts_signal=p.timestamp,
+                        ts_fill=p.timestamp,
+                        pnl=balance - entry_balance,
+                    )
+                    position_qty = DEC("0")
+                    ledger.append((to_epoch_us(p.timestamp), float(balance), 0.0))
 
         # --- VENDER ---
         elif sig.signal_type == "SELL" and position_qty > 0:
@@ -103,11 +163,176 @@ def run_backtest(symbol: str,
                 qty=position_qty,
                 ts_signal=sig.timestamp,
                 ts_fill=sig.timestamp,
+                pnl=balance - entry_balance,
             )
             position_qty = DEC("0")
-            equity_history.append((sig.timestamp, balance))
-
+            ledger.append((to_epoch_us(sig.timestamp), float(balance), 0.0))
 
+    metrics, curve = _run_metrics(symbol, start, end, ledger, initial_usd)
     run.final_usd = balance
-    run.save()
+    for field, value in metrics.items():
+        setattr(run, field, value)
+    with transaction.atomic():
+        run.save()
+        EquityCurve.from_arrays(run, *curve).save()
+
+
+def _run_metrics(symbol, start, end, ledger, initial_usd):
+    """
+    Métricas del run y su curva de equity (ts, equity) marcada a mercado en
+    cada vela de [start, end].
+    """
+    closes, stamps = load_price_arrays(symbol, start, end)
+    equity = mark_to_market(ledger, stamps, closes, float(initial_usd))
+    metrics = performance_metrics(ledger, stamps, closes, float(initial_usd), equity=equity)
+    return metrics, (stamps, equity)
+
+
+def _first_exit_candle(symbol, px_ts, px_close, after_us, take_price, stop_price):
+    """
+    Primera vela posterior a `after_us` con close >= take_price o
+    close <= stop_price, comparando en Decimal como el bucle original.
+    La búsqueda se hace sobre el array float con umbrales algo más amplios y
+    cada candidata se confirma con el close exacto de la base.
+    """
+    start = int(np.searchsorted(px_ts, after_us, side="right"))
+    take, stop = float(take_price) * (1 - _EXIT_MARGIN), float(stop_price) * (1 + _EXIT_MARGIN)
+    while True:
+        hit = first_exit(px_close, start, take, stop)
+        if hit < 0:
+            return None
+        p = HistoricalPrice.objects.get(symbol=symbol, timestamp=from_epoch_us(px_ts[hit]))
+        p_price = DEC(str(p.close))
+        if p_price >= take_price or p_price <= stop_price:
+            return p
+        start = hit + 1
+
+
+def _to_dec(value: float, places: int = 8) -> DEC:
+    return DEC(f"{value:.{places}f}")
+
+
+def _run_backtest_vector(symbol, start, end, initial_usd, fee_pct, slippage_pct,
+                         pct_take_profit, pct_stop_loss, qty_precision, progress=None,
+                         params=None):
+    # el motor vectorizado solo informa por fases: carga, simulación, guardado
+    progress = progress or (lambda done, total: None)
+    start = start or timezone.make_aware(timezone.datetime.min)
+    end = end or timezone.now()
+
+    progress(0, 3)
+    sig_ts, sig_buy, sig_price = load_signal_arrays(symbol, start, end)
+    px_close, px_ts = (load_price_arrays(symbol, start=start)
+                       if pct_take_profit or pct_stop_loss else (None, None))
+    progress(1, 3)
+
+    result = simulate(sig_ts, sig_buy, sig_price, px_ts, px_close,
+                      initial_usd=float(initial_usd),
+                      fee_pct=fee_pct,
+                      slippage_pct=slippage_pct,
+                      pct_take_profit=pct_take_profit,
+                      pct_stop_loss=pct_stop_loss,
+                      qty_precision=qty_precision)
+
+    metrics, curve = _run_metrics(symbol, start, end, result["ledger"], initial_usd)
+    pnl = round_trip_pnl(result["ledger"], float(initial_usd))
+    progress(2, 3)
+
+    with transaction.atomic():
+        run = BacktestRun.objects.create(start=start, end=end, initial_usd=initial_usd,
+                                         symbol=symbol, final_usd=_to_dec(result["final_usd"]),
+                                         params=params or {}, **metrics)
+        Trade.objects.bulk_create([
+            Trade(run=run,
+                  symbol=symbol,
+                  side=side,
+                  price=_to_dec(price),
+                  qty=_to_dec(qty, qty_precision),
+                  ts_signal=from_epoch_us(ts_signal),
+                  ts_fill=from_epoch_us(ts_fill),
+                  pnl=None if np.isnan(trade_pnl) else _to_dec(trade_pnl))
+            for (side, price, qty, ts_signal, ts_fill), trade_pnl in zip(result["trades"], pnl)
+        ])
+        EquityCurve.from_arrays(run, *curve).save()
+    return run
+
+
+def run_parameter_sweep(symbol: str, start, end, grid: dict,
+                        initial_usd: DEC = DEC("1000"),
+                        workers: int = None,
+                        keep: int = None):
+    """
+    Barrido de parámetros (ver `core.analysis.sweep.expand_grid`) sobre los
+    precios de `symbol` en [start, end]. Las señales se generan a partir de
+    los precios para cada combinación, no de TradingSignal.
+
+    Los precios se cargan una sola vez y se comparten con los procesos del
+    pool. Guarda un BacktestRun kind=sweep con la tabla de resultados
+    ordenada (solo las `keep` mejores si se indica).
+    """
+    closes, stamps = load_price_arrays(symbol, start, end)
+    results = run_sweep(closes, stamps, grid, initial_usd=float(initial_usd), workers=workers)
+    if keep:
+        results = results[:keep]
+
+    with transaction.atomic():
+        run = BacktestRun.objects.create(
+            start=start, end=end, initial_usd=initial_usd, symbol=symbol,
+            kind=BacktestRun.SWEEP, params=grid,
+            final_usd=_to_dec(results[0]["final_usd"]) if results else None,
+        )
+        SweepResult.objects.bulk_create([
+            SweepResult(run=run, rank=rank, params=r["params"],
+                        final_usd=_to_dec(r["final_usd"]),
+                        total_return=r["total_return"], trades=r["trades"])
+            for rank, r in enumerate(results, start=1)
+        ], batch_size=1000)
+    return run
+
+
+def run_walk_forward(symbol: str, start, end, grid: dict,
+                     in_sample: timezone.timedelta,
+                     out_of_sample: timezone.timedelta,
+                     initial_usd: DEC = DEC("1000"),
+                     workers: int = None):
+    """
+    Walk-forward sobre los precios de `symbol` en [start, end]: optimiza
+    `grid` en cada tramo in-sample y lo evalúa en el out-of-sample siguiente
+    (ver `core.analysis.walkforward`). Guarda un BacktestRun
+    kind=walkforward con sus ventanas y la curva OOS encadenada.
+    """
+    closes, stamps = load_price_arrays(symbol, start, end)
+    us = timezone.timedelta(microseconds=1)
+    windows, curve_ts, curve = walk_forward(closes, stamps, grid,
+                                            in_sample_us=in_sample // us,
+                                            out_sample_us=out_of_sample // us,
+                                            initial_usd=float(initial_usd),
+                                            workers=workers)
+
+    with transaction.atomic():
+        run = BacktestRun.objects.create(
+            start=start, end=end, initial_usd=initial_usd, symbol=symbol,
+            kind=BacktestRun.WALKFORWARD,
+            params={"grid": grid,
+                    "in_sample_s": in_sample.total_seconds(),
+                    "out_of_sample_s": out_of_sample.total_seconds()},
+            final_usd=_to_dec(curve[-1]) if curve.size else None,
+            trade_count=sum(w["oos_trades"] for w in windows),
+            **equity_metrics(curve, curve_ts, float(initial_usd)),
+        )
+        WalkForwardWindow.objects.bulk_create([
+            WalkForwardWindow(
+                run=run,
+                index=k,
+                is_start=from_epoch_us(stamps[w["window"][0]]),
+                oos_start=from_epoch_us(stamps[w["window"][2]]),
+                oos_end=from_epoch_us(stamps[w["window"][3] - 1]),
+                params=w["params"],
+                is_return=w["is_final_usd"] / float(initial_usd) - 1,
+                oos_return=w["oos_final_usd"] / float(initial_usd) - 1,
+                oos_trades=w["oos_trades"],
+            )
+            for k, w in enumerate(windows)
+        ])
+        EquityCurve.from_arrays(run, curve_ts, curve).save()
     return run
@@ -0,0 +1,30 @@
+# dashboard/checks.py
+"""
+System checks del dashboard (`manage.py check`).
+"""
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+LOCAL_CACHE_BACKENDS = {
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+}
+
+
+@register(Tags.caches)
+def check_shared_cache(app_configs, **kwargs):
+    """
+    Las velas de /api/candles/ se invalidan desde los procesos que insertan
+    velas (candle_worker, celery_worker); con una caché local de proceso el
+    incremento de versión no llega a web y se sirven velas viejas.
+    """
+    backend = settings.CACHES.get("default", {}).get("BACKEND")
+    if backend not in LOCAL_CACHE_BACKENDS:
+        return []
+    return [Warning(
+        "La caché por defecto es local al proceso: las velas cacheadas de "
+        "/api/candles/ no se invalidan al llegar velas nuevas desde otros procesos.",
+        hint="Define CACHE_URL (p. ej. redis://redis:6379/1) en web, celery_worker "
+             "y candle_worker.",
+        id="dashboard.W001",
+    )]
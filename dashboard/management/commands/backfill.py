@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from dashboard.utils.backfill import run_backfill
+
+
+class Command(BaseCommand):
+    help = "Descarga velas 1m históricas de Binance para uno o varios símbolos (reanudable)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--symbol", action="append", required=True,
+                            help="símbolo a descargar (repetible)")
+        parser.add_argument("--days", type=float, default=30, help="días de histórico")
+        parser.add_argument("--workers", type=int, default=4, help="símbolos en paralelo")
+        parser.add_argument("--base-url", default=None,
+                            help="URL de la API REST (por defecto BINANCE_REST_URL)")
+        parser.add_argument("--restart", action="store_true",
+                            help="ignora los checkpoints y empieza de nuevo")
+
+    def handle(self, *args, **options):
+        end = timezone.now()
+        # el inicio se redondea al día para que una ejecución repetida
+        # encuentre el mismo checkpoint
+        start = (end - timezone.timedelta(days=options["days"])).replace(
+            hour=0, minute=0, second=0, microsecond=0)
+
+        results = run_backfill(options["symbol"], start, end,
+                               workers=options["workers"],
+                               base_url=options["base_url"],
+                               restart=options["restart"])
+
+        failed = []
+        for symbol, result in results.items():
+            if isinstance(result, Exception):
+                failed.append(symbol)
+                self.stderr.write(f"{symbol}: {result}")
+            else:
+                self.stdout.write(f"{symbol}: {result} velas")
+        if failed:
+            raise CommandError(f"Backfill incompleto para {', '.join(failed)}; "
+                               f"vuelve a ejecutarlo para continuar")
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Backfill completado para {len(results)} símbolos desde {start:%Y-%m-%d}"))
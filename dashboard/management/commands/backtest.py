@@ -13,6 +13,7 @@ class Command(BaseCommand):
         parser.add_argument("--slip", type=str, default="0.001")
         parser.add_argument("--tp", type=str, default=None)
         parser.add_argument("--sl", type=str, default=None)
+        parser.add_argument("--engine", choices=["decimal", "vector"], default="decimal")
 
     def handle(self, *args, **options):
         symbol = options["symbol"]
@@ -32,6 +33,7 @@ class Command(BaseCommand):
             slippage_pct=slip,
             pct_take_profit=tp,
             pct_stop_loss=sl,
+            engine=options["engine"],
         )
 
         self.stdout.write(self.style.SUCCESS(
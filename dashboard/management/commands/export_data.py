@@ -0,0 +1,41 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_datetime
+from dashboard.utils.export import DATASETS, FORMATS, stream_export
+
+
+class Command(BaseCommand):
+    help = "Exporta precios, señales o trades en streaming (csv, ndjson o columnar)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("dataset", choices=sorted(DATASETS))
+        parser.add_argument("--fmt", choices=sorted(FORMATS), default="csv")
+        parser.add_argument("--symbol", default=None)
+        parser.add_argument("--start", default=None, help="fecha ISO 8601")
+        parser.add_argument("--end", default=None, help="fecha ISO 8601")
+        parser.add_argument("--run", type=int, default=None, help="solo trades de este BacktestRun")
+        parser.add_argument("--output", "-o", default="-", help="fichero de salida (- = stdout)")
+
+    def handle(self, *args, **options):
+        filters = {"symbol": options["symbol"], "run": options["run"]}
+        for name in ("start", "end"):
+            if options[name]:
+                filters[name] = parse_datetime(options[name])
+                if filters[name] is None:
+                    raise CommandError(f"--{name}: fecha ISO 8601 no válida")
+
+        chunks = stream_export(options["dataset"], options["fmt"], **filters)
+        if options["output"] == "-":
+            out = sys.stdout.buffer
+            for chunk in chunks:
+                out.write(chunk)
+            out.flush()
+            return
+
+        size = 0
+        with open(options["output"], "wb") as out:
+            for chunk in chunks:
+                out.write(chunk)
+                size += len(chunk)
+        self.stdout.write(self.style.SUCCESS(f"✅ {options['dataset']} → {options['output']} ({size} bytes)"))
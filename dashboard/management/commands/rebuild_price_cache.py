@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand, CommandError
+from dashboard.models import HistoricalPrice
+from dashboard.utils import price_cache
+from dashboard.utils.timeseries import rebuild_price_cache
+
+
+class Command(BaseCommand):
+    help = "Reconstruye la caché memmap de precios desde HistoricalPrice"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--symbol", action="append", default=None,
+                            help="símbolo a reconstruir (repetible); por defecto todos")
+
+    def handle(self, *args, **options):
+        if not price_cache.enabled():
+            raise CommandError("PRICE_CACHE_DIR no está configurado")
+
+        symbols = options["symbol"] or list(
+            HistoricalPrice.objects.order_by().values_list("symbol", flat=True).distinct())
+
+        for symbol in symbols:
+            rows = rebuild_price_cache(symbol)
+            self.stdout.write(f"{symbol}: {rows} velas")
+        self.stdout.write(self.style.SUCCESS(f"✅ Caché reconstruida para {len(symbols)} símbolos"))
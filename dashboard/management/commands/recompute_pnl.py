@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+from dashboard.models import SimulatedTrade
+from dashboard.utils.trading import recompute_trades
+
+
+class Command(BaseCommand):
+    help = "Recalcula el PnL realizado (FIFO) de los trades simulados y las posiciones"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--symbol", action="append", default=None,
+                            help="símbolo a recalcular (repetible); por defecto todos")
+
+    def handle(self, *args, **options):
+        symbols = options["symbol"] or list(
+            SimulatedTrade.objects.order_by().values_list("symbol", flat=True).distinct())
+
+        for symbol in symbols:
+            trades = recompute_trades(symbol)
+            self.stdout.write(f"{symbol}: {trades} trades")
+        self.stdout.write(self.style.SUCCESS(f"✅ PnL recalculado para {len(symbols)} símbolos"))
@@ -0,0 +1,78 @@
+from django.core.management.base import BaseCommand, CommandError
+from dashboard.backtest import run_parameter_sweep
+from decimal import Decimal
+from django.utils import timezone
+
+
+def _list(value, cast=float):
+    """'3,5,9' → [3, 5, 9]; 'none' → None (sin TP/SL)."""
+    if value is None:
+        return None
+    return [None if v.strip().lower() == "none" else cast(v) for v in value.split(",")]
+
+
+def add_grid_arguments(parser):
+    """Opciones de rejilla compartidas por los comandos sweep y walkforward."""
+    parser.add_argument("--symbol", type=str, default="BTCUSDT")
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--short", type=str, default=None, help="ej. 3,5,9")
+    parser.add_argument("--long", type=str, default=None, help="ej. 20,50,200")
+    parser.add_argument("--rsi-period", type=str, default=None, help="ej. 7,14")
+    parser.add_argument("--rsi-low", type=str, default="30")
+    parser.add_argument("--rsi-high", type=str, default="70")
+    parser.add_argument("--tp", type=str, default="none", help="ej. none,0.01,0.02")
+    parser.add_argument("--sl", type=str, default="none")
+    parser.add_argument("--fee", type=str, default="0.001")
+    parser.add_argument("--slip", type=str, default="0.001")
+    parser.add_argument("--initial", type=str, default="1000")
+    parser.add_argument("--workers", type=int, default=None)
+
+
+def grid_from_options(options) -> dict:
+    grid = {
+        "take_profit": _list(options["tp"]),
+        "stop_loss": _list(options["sl"]),
+        "fee": _list(options["fee"]),
+        "slippage": _list(options["slip"]),
+    }
+    if options["short"] or options["long"]:
+        grid["short"] = _list(options["short"] or "5", int)
+        grid["long"] = _list(options["long"] or "20", int)
+    if options["rsi_period"]:
+        grid["period"] = _list(options["rsi_period"], int)
+        grid["low"] = _list(options["rsi_low"])
+        grid["high"] = _list(options["rsi_high"])
+    if "short" not in grid and "period" not in grid:
+        raise CommandError("Indica al menos --short/--long o --rsi-period")
+    return grid
+
+
+class Command(BaseCommand):
+    help = "Barrido de parámetros de backtest en paralelo (SMA/RSI × TP/SL × fee/slippage)"
+
+    def add_arguments(self, parser):
+        add_grid_arguments(parser)
+        parser.add_argument("--keep", type=int, default=None, help="guardar solo las N mejores")
+        parser.add_argument("--top", type=int, default=10, help="filas a mostrar")
+
+    def handle(self, *args, **options):
+        grid = grid_from_options(options)
+
+        end = timezone.now()
+        start = end - timezone.timedelta(days=options["days"])
+
+        run = run_parameter_sweep(
+            symbol=options["symbol"],
+            start=start,
+            end=end,
+            grid=grid,
+            initial_usd=Decimal(options["initial"]),
+            workers=options["workers"],
+            keep=options["keep"],
+        )
+
+        for res in run.sweep_results.all()[:options["top"]]:
+            self.stdout.write(f"#{res.rank:<4} {res.final_usd:>16} {res.trades:>5} trades  {res.params}")
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Barrido completado. Run #{run.id}: {run.sweep_results.count()} combinaciones"
+        ))
@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand
+from dashboard.backtest import run_walk_forward
+from dashboard.management.commands.sweep import add_grid_arguments, grid_from_options
+from decimal import Decimal
+from django.utils import timezone
+
+
+class Command(BaseCommand):
+    help = "Optimización walk-forward: optimiza in-sample y evalúa out-of-sample en ventanas móviles"
+
+    def add_arguments(self, parser):
+        add_grid_arguments(parser)
+        parser.add_argument("--is-days", type=float, default=7, help="días in-sample por ventana")
+        parser.add_argument("--oos-days", type=float, default=1, help="días out-of-sample por ventana")
+
+    def handle(self, *args, **options):
+        grid = grid_from_options(options)
+
+        end = timezone.now()
+        start = end - timezone.timedelta(days=options["days"])
+
+        run = run_walk_forward(
+            symbol=options["symbol"],
+            start=start,
+            end=end,
+            grid=grid,
+            in_sample=timezone.timedelta(days=options["is_days"]),
+            out_of_sample=timezone.timedelta(days=options["oos_days"]),
+            initial_usd=Decimal(options["initial"]),
+            workers=options["workers"],
+        )
+
+        for w in run.windows.all():
+            self.stdout.write(f"{w.oos_start:%Y-%m-%d %H:%M} IS {w.is_return:+.2%} "
+                              f"OOS {w.oos_return:+.2%}  {w.params}")
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Walk-forward completado. Run #{run.id}: {run.windows.count()} ventanas, "
+            f"final OOS {run.final_usd} USD"
+        ))
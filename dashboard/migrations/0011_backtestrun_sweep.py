@@ -0,0 +1,45 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:28
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0010_indicatorstate'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='backtestrun',
+            name='kind',
+            field=models.CharField(choices=[('single', 'Backtest'), ('sweep', 'Barrido de parámetros')], default='single', max_length=12),
+        ),
+        migrations.AddField(
+            model_name='backtestrun',
+            name='params',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddField(
+            model_name='backtestrun',
+            name='symbol',
+            field=models.CharField(default='BTCUSDT', max_length=20),
+        ),
+        migrations.CreateModel(
+            name='SweepResult',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rank', models.PositiveIntegerField()),
+                ('params', models.JSONField(default=dict)),
+                ('final_usd', models.DecimalField(decimal_places=8, max_digits=20)),
+                ('total_return', models.FloatField()),
+                ('trades', models.PositiveIntegerField()),
+                ('run', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sweep_results', to='dashboard.backtestrun')),
+            ],
+            options={
+                'ordering': ['run', 'rank'],
+                'unique_together': {('run', 'rank')},
+            },
+        ),
+    ]
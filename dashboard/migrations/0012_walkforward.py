@@ -0,0 +1,48 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:31
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0011_backtestrun_sweep'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='backtestrun',
+            name='kind',
+            field=models.CharField(choices=[('single', 'Backtest'), ('sweep', 'Barrido de parámetros'), ('walkforward', 'Walk-forward')], default='single', max_length=12),
+        ),
+        migrations.CreateModel(
+            name='EquityCurve',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('timestamps', models.BinaryField()),
+                ('equity', models.BinaryField()),
+                ('points', models.PositiveIntegerField(default=0)),
+                ('run', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='equity_curve', to='dashboard.backtestrun')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='WalkForwardWindow',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('index', models.PositiveIntegerField()),
+                ('is_start', models.DateTimeField()),
+                ('oos_start', models.DateTimeField()),
+                ('oos_end', models.DateTimeField()),
+                ('params', models.JSONField(default=dict)),
+                ('is_return', models.FloatField()),
+                ('oos_return', models.FloatField()),
+                ('oos_trades', models.PositiveIntegerField()),
+                ('run', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='windows', to='dashboard.backtestrun')),
+            ],
+            options={
+                'ordering': ['run', 'index'],
+                'unique_together': {('run', 'index')},
+            },
+        ),
+    ]
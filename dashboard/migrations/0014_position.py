@@ -0,0 +1,45 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:48
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+
+
+def build_positions(apps, schema_editor):
+    """Reconstruye las posiciones recorriendo los trades existentes en orden."""
+    SimulatedTrade = apps.get_model("dashboard", "SimulatedTrade")
+    Position = apps.get_model("dashboard", "Position")
+    positions = {}
+    for trade in SimulatedTrade.objects.order_by("ts", "id").iterator():
+        pos = positions.setdefault(trade.symbol, Position(symbol=trade.symbol))
+        if trade.side == "BUY":
+            qty = pos.qty + trade.qty
+            pos.avg_price = (pos.qty * pos.avg_price + trade.qty * trade.price) / qty
+            pos.qty, pos.open_lot = qty, trade
+        else:
+            pos.qty = max(pos.qty - trade.qty, Decimal("0"))
+            if pos.qty == 0:
+                pos.avg_price, pos.open_lot = Decimal("0"), None
+    Position.objects.bulk_create(positions.values())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0013_backfillcheckpoint'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Position',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('symbol', models.CharField(max_length=20, unique=True)),
+                ('qty', models.DecimalField(decimal_places=8, default=Decimal('0'), max_digits=20)),
+                ('avg_price', models.DecimalField(decimal_places=8, default=Decimal('0'), max_digits=20)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('open_lot', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='dashboard.simulatedtrade')),
+            ],
+        ),
+        migrations.RunPython(build_positions, migrations.RunPython.noop),
+    ]
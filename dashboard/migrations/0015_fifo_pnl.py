@@ -0,0 +1,71 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:49
+
+from decimal import Decimal
+from django.db import migrations, models
+
+
+def replay_fifo(apps, schema_editor):
+    """
+    Rellena remaining_qty/realized_pnl de los trades existentes y vuelve a
+    calcular las posiciones con lotes FIFO (lo mismo que `recompute_pnl`).
+    La lógica va copiada aquí para que la migración no cambie con el código
+    de la aplicación.
+    """
+    SimulatedTrade = apps.get_model("dashboard", "SimulatedTrade")
+    Position = apps.get_model("dashboard", "Position")
+    zero = Decimal("0")
+    symbols = SimulatedTrade.objects.order_by("symbol").values_list("symbol", flat=True).distinct()
+    for symbol in list(symbols):
+        trades = list(SimulatedTrade.objects.filter(symbol=symbol).order_by("ts", "id"))
+        lots, last_buy = [], None
+        for trade in trades:
+            if trade.side == "BUY":
+                trade.remaining_qty, trade.realized_pnl = trade.qty, None
+                lots.append(trade)
+                last_buy = trade
+                continue
+            qty, pnl, matched = trade.qty, zero, zero
+            for lot in lots:
+                take = min(lot.remaining_qty, qty)
+                if take <= 0:
+                    break
+                lot.remaining_qty -= take
+                qty -= take
+                matched += take
+                pnl += (trade.price - lot.price) * take
+            trade.remaining_qty = zero
+            trade.realized_pnl = pnl if matched > 0 else None
+            lots = [lot for lot in lots if lot.remaining_qty > 0]
+        SimulatedTrade.objects.bulk_update(trades, ["remaining_qty", "realized_pnl"],
+                                           batch_size=1000)
+
+        qty = sum((lot.remaining_qty for lot in lots), zero)
+        avg_price = sum((lot.remaining_qty * lot.price for lot in lots), zero) / qty if qty else zero
+        Position.objects.update_or_create(symbol=symbol, defaults={
+            "qty": qty, "avg_price": avg_price, "open_lot": last_buy if qty > 0 else None,
+        })
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0014_position'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='simulatedtrade',
+            name='realized_pnl',
+            field=models.DecimalField(blank=True, decimal_places=8, max_digits=20, null=True),
+        ),
+        migrations.AddField(
+            model_name='simulatedtrade',
+            name='remaining_qty',
+            field=models.DecimalField(decimal_places=8, default=Decimal('0'), max_digits=20),
+        ),
+        migrations.AddIndex(
+            model_name='simulatedtrade',
+            index=models.Index(fields=['symbol', 'side', 'remaining_qty'], name='dashboard_s_symbol_aa6b6f_idx'),
+        ),
+        migrations.RunPython(replay_fifo, migrations.RunPython.noop),
+    ]
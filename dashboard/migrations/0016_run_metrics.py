@@ -0,0 +1,106 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:51
+
+from decimal import Decimal
+from django.db import migrations, models
+
+
+def backfill_trade_pnl(apps, schema_editor):
+    """
+    PnL neto de las ventas de los runs existentes y las métricas que salen
+    de sus trades (trade_count, total_return, win_rate, profit_factor).
+
+    Cada compra usa todo el balance, así que el balance antes de la compra es
+    qty · precio de la compra, y el balance tras una venta es el de la compra
+    siguiente (o final_usd si es el último trade). Drawdown, Sharpe, Sortino
+    y exposición necesitan la curva de precios: quedan en NULL hasta volver a
+    ejecutar el run.
+    """
+    BacktestRun = apps.get_model("dashboard", "BacktestRun")
+    Trade = apps.get_model("dashboard", "Trade")
+    for run in BacktestRun.objects.filter(kind="single").iterator():
+        trades = list(Trade.objects.filter(run=run).order_by("ts_fill", "id"))
+        entry, sells = None, []
+        for k, trade in enumerate(trades):
+            if trade.side == "BUY":
+                entry = trade.qty * trade.price
+                continue
+            if entry is None:
+                continue
+            nxt = trades[k + 1] if k + 1 < len(trades) else None
+            if nxt is not None and nxt.side == "BUY":
+                exit_balance = nxt.qty * nxt.price
+            elif nxt is None and run.final_usd is not None:
+                exit_balance = run.final_usd
+            else:
+                exit_balance = trade.qty * trade.price
+            trade.pnl = exit_balance - entry
+            sells.append(trade)
+            entry = None
+        Trade.objects.bulk_update(sells, ["pnl"], batch_size=1000)
+
+        gains = sum((t.pnl for t in sells if t.pnl > 0), Decimal("0"))
+        losses = -sum((t.pnl for t in sells if t.pnl < 0), Decimal("0"))
+        run.trade_count = len(trades)
+        # con la posición abierta final_usd no incluye su valor: no se calcula
+        if run.final_usd is not None and (not trades or trades[-1].side == "SELL"):
+            run.total_return = float(run.final_usd / run.initial_usd - 1)
+        if sells:
+            run.win_rate = sum(t.pnl > 0 for t in sells) / len(sells)
+            run.profit_factor = float(gains / losses) if losses > 0 else None
+        run.save(update_fields=["trade_count", "total_return", "win_rate", "profit_factor"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0015_fifo_pnl'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='backtestrun',
+            name='exposure',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='backtestrun',
+            name='max_drawdown',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='backtestrun',
+            name='profit_factor',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='backtestrun',
+            name='sharpe',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='backtestrun',
+            name='sortino',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='backtestrun',
+            name='total_return',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='backtestrun',
+            name='trade_count',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='backtestrun',
+            name='win_rate',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='trade',
+            name='pnl',
+            field=models.DecimalField(blank=True, decimal_places=8, max_digits=20, null=True),
+        ),
+        migrations.RunPython(backfill_trade_pnl, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:56
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0017_backtestjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tradingsignal',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True, db_index=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AddIndex(
+            model_name='tradingsignal',
+            index=models.Index(fields=['timestamp', 'id'], name='dashboard_t_timesta_735de0_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tradingsignal',
+            index=models.Index(fields=['symbol', 'timestamp', 'id'], name='dashboard_t_symbol_ef94bd_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tradingsignal',
+            index=models.Index(fields=['symbol', 'signal_type', 'timestamp', 'id'], name='dashboard_t_symbol_9492ed_idx'),
+        ),
+    ]
@@ -1,3 +1,4 @@
+import numpy as np
 from django.db import models
 from django.utils import timezone
 from decimal import Decimal
@@ -33,21 +34,148 @@ class TradingSignal(models.Model):
     price = models.DecimalField(max_digits=20, decimal_places=8)
     timestamp = models.DateTimeField(db_index=True)
     meta = models.JSONField(default=dict, blank=True)
+    # momento de inserción (Last-Modified de la API; `timestamp` es el de la vela)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
 
     class Meta:
         ordering = ["-timestamp"]
         unique_together = ("symbol", "timestamp", "signal_type")
+        # paginación keyset de la API: filtros + (timestamp, id)
+        indexes = [
+            models.Index(fields=["timestamp", "id"]),
+            models.Index(fields=["symbol", "timestamp", "id"]),
+            models.Index(fields=["symbol", "signal_type", "timestamp", "id"]),
+        ]
 
     def __str__(self):
         return f"{self.symbol} {self.signal_type} @ {self.timestamp:%Y-%m-%d %H:%M}"
 
 
 class BacktestRun(models.Model):
+    SINGLE = "single"
+    SWEEP = "sweep"
+    WALKFORWARD = "walkforward"
+    KINDS = [(SINGLE, "Backtest"), (SWEEP, "Barrido de parámetros"), (WALKFORWARD, "Walk-forward")]
+
     start = models.DateTimeField()
     end   = models.DateTimeField()
     initial_usd = models.DecimalField(max_digits=20, decimal_places=8)
     final_usd   = models.DecimalField(max_digits=20, decimal_places=8, null=True, blank=True)
     created_at  = models.DateTimeField(auto_now_add=True)
+    symbol = models.CharField(max_length=20, default="BTCUSDT")
+    kind   = models.CharField(max_length=12, choices=KINDS, default=SINGLE)
+    params = models.JSONField(default=dict, blank=True)
+
+    # métricas del run (core.analysis.performance), calculadas al guardarlo
+    total_return  = models.FloatField(null=True, blank=True)
+    max_drawdown  = models.FloatField(null=True, blank=True)
+    sharpe        = models.FloatField(null=True, blank=True)
+    sortino       = models.FloatField(null=True, blank=True)
+    win_rate      = models.FloatField(null=True, blank=True)
+    profit_factor = models.FloatField(null=True, blank=True)
+    exposure      = models.FloatField(null=True, blank=True)
+    trade_count   = models.PositiveIntegerField(null=True, blank=True)
+
+
+class SweepResult(models.Model):
+    """
+    Una combinación de parámetros evaluada en un barrido (BacktestRun kind=sweep).
+    `rank` 1 es la de mayor final_usd.
+    """
+    run = models.ForeignKey(BacktestRun, on_delete=models.CASCADE, related_name="sweep_results")
+    rank = models.PositiveIntegerField()
+    params = models.JSONField(default=dict)
+    final_usd = models.DecimalField(max_digits=20, decimal_places=8)
+    total_return = models.FloatField()
+    trades = models.PositiveIntegerField()
+
+    class Meta:
+        ordering = ["run", "rank"]
+        unique_together = ("run", "rank")
+
+    def __str__(self):
+        return f"Run #{self.run_id} #{self.rank}: {self.final_usd} {self.params}"
+
+class WalkForwardWindow(models.Model):
+    """
+    Una ventana de un walk-forward (BacktestRun kind=walkforward): parámetros
+    elegidos in-sample y su resultado out-of-sample.
+    """
+    run = models.ForeignKey(BacktestRun, on_delete=models.CASCADE, related_name="windows")
+    index = models.PositiveIntegerField()
+    is_start = models.DateTimeField()
+    oos_start = models.DateTimeField()
+    oos_end = models.DateTimeField()
+    params = models.JSONField(default=dict)
+    is_return = models.FloatField()
+    oos_return = models.FloatField()
+    oos_trades = models.PositiveIntegerField()
+
+    class Meta:
+        ordering = ["run", "index"]
+        unique_together = ("run", "index")
+
+
+class EquityCurve(models.Model):
+    """
+    Curva de equity de un run guardada como arrays binarios: timestamps
+    int64 (epoch µs) y equity float64.
+    """
+    run = models.OneToOneField(BacktestRun, on_delete=models.CASCADE, related_name="equity_curve")
+    timestamps = models.BinaryField()
+    equity = models.BinaryField()
+    points = models.PositiveIntegerField(default=0)
+
+    @classmethod
+    def from_arrays(cls, run, stamps, equity):
+        stamps = np.ascontiguousarray(stamps, dtype="<i8")
+        equity = np.ascontiguousarray(equity, dtype="<f8")
+        return cls(run=run, timestamps=stamps.tobytes(), equity=equity.tobytes(),
+                   points=stamps.size)
+
+    def arrays(self):
+        """(timestamps int64 µs, equity float64)."""
+        return (np.frombuffer(bytes(self.timestamps), dtype="<i8"),
+                np.frombuffer(bytes(self.equity), dtype="<f8"))
+
+
+class BacktestJob(models.Model):
+    """
+    Backtest encolado en Celery (`dashboard.utils.backtest_jobs`). `params`
+    son los argumentos de `run_backtest` serializados (Decimal y fechas como
+    texto); `progress` va de 0 a 100 y `run` es el resultado al terminar.
+    """
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+    STATUSES = [(QUEUED, "En cola"), (RUNNING, "Ejecutando"), (DONE, "Terminado"),
+                (FAILED, "Fallido"), (CANCELLED, "Cancelado")]
+    FINISHED = (DONE, FAILED, CANCELLED)
+
+    status = models.CharField(max_length=10, choices=STATUSES, default=QUEUED, db_index=True)
+    params = models.JSONField(default=dict)
+    progress = models.PositiveSmallIntegerField(default=0)
+    task_id = models.CharField(max_length=36, blank=True)
+    cancel_requested = models.BooleanField(default=False)
+    run = models.ForeignKey(BacktestRun, null=True, blank=True, on_delete=models.SET_NULL,
+                            related_name="jobs")
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+
+    def __str__(self):
+        return f"Job #{self.id} {self.params.get('symbol')} [{self.status} {self.progress}%]"
+
+    @property
+    def finished(self):
+        return self.status in self.FINISHED
+
 
 class Trade(models.Model):
     BUY = "BUY"; SELL = "SELL"
@@ -58,6 +186,8 @@ class Trade(models.Model):
     qty    = models.DecimalField(max_digits=20, decimal_places=8)
     ts_signal = models.DateTimeField()
     ts_fill   = models.DateTimeField()
+    # SELL: PnL neto de la operación (balance tras vender - balance antes de comprar)
+    pnl       = models.DecimalField(max_digits=20, decimal_places=8, null=True, blank=True)
 
 
 class Wallet(models.Model):
@@ -79,6 +209,13 @@ class SimulatedTrade(models.Model):
     price = models.DecimalField(max_digits=20, decimal_places=8)
     total = models.DecimalField(max_digits=20, decimal_places=8)
     ts = models.DateTimeField(auto_now_add=True)
+    # BUY: cantidad del lote aún sin vender; SELL: 0
+    remaining_qty = models.DecimalField(max_digits=20, decimal_places=8, default=Decimal("0"))
+    # SELL: PnL realizado contra los lotes consumidos (FIFO); BUY: None
+    realized_pnl = models.DecimalField(max_digits=20, decimal_places=8, null=True, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["symbol", "side", "remaining_qty"])]
 
     def __str__(self):
         return f"{self.ts} | {self.side} {self.qty} {self.symbol} @ {self.price}"
@@ -86,22 +223,69 @@ class SimulatedTrade(models.Model):
     @property
     def pnl(self):
         """
-        Retorna la ganancia/pérdida si esta es una operación SELL.
-        Se calcula como: (precio de venta - precio de compra) * cantidad
+        Ganancia/pérdida realizada de una SELL (FIFO contra las compras
+        abiertas), calculada al ejecutar el trade; None en las BUY.
         """
-        if self.side != "SELL":
-            return None
-        # Buscar la última compra antes de esta venta
-        from dashboard.models import SimulatedTrade
-        last_buy = (
-            SimulatedTrade.objects
-            .filter(symbol=self.symbol, side="BUY", ts__lt=self.ts)
-            .order_by("-ts")
-            .first()
-        )
-        if not last_buy:
-            return None
-        return (self.price - last_buy.price) * self.qty
-
-
-    
\ No newline at end of file
+        return self.realized_pnl
+
+
+class Position(models.Model):
+    """
+    Posición simulada abierta por símbolo, actualizada en la misma
+    transacción que cada SimulatedTrade (`dashboard.utils.trading`), para
+    consultarla sin recorrer el historial de trades.
+    `open_lot` es la última compra de la posición abierta.
+    """
+    symbol = models.CharField(max_length=20, unique=True)
+    qty = models.DecimalField(max_digits=20, decimal_places=8, default=Decimal("0"))
+    avg_price = models.DecimalField(max_digits=20, decimal_places=8, default=Decimal("0"))
+    open_lot = models.ForeignKey(SimulatedTrade, null=True, blank=True,
+                                 on_delete=models.SET_NULL, related_name="+")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.symbol}: {self.qty} @ {self.avg_price}"
+
+    @property
+    def is_open(self):
+        return self.qty > 0
+
+
+class IndicatorState(models.Model):
+    """
+    Estado incremental de un indicador por (símbolo, indicador, parámetros).
+    `last_timestamp` es el checkpoint: solo se procesan velas posteriores.
+    """
+    symbol = models.CharField(max_length=20)
+    indicator = models.CharField(max_length=32)
+    params = models.CharField(max_length=64)
+    last_timestamp = models.DateTimeField(null=True, blank=True)
+    state = models.JSONField(default=dict, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ("symbol", "indicator", "params")
+
+    def __str__(self):
+        return f"{self.symbol} {self.indicator}({self.params}) @ {self.last_timestamp}"
+
+
+class BackfillCheckpoint(models.Model):
+    """
+    Progreso del backfill de un símbolo hasta `start`. Las velas se piden
+    hacia atrás, así que `cursor` es la apertura de la vela más antigua ya
+    guardada: una ejecución interrumpida continúa desde ahí.
+    """
+    symbol = models.CharField(max_length=20)
+    start = models.DateTimeField()
+    cursor = models.DateTimeField()
+    candles = models.PositiveIntegerField(default=0)
+    done = models.BooleanField(default=False)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ("symbol", "start")
+
+    def __str__(self):
+        estado = "completo" if self.done else f"en {self.cursor:%Y-%m-%d %H:%M}"
+        return f"Backfill {self.symbol} desde {self.start:%Y-%m-%d} ({estado})"
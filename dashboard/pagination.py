@@ -0,0 +1,102 @@
+# dashboard/pagination.py
+"""
+Paginación keyset para las APIs de series que crecen continuamente.
+
+En lugar de COUNT(*) + OFFSET, cada página se pide a partir de la clave
+(timestamp, id) de la última fila de la anterior, que viaja en el
+parámetro opaco `cursor`. Con un índice que empiece por los filtros y
+siga con (timestamp, id), cualquier página cuesta lo mismo que la primera.
+"""
+import base64
+from datetime import datetime
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    ?cursor=<opaco>&page_size=N&ordering=-timestamp|timestamp
+
+    Solo se ordena por `field` (desempatando por id), descendente por
+    defecto. La respuesta es {"next": url | null, "results": [...]}, sin
+    total: contar filas es justo lo que se evita.
+    """
+    field = "timestamp"
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+    max_page_size = 500
+
+    def get_page_size(self, request):
+        size = api_settings.PAGE_SIZE or 50
+        try:
+            size = int(request.query_params.get(self.page_size_query_param, size))
+        except ValueError:
+            pass
+        return min(max(size, 1), self.max_page_size)
+
+    def descending(self, request) -> bool:
+        return request.query_params.get("ordering", f"-{self.field}") != self.field
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        size = self.get_page_size(request)
+        desc = self.descending(request)
+        sign = "-" if desc else ""
+        queryset = queryset.order_by(f"{sign}{self.field}", f"{sign}id")
+
+        cursor = self.decode_cursor(request)
+        if cursor is not None:
+            value, pk = cursor
+            op = "lt" if desc else "gt"
+            # el primer filtro es redundante pero deja la condición sobre
+            # `field` como rango del índice
+            queryset = queryset.filter(
+                Q(**{f"{self.field}__{op}e": value}),
+                Q(**{f"{self.field}__{op}": value}) | Q(**{self.field: value, f"id__{op}": pk}),
+            )
+
+        rows = list(queryset[:size + 1])
+        self.has_next = len(rows) > size
+        self.page = rows[:size]
+        return self.page
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        last = self.page[-1]
+        return replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param,
+                                   self.encode_cursor(getattr(last, self.field), last.pk))
+
+    def get_paginated_response(self, data):
+        return Response({"next": self.get_next_link(), "results": data})
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+    @staticmethod
+    def encode_cursor(value: datetime, pk: int) -> str:
+        raw = f"{value.isoformat()}|{pk}".encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            raw = base64.urlsafe_b64decode(encoded + "=" * (-len(encoded) % 4)).decode()
+            value, pk = raw.rsplit("|", 1)
+            return datetime.fromisoformat(value), int(pk)
+        except (ValueError, UnicodeDecodeError):
+            raise NotFound("Cursor inválido")
@@ -1,52 +1,54 @@
-import numpy as np
+import logging
 from datetime import datetime, timezone
 from celery import shared_task
+from django.conf import settings
 from django.db import transaction
 from decimal import Decimal
 
-from dashboard.models import HistoricalPrice, TradingSignal, Wallet, SimulatedTrade
-from core.analysis.indicators import ma_cross_signals, rsi
+from dashboard.backtest import BacktestCancelled, run_backtest
+from dashboard.models import BacktestJob, TradingSignal, Wallet
+from core.analysis.incremental import ma_cross_update, rsi_update
+from dashboard.utils.backtest_jobs import ProgressReporter, decode_params, fail_stale_jobs
 from dashboard.utils.binance_service import fetch_last_candles
+from dashboard.utils.ingestion import latest_timestamp, missing_candles, bulk_insert_candles
+from dashboard.utils.events import subscriptions
+from dashboard.utils.indicator_state import lock_state, new_candles, params_key
 from dashboard.utils.redis_service import get_live_price
-from dashboard.utils.trading import is_holding, get_last_buy
+from dashboard.utils.trading import is_holding, get_last_buy, record_simulated_trade
 
+logger = logging.getLogger(__name__)
 
 
 @shared_task
 def load_recent_prices(symbol: str, lookback: int = 1000):
-    """Download the latest `lookback` 1‑min candles for `symbol` and
-    persist them in HistoricalPrice if they do not already exist."""
-    candles = fetch_last_candles(symbol, limit=lookback)
-    created = 0
-    for close_price, close_time_s in candles:
-        ts = datetime.fromtimestamp(close_time_s, tz=timezone.utc)
-        _, was_created = HistoricalPrice.objects.get_or_create(
-            symbol=symbol,
-            timestamp=ts,
-            defaults={"close": close_price},
-        )
-        if was_created:
-            created += 1
+    """Download the 1‑min candles missing since the last stored one for
+    `symbol` (at most `lookback`) and persist them with a single bulk insert."""
+    now = datetime.now(tz=timezone.utc)
+    last = latest_timestamp(symbol)
+    limit = missing_candles(last, lookback, now=now)
+    if limit == 0:
+        return {"created": 0}
+
+    candles = fetch_last_candles(symbol, limit=limit)
+    created = bulk_insert_candles(symbol, candles, since=last, now=now)
     return {"created": created}
 
 
 @shared_task
 def detectar_ma_cross(symbol: str, short: int = 5, long: int = 20):
-    qs = (HistoricalPrice.objects
-          .filter(symbol=symbol)
-          .order_by("timestamp")
-          .values_list("close", "timestamp"))
-
-    if not qs.exists():
-        return {"created": 0}
-
-    closes, timestamps = zip(*qs)
-    closes = np.array(closes, dtype=float)
-
-    signals = ma_cross_signals(closes, short=short, long=long)
-
+    """Advances the incremental SMA cross state with the candles newer than
+    its checkpoint and creates the TradingSignal rows for new crosses."""
     created = 0
     with transaction.atomic():
+        state = lock_state(symbol, "ma_cross", {"short": short, "long": long})
+        closes, timestamps = new_candles(state)
+        if not timestamps:
+            return {"created": 0}
+
+        state.state, signals = ma_cross_update(state.state, closes, short, long)
+        state.last_timestamp = timestamps[-1]
+        state.save(update_fields=["state", "last_timestamp", "updated_at"])
+
         for kind, idxs in signals.items():
             for i in idxs:
                 ts = timestamps[i]
@@ -67,58 +69,58 @@ def detectar_ma_cross(symbol: str, short: int = 5, long: int = 20):
 
 @shared_task
 def detectar_rsi_extremos(symbol: str, period: int = 14, low: float = 30.0, high: float = 70.0):
-    """Evaluates RSI on the latest price series and creates TradingSignal rows
-    when RSI crosses below `low` (BUY) or above `high` (SELL)."""
-    qs = (HistoricalPrice.objects
-          .filter(symbol=symbol)
-          .order_by("timestamp")
-          .values_list("close", "timestamp"))
-
-    if qs.count() <= period:
-        return {"created": 0}
-
-    closes, timestamps = zip(*qs)
-    closes = np.array(closes, dtype=float)
-
-    rsi_vals = rsi(closes, period=period)
-
-    buy_idx = np.where((rsi_vals[:-1] >= low) & (rsi_vals[1:] < low))[0] + 1
-    sell_idx = np.where((rsi_vals[:-1] <= high) & (rsi_vals[1:] > high))[0] + 1
-
+    """Advances the incremental RSI state with the candles newer than its
+    checkpoint and creates TradingSignal rows when RSI crosses below `low`
+    (BUY) or above `high` (SELL)."""
     created = 0
     with transaction.atomic():
-        for idx in buy_idx.tolist():
-            ts = timestamps[idx]
-            price = closes[idx]
-            _, was_created = TradingSignal.objects.get_or_create(
-                symbol=symbol,
-                signal_type="BUY",
-                timestamp=ts,
-                defaults={
-                    "price": price,
-                    "meta": {"indicator": "RSI", "period": period, "value": float(rsi_vals[idx])},
-                },
-            )
-            if was_created:
-                created += 1
-
-        for idx in sell_idx.tolist():
-            ts = timestamps[idx]
-            price = closes[idx]
-            _, was_created = TradingSignal.objects.get_or_create(
-                symbol=symbol,
-                signal_type="SELL",
-                timestamp=ts,
-                defaults={
-                    "price": price,
-                    "meta": {"indicator": "RSI", "period": period, "value": float(rsi_vals[idx])},
-                },
-            )
-            if was_created:
-                created += 1
+        state = lock_state(symbol, "rsi_extremos", {"period": period, "low": low, "high": high})
+        closes, timestamps = new_candles(state)
+        if not timestamps:
+            return {"created": 0}
+
+        state.state, signals, rsi_vals = rsi_update(state.state, closes, period, low, high)
+        state.last_timestamp = timestamps[-1]
+        state.save(update_fields=["state", "last_timestamp", "updated_at"])
+
+        for kind, idxs in signals.items():
+            for idx in idxs:
+                ts = timestamps[idx]
+                price = closes[idx]
+                _, was_created = TradingSignal.objects.get_or_create(
+                    symbol=symbol,
+                    signal_type=kind,
+                    timestamp=ts,
+                    defaults={
+                        "price": price,
+                        "meta": {"indicator": "RSI", "period": period, "value": float(rsi_vals[idx])},
+                    },
+                )
+                if was_created:
+                    created += 1
 
     return {"created": created}
 
+@shared_task
+def evaluar_estrategias(symbol: str, timeframe: str = "1m"):
+    """Runs the strategies subscribed to `symbol` (STRATEGY_SUBSCRIPTIONS)
+    after a bar-closed event; the auto-trader, if subscribed, runs last so
+    it sees the signals created by this bar."""
+    results = {}
+    auto_trade = False
+    for sub in subscriptions(symbol, timeframe):
+        params = {k: v for k, v in sub.items() if k not in ("strategy", "timeframe")}
+        name = sub["strategy"]
+        if name == "auto_trade":
+            auto_trade = True
+            continue
+        detector = DETECTORES[name]
+        results[f"{name}({params_key(params)})"] = detector(symbol, **params)
+
+    if auto_trade:
+        results["auto_trade"] = ejecutar_ordenes_por_senal(symbol)
+    return results
+
 # ────────────────────────────────────────────────
 #  TASK: SIMULAR COMPRA 
 # ────────────────────────────────────────────────
@@ -126,7 +128,7 @@ def detectar_rsi_extremos(symbol: str, period: int = 14, low: float = 30.0, high
 @shared_task
 def simular_compra(symbol="BTCUSDT", qty=Decimal("0.001")):
     qty = Decimal(str(qty))
-    price = get_live_price(symbol)
+    price = get_live_price(symbol, max_age=settings.LIVE_PRICE_MAX_AGE)
     if not price:
         return "❌ Precio no disponible"
 
@@ -137,16 +139,10 @@ def simular_compra(symbol="BTCUSDT", qty=Decimal("0.001")):
     if wallet.balance < total:
         return "❌ Saldo insuficiente"
 
-    wallet.balance -= total
-    wallet.save()
-
-    SimulatedTrade.objects.create(
-        symbol=symbol,
-        side="BUY",
-        qty=qty,
-        price=price,
-        total=total,
-    )
+    with transaction.atomic():
+        wallet.balance -= total
+        wallet.save()
+        record_simulated_trade(symbol, "BUY", qty, price, total)
 
     return f"✅ Compra simulada: {qty} {symbol} a {price} USDT"
 
@@ -158,7 +154,7 @@ def simular_compra(symbol="BTCUSDT", qty=Decimal("0.001")):
 @shared_task
 def simular_venta(symbol="BTCUSDT", qty=Decimal("0.001")):
     qty = Decimal(str(qty))
-    price = get_live_price(symbol)
+    price = get_live_price(symbol, max_age=settings.LIVE_PRICE_MAX_AGE)
     if not price:
         return "❌ Precio no disponible"
 
@@ -166,16 +162,10 @@ def simular_venta(symbol="BTCUSDT", qty=Decimal("0.001")):
     price = Decimal(price)
     total = qty * price
 
-    wallet.balance += total
-    wallet.save()
-
-    SimulatedTrade.objects.create(
-        symbol=symbol,
-        side="SELL",
-        qty=qty,
-        price=price,
-        total=total,
-    )
+    with transaction.atomic():
+        wallet.balance += total
+        wallet.save()
+        record_simulated_trade(symbol, "SELL", qty, price, total)
 
     return f"✅ Venta simulada: {qty} {symbol} a {price} USDT"
 
@@ -190,7 +180,7 @@ def ejecutar_ordenes_por_senal(symbol="BTCUSDT"):
     if not last_signal:
         return "❌ Sin señales"
 
-    price = get_live_price(symbol)
+    price = get_live_price(symbol, max_age=settings.LIVE_PRICE_MAX_AGE)
     if not price:
         return "❌ Precio no disponible"
 
@@ -212,3 +202,60 @@ def ejecutar_ordenes_por_senal(symbol="BTCUSDT"):
                 return "⛔ No vendo, aún no hay ganancia"
         else:
             return "🟡 No tengo posición abierta, no vendo"
+
+
+# ────────────────────────────────────────────────
+#  TASK: BACKTEST EN SEGUNDO PLANO
+# ────────────────────────────────────────────────
+
+@shared_task(soft_time_limit=settings.BACKTEST_JOB_TIME_LIMIT,
+             time_limit=settings.BACKTEST_JOB_TIME_LIMIT + 60)
+def ejecutar_backtest_job(job_id: int):
+    """
+    Ejecuta el BacktestJob `job_id` (ver dashboard.utils.backtest_jobs),
+    guardando progreso, resultado o error en el job. Al agotar el límite
+    blando, SoftTimeLimitExceeded lo deja como fallido.
+    """
+    from django.utils import timezone as dj_timezone
+
+    with transaction.atomic():
+        job = BacktestJob.objects.select_for_update().get(pk=job_id)
+        if job.status != BacktestJob.QUEUED:
+            return job.status
+        if job.cancel_requested:
+            job.status, job.finished_at = BacktestJob.CANCELLED, dj_timezone.now()
+            job.save(update_fields=["status", "finished_at"])
+            return job.status
+        job.status, job.started_at = BacktestJob.RUNNING, dj_timezone.now()
+        job.save(update_fields=["status", "started_at"])
+
+    fields = ["status", "progress", "run", "error", "finished_at"]
+    try:
+        job.run = run_backtest(progress=ProgressReporter(job.id), **decode_params(job.params))
+        job.status, job.progress = BacktestJob.DONE, 100
+    except BacktestCancelled:
+        job.status = BacktestJob.CANCELLED
+        job.progress = BacktestJob.objects.get(pk=job.id).progress
+    except Exception as exc:
+        logger.exception("Backtest job #%s falló", job.id)
+        job.status, job.error = BacktestJob.FAILED, repr(exc)
+        job.progress = BacktestJob.objects.get(pk=job.id).progress
+    job.finished_at = dj_timezone.now()
+    job.save(update_fields=fields)
+    return job.status
+
+
+@shared_task
+def marcar_jobs_colgados():
+    """Da por fallidos los jobs "running" cuyo worker murió (ver fail_stale_jobs)."""
+    failed = fail_stale_jobs()
+    if failed:
+        logger.warning("%d backtest jobs colgados marcados como fallidos", failed)
+    return failed
+
+
+# estrategias que se pueden suscribir en STRATEGY_SUBSCRIPTIONS
+DETECTORES = {
+    "ma_cross": detectar_ma_cross,
+    "rsi": detectar_rsi_extremos,
+}
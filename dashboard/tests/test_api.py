@@ -0,0 +1,170 @@
+import numpy as np
+from datetime import timedelta
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from dashboard.models import TradingSignal
+
+
+class TestTradingSignalsApi(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user("api"))
+        base = timezone.now().replace(microsecond=0)
+        # pares de señales con el mismo timestamp: el id desempata
+        TradingSignal.objects.bulk_create([
+            TradingSignal(symbol=symbol, signal_type="BUY", price=1,
+                          timestamp=base + timedelta(minutes=i // 2))
+            for i, symbol in enumerate(["BTCUSDT", "ETHUSDT"] * 5)
+        ])
+
+    def test_keyset_recorre_todas_las_paginas_sin_repetir(self):
+        url, seen = "/api/trading-signals/?page_size=3", []
+        while url:
+            data = self.client.get(url).json()
+            self.assertNotIn("count", data)
+            seen += [(row["timestamp"], row["id"]) for row in data["results"]]
+            url = data["next"]
+
+        self.assertEqual(len(seen), 10)
+        self.assertEqual(seen, sorted(seen, reverse=True))
+
+        asc = self.client.get("/api/trading-signals/?ordering=timestamp&symbol=ETHUSDT").json()
+        stamps = [row["timestamp"] for row in asc["results"]]
+        self.assertEqual(len(stamps), 5)
+        self.assertEqual(stamps, sorted(stamps))
+        self.assertEqual(self.client.get("/api/trading-signals/?cursor=xx").status_code, 404)
+
+    def test_etag_y_last_modified(self):
+        url = "/api/trading-signals/?symbol=BTCUSDT"
+        first = self.client.get(url)
+        self.assertIn("Last-Modified", first)
+
+        cached = self.client.get(url, HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(cached.status_code, 304)
+
+        TradingSignal.objects.create(symbol="BTCUSDT", signal_type="SELL", price=2,
+                                     timestamp=timezone.now() + timedelta(hours=1))
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=first["ETag"]).status_code, 200)
+
+
+class TestExport(TestCase):
+    def setUp(self):
+        from dashboard.models import HistoricalPrice
+
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user("api"))
+        self.base = timezone.now().replace(microsecond=0) - timedelta(days=1)
+        HistoricalPrice.objects.bulk_create([
+            HistoricalPrice(symbol=symbol, close=f"{100 + i}.125",
+                            timestamp=self.base + timedelta(minutes=i))
+            for i in range(30) for symbol in ("BTCUSDT", "ETHUSDT")
+        ])
+
+    def _get(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return b"".join(response.streaming_content)
+
+    def test_formatos_con_filtros(self):
+        import csv
+        import io
+        import json
+        from unittest.mock import patch
+        from dashboard.utils.columnar import read_columnar
+        from dashboard.utils.timeseries import to_epoch_us
+
+        start = (self.base + timedelta(minutes=10)).isoformat().replace("+00:00", "Z")
+        query = f"symbol=BTCUSDT&start={start}"
+
+        # bloques pequeños para recorrer varios viajes del cursor
+        with patch("dashboard.utils.export.CHUNK", 7):
+            rows = list(csv.DictReader(io.StringIO(
+                self._get(f"/api/export/prices/?fmt=csv&{query}").decode())))
+            lines = self._get(f"/api/export/prices/?fmt=ndjson&{query}").splitlines()
+            cols = read_columnar(io.BytesIO(self._get(f"/api/export/prices/?fmt=bin&{query}")))
+
+        self.assertEqual(len(rows), 20)
+        self.assertEqual(rows[0]["close"], "110.12500000")
+        self.assertEqual(json.loads(lines[-1])["close"], 129.125)
+        self.assertEqual(len(lines), 20)
+        self.assertEqual(cols["close"].dtype, np.float64)
+        np.testing.assert_array_equal(cols["close"], np.arange(110, 130) + 0.125)
+        self.assertEqual(cols["timestamp"][0], to_epoch_us(self.base + timedelta(minutes=10)))
+        self.assertTrue(np.all(cols["symbol"] == b"BTCUSDT"))
+
+        self.assertEqual(self.client.get("/api/export/nada/").status_code, 404)
+        self.assertEqual(self.client.get("/api/export/prices/?fmt=xls").status_code, 400)
+
+    def test_comando_y_columnas_nulas(self):
+        import tempfile
+        from decimal import Decimal
+        from django.core.management import call_command
+        from io import StringIO
+        from dashboard.utils.columnar import read_columnar
+        from dashboard.utils.trading import record_simulated_trade
+
+        record_simulated_trade("BTCUSDT", "BUY", Decimal("1"), Decimal("100"), Decimal("100"))
+        record_simulated_trade("BTCUSDT", "SELL", Decimal("1"), Decimal("110"), Decimal("110"))
+
+        with tempfile.NamedTemporaryFile(suffix=".bin") as f:
+            call_command("export_data", "simulated-trades", fmt="bin", output=f.name, stdout=StringIO())
+            with open(f.name, "rb") as exported:
+                cols = read_columnar(exported)
+        self.assertEqual(cols["side"].tolist(), [b"BUY", b"SELL"])
+        self.assertTrue(np.isnan(cols["realized_pnl"][0]))
+        self.assertEqual(cols["realized_pnl"][1], 10.0)
+
+
+class TestCandlesApi(TestCase):
+    def setUp(self):
+        from django.core.cache import cache
+        from dashboard.models import HistoricalPrice
+
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user("api"))
+        self.base = timezone.now().replace(second=0, microsecond=0) - timedelta(hours=1)
+        self.base -= timedelta(minutes=self.base.minute % 15)
+        HistoricalPrice.objects.bulk_create([
+            HistoricalPrice(symbol="BTCUSDT", close=100 + i,
+                            timestamp=self.base + timedelta(minutes=i, seconds=59))
+            for i in range(30)
+        ])
+
+    def test_velas_remuestreadas_e_invalidacion(self):
+        from dashboard.utils.ingestion import bulk_insert_candles
+        from dashboard.utils.timeseries import to_epoch_us
+
+        url = f"/api/candles/?symbol=BTCUSDT&timeframe=15m&start={self.base.isoformat()}"
+        url = url.replace("+", "%2B")
+        data = self.client.get(url).json()
+        self.assertEqual(data["t"], [to_epoch_us(self.base) // 1000,
+                                     to_epoch_us(self.base + timedelta(minutes=15)) // 1000])
+        self.assertEqual((data["o"], data["h"], data["l"], data["c"], data["n"]),
+                         ([100, 115], [114, 129], [100, 115], [114, 129], [15, 15]))
+
+        # la respuesta cacheada no cambia hasta que la ingesta confirma velas nuevas
+        last = self.client.get("/api/candles/?symbol=BTCUSDT&timeframe=1h&limit=2").json()
+        ts = (self.base + timedelta(minutes=30, seconds=59)).timestamp()
+        with self.captureOnCommitCallbacks(execute=True):
+            bulk_insert_candles("BTCUSDT", [(500.0, ts)], notify=False)
+        nuevo = self.client.get("/api/candles/?symbol=BTCUSDT&timeframe=1h&limit=2").json()
+        self.assertEqual(sum(nuevo["n"]), sum(last["n"]) + 1)
+        self.assertEqual(nuevo["c"][-1], 500.0)
+
+        self.assertEqual(self.client.get("/api/candles/?symbol=BTCUSDT&timeframe=2m").status_code, 400)
+
+    def test_check_avisa_de_cache_local(self):
+        from django.core.checks import run_checks
+        from django.test import override_settings
+
+        redis = {"default": {"BACKEND": "django.core.cache.backends.redis.RedisCache",
+                             "LOCATION": "redis://redis:6379/1"}}
+        locmem = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+        with override_settings(CACHES=locmem):
+            self.assertIn("dashboard.W001", [w.id for w in run_checks(tags=["caches"])])
+        with override_settings(CACHES=redis):
+            self.assertNotIn("dashboard.W001", [w.id for w in run_checks(tags=["caches"])])
@@ -0,0 +1,133 @@
+import json
+import threading
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from django.test import TestCase
+
+from dashboard.models import BackfillCheckpoint, HistoricalPrice, IndicatorState
+from dashboard.utils.backfill import WeightLimiter, run_backfill
+
+MINUTE_MS = 60_000
+
+
+class FakeKlineServer(ThreadingHTTPServer):
+    """
+    Imita GET /api/v3/klines: velas 1m con close = minuto desde epoch, las
+    `limit` últimas que abren en o antes de endTime.
+    """
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _KlineHandler)
+        self.requests = []
+        self.fail_on = set()       # nº de petición (1..n) que devuelve 500
+        self.throttle_on = set()   # nº de petición que devuelve 429
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+
+class _KlineHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        query = {k: v[0] for k, v in parse_qs(urlparse(self.path).query).items()}
+        self.server.requests.append(query)
+        n = len(self.server.requests)
+        if n in self.server.fail_on:
+            self.send_response(500)
+            self.end_headers()
+            return
+        if n in self.server.throttle_on:
+            self.send_response(429)
+            self.send_header("Retry-After", "0")
+            self.end_headers()
+            return
+
+        last_open = int(query["endTime"]) // MINUTE_MS * MINUTE_MS
+        limit = int(query["limit"])
+        opens = range(last_open - (limit - 1) * MINUTE_MS, last_open + 1, MINUTE_MS)
+        klines = [[t, "0", "0", "0", str(t // MINUTE_MS), "0", t + MINUTE_MS - 1] for t in opens]
+        body = json.dumps(klines).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("X-MBX-USED-WEIGHT-1M", str(2 * n))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class TestBackfill(TestCase):
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    end = datetime(2024, 1, 3, tzinfo=timezone.utc)   # 2880 velas
+
+    def setUp(self):
+        self.server = FakeKlineServer()
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def backfill(self, **kwargs):
+        return run_backfill(["BTCUSDT"], self.start, self.end, workers=1,
+                            base_url=self.server.url, **kwargs)["BTCUSDT"]
+
+    def test_pagina_hacia_atras_hasta_start(self):
+        IndicatorState.objects.create(symbol="BTCUSDT", indicator="ma_cross", params="x")
+
+        self.assertEqual(self.backfill(), 2880)
+
+        self.assertEqual(len(self.server.requests), 3)
+        qs = HistoricalPrice.objects.filter(symbol="BTCUSDT").order_by("timestamp")
+        self.assertEqual(qs.count(), 2880)
+        self.assertEqual(qs.first().timestamp, self.start + timedelta(seconds=59.999))
+        self.assertEqual(qs.last().timestamp, self.end - timedelta(milliseconds=1))
+        self.assertTrue(BackfillCheckpoint.objects.get(symbol="BTCUSDT").done)
+        self.assertFalse(IndicatorState.objects.filter(symbol="BTCUSDT").exists())
+
+        # completo: una segunda ejecución no pide nada
+        self.assertEqual(self.backfill(), 0)
+        self.assertEqual(len(self.server.requests), 3)
+
+    def test_reanuda_desde_el_checkpoint(self):
+        self.server.fail_on = {2}
+        self.assertIsInstance(self.backfill(), Exception)
+        checkpoint = BackfillCheckpoint.objects.get(symbol="BTCUSDT")
+        self.assertFalse(checkpoint.done)
+        self.assertEqual(checkpoint.cursor, self.end - timedelta(minutes=1000))
+
+        self.assertEqual(self.backfill(), 1880)
+        resumed = self.server.requests[2]
+        self.assertEqual(int(resumed["endTime"]), int(checkpoint.cursor.timestamp() * 1000) - 1)
+        self.assertEqual(HistoricalPrice.objects.filter(symbol="BTCUSDT").count(), 2880)
+
+    def test_reintenta_tras_429(self):
+        self.server.throttle_on = {1}
+        self.assertEqual(self.backfill(), 2880)
+        self.assertEqual(len(self.server.requests), 4)
+
+
+class TestWeightLimiter(TestCase):
+    def test_espera_al_minuto_siguiente(self):
+        clock = {"now": 120.0}
+        waits = []
+
+        def sleep(seconds):
+            waits.append(seconds)
+            clock["now"] += seconds
+
+        limiter = WeightLimiter(4, clock=lambda: clock["now"], sleep=sleep)
+        limiter.acquire(2)
+        limiter.acquire(2)
+        self.assertEqual(waits, [])
+        limiter.acquire(2)
+        self.assertEqual(waits, [60.0])
+
+        # la cabecera del servidor cuenta el peso de otros procesos
+        limiter.observe(4)
+        limiter.acquire(1)
+        self.assertEqual(waits, [60.0, 60.0])
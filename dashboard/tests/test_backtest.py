@@ -113,3 +113,196 @@ class TestBacktest(TestCase):
 
         sell_trade = Trade.objects.filter(run=run, side="SELL").first()
         self.assertGreaterEqual(sell_trade.price, DEC("4.5"))
+
+
+    def test_motor_vectorizado_igual_que_decimal(self):
+        """
+        El motor vectorizado reproduce trades y resultado del motor Decimal
+        (dentro de VECTOR_RTOL), también con TP/SL.
+        """
+        from dashboard.backtest import VECTOR_RTOL
+
+        start = self.base
+        end = self.base + timedelta(minutes=20)
+        casos = [
+            {},
+            {"fee_pct": DEC("0.01"), "slippage_pct": DEC("0.01")},
+            {"pct_take_profit": DEC("0.5"), "pct_stop_loss": DEC("0.2")},
+        ]
+        for params in casos:
+            dec_run = run_backtest("BTCUSDT", start=start, end=end, **params)
+            vec_run = run_backtest("BTCUSDT", start=start, end=end, engine="vector", **params)
+
+            rel = abs(vec_run.final_usd - dec_run.final_usd) / dec_run.final_usd
+            self.assertLess(rel, DEC(str(VECTOR_RTOL)))
+
+            dec_trades = list(Trade.objects.filter(run=dec_run)
+                              .order_by("ts_fill", "id").values_list("side", "ts_fill"))
+            vec_trades = list(Trade.objects.filter(run=vec_run)
+                              .order_by("ts_fill", "id").values_list("side", "ts_fill"))
+            self.assertEqual(dec_trades, vec_trades)
+
+            # métricas y PnL por trade guardados en el run, iguales en ambos motores
+            for field in ("total_return", "max_drawdown", "exposure", "win_rate"):
+                self.assertAlmostEqual(getattr(dec_run, field), getattr(vec_run, field), places=9)
+            self.assertEqual(dec_run.trade_count, len(dec_trades))
+            dec_pnl = Trade.objects.get(run=dec_run, side="SELL", ts_fill=dec_trades[-1][1]).pnl
+            vec_pnl = Trade.objects.get(run=vec_run, side="SELL", ts_fill=vec_trades[-1][1]).pnl
+            self.assertAlmostEqual(float(dec_pnl), float(vec_pnl), places=4)
+
+    def test_migracion_rellena_pnl_y_metricas_de_runs_existentes(self):
+        import importlib
+        from django.apps import apps
+        from dashboard.models import BacktestRun
+
+        run = run_backtest("BTCUSDT", start=self.base, end=self.base + timedelta(minutes=20),
+                           fee_pct=DEC("0.01"), slippage_pct=DEC("0.01"))
+        expected = dict(Trade.objects.filter(run=run).values_list("id", "pnl"))
+        fields = ("trade_count", "total_return", "win_rate", "profit_factor")
+        metrics = {f: getattr(run, f) for f in fields}
+        # run anterior a 0016: sin pnl ni métricas
+        Trade.objects.filter(run=run).update(pnl=None)
+        BacktestRun.objects.filter(id=run.id).update(**dict.fromkeys(fields))
+
+        importlib.import_module("dashboard.migrations.0016_run_metrics").backfill_trade_pnl(apps, None)
+
+        for trade_id, pnl in Trade.objects.filter(run=run).values_list("id", "pnl"):
+            if expected[trade_id] is None:
+                self.assertIsNone(pnl)
+            else:
+                self.assertAlmostEqual(float(pnl), float(expected[trade_id]), places=4)
+        run.refresh_from_db()
+        self.assertEqual(run.trade_count, metrics["trade_count"])
+        self.assertAlmostEqual(run.total_return, metrics["total_return"], places=6)
+        self.assertEqual(run.win_rate, metrics["win_rate"])
+
+    def test_curva_de_equity_persistida_y_reducida(self):
+        from django.contrib.auth.models import User
+        from django.core.cache import cache
+        from dashboard.models import EquityCurve
+
+        run = run_backtest("BTCUSDT", start=self.base, end=self.base + timedelta(minutes=20))
+        stamps, equity = EquityCurve.objects.get(run=run).arrays()
+        self.assertEqual(stamps.size, HistoricalPrice.objects.count())
+        self.assertAlmostEqual(equity[-1], float(run.final_usd), places=6)
+
+        self.client.force_login(User.objects.create_superuser("admin", "a@a.com", "x"))
+        data = self.client.get(f"/admin/equity-chart/{run.id}/data/?points=5").json()
+        self.assertEqual(len(data["equity"]), 5)
+        self.assertEqual(data["total_points"], stamps.size)
+
+        cache.clear()
+        png = self.client.get(f"/admin/equity-chart/{run.id}/?width=300&height=200")
+        self.assertEqual(png["Content-Type"], "image/png")
+        self.assertEqual(cache.get(f"equity_png:{run.id}:300x200"), png.content)
+
+        # run en curso (sin EquityCurve todavía): la curva de fills no se cachea
+        EquityCurve.objects.filter(run=run).delete()
+        cache.clear()
+        self.client.get(f"/admin/equity-chart/{run.id}/?width=300&height=200")
+        self.assertIsNone(cache.get(f"equity_png:{run.id}:300x200"))
+
+
+class TestBacktestJobs(TestCase):
+    def setUp(self):
+        self.base = timezone.now() - timedelta(hours=1)
+        for i, p in enumerate([1, 2, 3, 4, 5, 4, 3]):
+            HistoricalPrice.objects.create(symbol="BTCUSDT", close=DEC(p),
+                                           timestamp=self.base + timedelta(minutes=i))
+        for i, side in enumerate(["BUY", "SELL", "BUY", "SELL"]):
+            TradingSignal.objects.create(symbol="BTCUSDT", signal_type=side, price=DEC(i + 2),
+                                         timestamp=self.base + timedelta(minutes=i + 1))
+        self.params = {"symbol": "BTCUSDT", "start": self.base,
+                       "end": self.base + timedelta(minutes=10), "fee_pct": DEC("0")}
+
+    def test_job_en_cola_se_ejecuta_y_guarda_el_run(self):
+        from dashboard.models import BacktestJob
+        from dashboard.tasks import ejecutar_backtest_job
+        from dashboard.utils.backtest_jobs import submit_backtests
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            jobs = submit_backtests([self.params, {**self.params, "engine": "vector"}])
+        self.assertEqual(len(callbacks), 1)   # un solo group para todos los jobs
+        self.assertTrue(all(job.status == BacktestJob.QUEUED for job in jobs))
+
+        for job in jobs:
+            self.assertEqual(ejecutar_backtest_job(job.id), BacktestJob.DONE)
+        done = list(BacktestJob.objects.filter(id__in=[j.id for j in jobs]).order_by("id"))
+        self.assertEqual([j.progress for j in done], [100, 100])
+        self.assertAlmostEqual(float(done[0].run.final_usd), float(done[1].run.final_usd), places=4)
+
+        from django.contrib.auth.models import User
+        self.client.force_login(User.objects.create_superuser("admin", "a@a.com", "x"))
+        estado = self.client.get(f"/admin/backtest-job/{jobs[0].id}/").json()
+        self.assertEqual((estado["status"], estado["run"]), ("done", done[0].run_id))
+        self.assertFalse(self.client.post(f"/admin/backtest-job/{jobs[0].id}/cancel/").json()["cancelled"])
+
+    def test_cancelar_job(self):
+        from unittest.mock import patch
+        from dashboard.models import BacktestJob, BacktestRun
+        from dashboard.tasks import ejecutar_backtest_job
+        from dashboard.utils.backtest_jobs import ProgressReporter, cancel_job, submit_backtest
+
+        # en cola: se cancela sin ejecutarse
+        with patch("trader.celery.celery_app.control.revoke") as revoke:
+            queued = submit_backtest(**self.params)
+            self.assertTrue(cancel_job(queued))
+        revoke.assert_called_once_with(queued.task_id)
+        self.assertEqual(ejecutar_backtest_job(queued.id), BacktestJob.CANCELLED)
+
+        # ejecutándose: se detiene en el siguiente aviso de progreso sin dejar run
+        class CancelaAlEmpezar(ProgressReporter):
+            def __call__(self, done, total):
+                BacktestJob.objects.filter(pk=self.job_id).update(cancel_requested=True)
+                super().__call__(done, total)
+
+        running = submit_backtest(**self.params)
+        runs = BacktestRun.objects.count()
+        with patch("dashboard.tasks.ProgressReporter", CancelaAlEmpezar):
+            self.assertEqual(ejecutar_backtest_job(running.id), BacktestJob.CANCELLED)
+        self.assertEqual(BacktestRun.objects.count(), runs)
+        self.assertIsNone(BacktestJob.objects.get(id=running.id).run)
+
+        # un job terminado ya no se puede cancelar
+        self.assertFalse(cancel_job(running))
+
+    def test_reanudar_usa_simbolo_y_parametros_del_run(self):
+        from dashboard.models import BacktestRun
+        from dashboard.utils.backtest_jobs import rerun_params
+
+        run = run_backtest(**self.params, pct_take_profit=DEC("0.05"), engine="vector")
+        run.symbol = "ETHUSDT"
+        params = rerun_params(run)
+        self.assertEqual(params["symbol"], "ETHUSDT")
+        self.assertEqual((params["fee_pct"], params["pct_take_profit"], params["pct_stop_loss"]),
+                         (DEC("0"), DEC("0.05"), None))
+        self.assertEqual(params["engine"], "vector")
+
+        sweep = BacktestRun.objects.create(start=self.base, end=self.base, initial_usd=DEC("1000"),
+                                           kind=BacktestRun.SWEEP, params={"short": [3]})
+        self.assertIsNone(rerun_params(sweep))
+
+        # la acción del admin encola solo el run simple
+        from django.contrib.auth.models import User
+        from dashboard.models import BacktestJob
+        self.client.force_login(User.objects.create_superuser("admin", "a@a.com", "x"))
+        with self.captureOnCommitCallbacks():
+            self.client.post("/admin/dashboard/backtestrun/", {
+                "action": "reanudar_backtest", "_selected_action": [run.id, sweep.id]})
+        job = BacktestJob.objects.get()
+        self.assertEqual((job.params["symbol"], job.params["pct_take_profit"]), ("BTCUSDT", "0.05"))
+
+    def test_jobs_colgados_se_marcan_fallidos(self):
+        from django.test import override_settings
+        from dashboard.models import BacktestJob
+        from dashboard.tasks import marcar_jobs_colgados
+
+        ahora = timezone.now()
+        colgado = BacktestJob.objects.create(status=BacktestJob.RUNNING,
+                                             started_at=ahora - timedelta(hours=2))
+        reciente = BacktestJob.objects.create(status=BacktestJob.RUNNING,
+                                              started_at=ahora - timedelta(minutes=5))
+        with override_settings(BACKTEST_JOB_TIME_LIMIT=3600):
+            self.assertEqual(marcar_jobs_colgados(), 1)
+        self.assertEqual(BacktestJob.objects.get(id=colgado.id).status, BacktestJob.FAILED)
+        self.assertEqual(BacktestJob.objects.get(id=reciente.id).status, BacktestJob.RUNNING)
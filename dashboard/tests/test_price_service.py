@@ -0,0 +1,59 @@
+from decimal import Decimal
+
+from django.test import SimpleTestCase
+
+from dashboard.utils.price_service import PriceService
+
+
+class FakePipeline:
+    def __init__(self, client):
+        self.client = client
+        self.keys = []
+
+    def hmget(self, key, *fields):
+        self.keys.append((key, fields))
+
+    def execute(self):
+        self.client.round_trips += 1
+        return [[self.client.hashes.get(key, {}).get(f) for f in fields]
+                for key, fields in self.keys]
+
+
+class FakeRedis:
+    def __init__(self, hashes):
+        self.hashes = hashes
+        self.round_trips = 0
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+
+class TestPriceService(SimpleTestCase):
+    def setUp(self):
+        self.now = {"mono": 0.0, "wall": 1_700_000_010.0}
+        self.client = FakeRedis({
+            "px:BTCUSDT": {"p": "65000.5", "E": "1700000009000"},
+            "px:ETHUSDT": {"p": "3000.25", "E": "1700000000000"},
+        })
+        self.service = PriceService(self.client, ttl=0.5,
+                                    clock=lambda: self.now["mono"],
+                                    wall_clock=lambda: self.now["wall"])
+
+    def test_varios_simbolos_en_un_round_trip_y_cache(self):
+        prices = self.service.get_many(["BTCUSDT", "ETHUSDT", "XRPUSDT"])
+        self.assertEqual(self.client.round_trips, 1)
+        self.assertEqual(prices["BTCUSDT"].price, Decimal("65000.5"))
+        self.assertEqual(prices["BTCUSDT"].event_ms, 1_700_000_009_000)
+        self.assertIsNone(prices["XRPUSDT"])
+
+        # dentro del TTL no se vuelve a Redis
+        self.service.get("BTCUSDT")
+        self.assertEqual(self.client.round_trips, 1)
+        self.now["mono"] = 1.0
+        self.service.get("BTCUSDT")
+        self.assertEqual(self.client.round_trips, 2)
+
+    def test_descarta_precios_antiguos(self):
+        prices = self.service.get_many(["BTCUSDT", "ETHUSDT"], max_age=5)
+        self.assertIsNotNone(prices["BTCUSDT"])
+        self.assertIsNone(prices["ETHUSDT"])   # evento de hace 10 s
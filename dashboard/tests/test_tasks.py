@@ -3,7 +3,7 @@ from datetime import timedelta
 from django.test import TestCase
 from django.utils import timezone
 
-from dashboard.models import HistoricalPrice, TradingSignal
+from dashboard.models import HistoricalPrice, TradingSignal, IndicatorState
 from dashboard.tasks import detectar_ma_cross
 
 
@@ -33,3 +33,231 @@ class TestDeteccionMaCross(TestCase):
                                             signal_type="BUY").count() == 1
         assert TradingSignal.objects.filter(symbol="BTCUSDT",
                                             signal_type="SELL").count() == 1
+
+
+    def test_segunda_ejecucion_solo_procesa_velas_nuevas(self):
+        detectar_ma_cross.apply(args=["BTCUSDT", 3, 5]).get()
+        state = IndicatorState.objects.get(symbol="BTCUSDT", indicator="ma_cross")
+        last = HistoricalPrice.objects.filter(symbol="BTCUSDT").latest("timestamp")
+        self.assertEqual(state.last_timestamp, last.timestamp)
+
+        # sin velas nuevas no hay trabajo ni señales duplicadas
+        res = detectar_ma_cross.apply(args=["BTCUSDT", 3, 5]).get()
+        self.assertEqual(res["created"], 0)
+
+        # la serie vuelve a subir → nuevo cruce al alza
+        for i, p in enumerate([6, 9, 12, 15], start=1):
+            HistoricalPrice.objects.create(symbol="BTCUSDT", close=p,
+                                           timestamp=last.timestamp + timedelta(minutes=i))
+        res = detectar_ma_cross.apply(args=["BTCUSDT", 3, 5]).get()
+        self.assertEqual(res["created"], 1)
+        self.assertEqual(TradingSignal.objects.filter(signal_type="BUY").count(), 2)
+
+
+class TestLoadRecentPrices(TestCase):
+    def test_solo_pide_y_guarda_velas_faltantes(self):
+        from unittest.mock import patch
+        from dashboard.tasks import load_recent_prices
+
+        now = timezone.now().replace(second=0, microsecond=0)
+        last = now - timedelta(minutes=3)
+        HistoricalPrice.objects.create(symbol="BTCUSDT", close=1, timestamp=last)
+
+        # vela repetida, dos nuevas y la vela aún abierta (close_time futuro)
+        candles = [(1.0, last.timestamp()),
+                   (2.0, (last + timedelta(minutes=1)).timestamp()),
+                   (3.0, (last + timedelta(minutes=2)).timestamp()),
+                   (4.0, (now + timedelta(minutes=1)).timestamp())]
+
+        with patch("dashboard.tasks.fetch_last_candles", return_value=candles) as fetch:
+            res = load_recent_prices.apply(args=["BTCUSDT", 1000]).get()
+
+        self.assertLessEqual(fetch.call_args.kwargs["limit"], 5)
+        self.assertEqual(res["created"], 2)
+        self.assertEqual(HistoricalPrice.objects.filter(symbol="BTCUSDT").count(), 3)
+
+
+
+class TestPriceCache(TestCase):
+    def setUp(self):
+        import tempfile
+        from django.test import override_settings
+
+        self.tmp = tempfile.TemporaryDirectory()
+        self.settings_override = override_settings(PRICE_CACHE_DIR=self.tmp.name)
+        self.settings_override.enable()
+        self.base = timezone.now().replace(second=0, microsecond=0) - timedelta(hours=1)
+        for i in range(10):
+            HistoricalPrice.objects.create(symbol="BTCUSDT", close=i + 1,
+                                           timestamp=self.base + timedelta(minutes=i))
+
+    def tearDown(self):
+        self.settings_override.disable()
+        self.tmp.cleanup()
+
+    def test_cache_igual_que_base_y_se_sincroniza(self):
+        from dashboard.utils import price_cache
+        from dashboard.utils.ingestion import bulk_insert_candles
+        from dashboard.utils.timeseries import db_price_arrays, load_price_arrays
+
+        closes, stamps = load_price_arrays("BTCUSDT")
+        self.assertIsInstance(stamps, np.memmap)
+        np.testing.assert_array_equal(closes, db_price_arrays("BTCUSDT")[0])
+
+        # ingesta: la vela nueva se añade al final de la caché
+        new_ts = self.base + timedelta(minutes=10)
+        bulk_insert_candles("BTCUSDT", [(11.0, new_ts.timestamp())])
+        self.assertEqual(price_cache.read("BTCUSDT")[0][-1], 11.0)
+
+        # una vela en medio de la serie (reparación de hueco) invalida la caché
+        HistoricalPrice.objects.filter(timestamp=self.base + timedelta(minutes=5)).delete()
+        bulk_insert_candles("BTCUSDT", [(6.0, (self.base + timedelta(minutes=5)).timestamp())])
+        self.assertEqual(load_price_arrays("BTCUSDT")[0].size, 11)
+
+        # filtros por rango sobre la caché
+        closes, _ = load_price_arrays("BTCUSDT", start=self.base + timedelta(minutes=2),
+                                      end=self.base + timedelta(minutes=4))
+        np.testing.assert_array_equal(closes, [3, 4, 5])
+
+
+class TestDbPriceArrays(TestCase):
+    def test_iterador_filtra_y_devuelve_arrays_contiguos(self):
+        from dashboard.utils.timeseries import db_price_arrays, to_epoch_us
+
+        base = timezone.now().replace(microsecond=0)
+        for i in range(6):
+            HistoricalPrice.objects.create(symbol="BTCUSDT", close=i + 0.5,
+                                           timestamp=base + timedelta(minutes=i))
+        closes, stamps = db_price_arrays("BTCUSDT", start=base + timedelta(minutes=1),
+                                         end=base + timedelta(minutes=4))
+        np.testing.assert_array_equal(closes, [1.5, 2.5, 3.5, 4.5])
+        self.assertEqual(stamps[0], to_epoch_us(base + timedelta(minutes=1)))
+        self.assertTrue(closes.flags.c_contiguous and stamps.flags.c_contiguous)
+
+    def test_parseo_copy_binario(self):
+        import struct
+        from dashboard.utils.timeseries import _parse_copy_binary
+
+        rows = [(101.25, 1_700_000_000_000_000), (99.5, 1_700_000_060_000_000)]
+        data = b"PGCOPY\n\xff\r\n\x00" + struct.pack(">ii", 0, 0)
+        for close, ts in rows:
+            data += struct.pack(">hidiq", 2, 8, close, 8, ts)
+        data += struct.pack(">h", -1)
+
+        closes, stamps = _parse_copy_binary(bytearray(data) + bytearray(64), len(data))
+        np.testing.assert_array_equal(closes, [101.25, 99.5])
+        np.testing.assert_array_equal(stamps, [ts for _, ts in rows])
+        self.assertEqual(stamps.dtype, np.dtype("<i8"))
+
+
+class TestBarClosedEvents(TestCase):
+    subs = {"BTCUSDT": [{"strategy": "ma_cross", "short": 3, "long": 5}]}
+
+    def test_solo_publica_para_simbolos_suscritos(self):
+        from django.test import override_settings
+        from dashboard.utils.ingestion import bulk_insert_candles
+
+        from unittest.mock import patch
+
+        ts = (timezone.now() - timedelta(minutes=5)).timestamp()
+        encoladas = {}
+        with override_settings(STRATEGY_SUBSCRIPTIONS=self.subs), \
+                patch("dashboard.tasks.evaluar_estrategias.delay") as delay:
+            for caso, symbol, candle_ts, notify in (("suscrito", "BTCUSDT", ts, True),
+                                                    ("libre", "XRPUSDT", ts, True),
+                                                    ("backfill", "BTCUSDT", ts - 60, False)):
+                delay.reset_mock()
+                with self.captureOnCommitCallbacks(execute=True):
+                    bulk_insert_candles(symbol, [(1.0, candle_ts)], notify=notify)
+                encoladas[caso] = delay.call_count
+
+        self.assertEqual(encoladas, {"suscrito": 1, "libre": 0, "backfill": 0})
+
+    def test_evalua_las_estrategias_del_simbolo(self):
+        from django.test import override_settings
+        from dashboard.tasks import evaluar_estrategias
+
+        base = timezone.now()
+        for i, p in enumerate([1, 2, 3, 4, 5, 6, 7, 6, 5, 4, 3, 2]):
+            HistoricalPrice.objects.create(symbol="BTCUSDT", close=p,
+                                           timestamp=base + timedelta(minutes=i))
+        with override_settings(STRATEGY_SUBSCRIPTIONS=self.subs):
+            res = evaluar_estrategias.apply(args=["BTCUSDT"]).get()
+            self.assertEqual(evaluar_estrategias.apply(args=["ETHUSDT"]).get(), {})
+
+        self.assertEqual(res, {"ma_cross(long=5,short=3)": {"created": 2}})
+
+
+class TestPosition(TestCase):
+    def test_trades_actualizan_la_posicion(self):
+        from decimal import Decimal
+        from dashboard.models import Position
+        from dashboard.utils.trading import get_last_buy, is_holding, record_simulated_trade
+
+        self.assertFalse(is_holding("BTCUSDT"))
+        record_simulated_trade("BTCUSDT", "BUY", Decimal("1"), Decimal("100"), Decimal("100"))
+        second = record_simulated_trade("BTCUSDT", "BUY", Decimal("3"), Decimal("200"),
+                                        Decimal("600"))
+
+        position = Position.objects.get(symbol="BTCUSDT")
+        self.assertEqual(position.qty, Decimal("4"))
+        self.assertEqual(position.avg_price, Decimal("175"))
+        self.assertTrue(is_holding("BTCUSDT"))
+        self.assertEqual(get_last_buy("BTCUSDT"), second)
+
+        # FIFO: la venta consume el lote de 100; queda el de 200
+        record_simulated_trade("BTCUSDT", "SELL", Decimal("1"), Decimal("210"), Decimal("210"))
+        position.refresh_from_db()
+        self.assertEqual((position.qty, position.avg_price), (Decimal("3"), Decimal("200")))
+
+        record_simulated_trade("BTCUSDT", "SELL", Decimal("3"), Decimal("210"), Decimal("630"))
+        self.assertFalse(is_holding("BTCUSDT"))
+        self.assertIsNone(get_last_buy("BTCUSDT"))
+        self.assertFalse(is_holding("ETHUSDT"))
+
+    def test_pnl_fifo_con_ventas_parciales_y_recalculo(self):
+        from decimal import Decimal
+        from io import StringIO
+        from django.core.management import call_command
+        from dashboard.models import SimulatedTrade
+        from dashboard.utils.trading import record_simulated_trade
+
+        D = Decimal
+        record_simulated_trade("BTCUSDT", "BUY", D("2"), D("100"), D("200"))
+        record_simulated_trade("BTCUSDT", "BUY", D("2"), D("110"), D("220"))
+        s1 = record_simulated_trade("BTCUSDT", "SELL", D("3"), D("120"), D("360"))
+        s2 = record_simulated_trade("BTCUSDT", "SELL", D("1"), D("105"), D("105"))
+        s3 = record_simulated_trade("BTCUSDT", "SELL", D("1"), D("105"), D("105"))
+
+        self.assertEqual(s1.realized_pnl, D("50"))    # 2·20 + 1·10
+        self.assertEqual(s2.realized_pnl, D("-5"))    # 1·(105 - 110)
+        self.assertIsNone(s3.realized_pnl)            # sin lotes abiertos
+
+        expected = dict(SimulatedTrade.objects.values_list("id", "realized_pnl"))
+        SimulatedTrade.objects.update(realized_pnl=None, remaining_qty=0)
+        call_command("recompute_pnl", stdout=StringIO())
+        self.assertEqual(dict(SimulatedTrade.objects.values_list("id", "realized_pnl")), expected)
+        self.assertEqual(SimulatedTrade.objects.get(id=s1.id).pnl, D("50"))
+
+    def test_migracion_fifo_rellena_los_lotes_existentes(self):
+        import importlib
+        from decimal import Decimal
+        from django.apps import apps
+        from dashboard.models import Position, SimulatedTrade
+        from dashboard.utils.trading import is_holding, record_simulated_trade
+
+        D = Decimal
+        # trades anteriores a 0015: remaining_qty con el valor por defecto
+        for side, qty, price in (("BUY", "2", "100"), ("BUY", "1", "130"), ("SELL", "1", "120")):
+            SimulatedTrade.objects.create(symbol="BTCUSDT", side=side, qty=D(qty), price=D(price),
+                                          total=D(qty) * D(price))
+        Position.objects.create(symbol="BTCUSDT", qty=D("2"), avg_price=D("120"))
+
+        migration = importlib.import_module("dashboard.migrations.0015_fifo_pnl")
+        migration.replay_fifo(apps, None)
+
+        position = Position.objects.get(symbol="BTCUSDT")
+        self.assertEqual((position.qty, position.avg_price), (D("2"), D("115")))
+        sell = record_simulated_trade("BTCUSDT", "SELL", D("1"), D("120"), D("120"))
+        self.assertEqual(sell.realized_pnl, D("20"))   # segundo lote de 100 (FIFO)
+        self.assertTrue(is_holding("BTCUSDT"))
@@ -0,0 +1,181 @@
+# dashboard/utils/backfill.py
+"""
+Backfill histórico de velas 1m desde la API REST de Binance.
+
+Cada símbolo se pagina hacia atrás en páginas de `PAGE_LIMIT` velas
+(endTime = apertura de la vela más antigua ya guardada - 1 ms). Cada página
+se inserta con `bulk_insert_candles` en la misma transacción que su
+checkpoint (`BackfillCheckpoint`), así que una ejecución interrumpida sigue
+donde se quedó. Varios símbolos se descargan a la vez en un pool de hilos
+que comparte un `WeightLimiter`.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+import requests
+from django.conf import settings
+from django.db import connection, transaction
+
+from dashboard.models import BackfillCheckpoint
+from dashboard.utils.indicator_state import reset_indicator_state
+from dashboard.utils.ingestion import bulk_insert_candles
+
+PAGE_LIMIT = 1000
+KLINES_WEIGHT = 2      # peso de GET /api/v3/klines
+MAX_RETRIES = 5
+
+
+class WeightLimiter:
+    """
+    Reparte entre hilos el peso por minuto de la API. Cuenta el peso propio y
+    se sincroniza con X-MBX-USED-WEIGHT-1M, que incluye el de otros procesos
+    con la misma IP. Tras un 429/418 bloquea a todos los hilos durante el
+    Retry-After.
+    """
+
+    def __init__(self, limit: int, clock=time.time, sleep=time.sleep):
+        self.limit = limit
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._minute = None
+        self._used = 0
+        self._paused_until = 0.0
+
+    def acquire(self, weight: int):
+        """Bloquea hasta que `weight` cabe en el minuto actual y lo reserva."""
+        while True:
+            with self._lock:
+                now = self._clock()
+                minute = int(now // 60)
+                if minute != self._minute:
+                    self._minute, self._used = minute, 0
+                if now < self._paused_until:
+                    wait = self._paused_until - now
+                elif self._used + weight <= self.limit:
+                    self._used += weight
+                    return
+                else:
+                    wait = (minute + 1) * 60 - now
+            self._sleep(wait)
+
+    def observe(self, used: int):
+        """Peso usado según la cabecera de la última respuesta."""
+        with self._lock:
+            if int(self._clock() // 60) == self._minute:
+                self._used = max(self._used, used)
+
+    def pause(self, seconds: float):
+        with self._lock:
+            self._paused_until = max(self._paused_until, self._clock() + seconds)
+
+
+def _ms(dt: datetime) -> int:
+    return int(dt.timestamp() * 1000)
+
+
+def fetch_klines(session, limiter: WeightLimiter, symbol: str, end_ms: int,
+                 limit: int = PAGE_LIMIT, base_url: str = None):
+    """
+    Las `limit` velas 1m más recientes que abren en o antes de `end_ms`, en
+    el formato crudo de Binance ([open_time, open, high, low, close, volume,
+    close_time, ...]) y en orden ascendente.
+    """
+    url = (base_url or settings.BINANCE_REST_URL).rstrip("/") + "/api/v3/klines"
+    params = {"symbol": symbol, "interval": "1m", "endTime": end_ms, "limit": limit}
+    for _ in range(MAX_RETRIES):
+        limiter.acquire(KLINES_WEIGHT)
+        resp = session.get(url, params=params, timeout=30)
+        used = resp.headers.get("X-MBX-USED-WEIGHT-1M")
+        if used is not None:
+            limiter.observe(int(used))
+        if resp.status_code in (418, 429):
+            limiter.pause(float(resp.headers.get("Retry-After", 60)))
+            continue
+        resp.raise_for_status()
+        return resp.json()
+    raise RuntimeError(f"{symbol}: límite de peso de Binance excedido {MAX_RETRIES} veces")
+
+
+def backfill_symbol(symbol: str, start: datetime, end: datetime, limiter: WeightLimiter,
+                    base_url: str = None, restart: bool = False) -> int:
+    """
+    Descarga las velas de `symbol` en [start, end] de la más reciente a la
+    más antigua. Si ya hay un checkpoint para (symbol, start) continúa desde
+    su cursor (y no hace nada si está completo), salvo con `restart`.
+    Devuelve el nº de velas enviadas a la base.
+    """
+    checkpoint, created = BackfillCheckpoint.objects.get_or_create(
+        symbol=symbol, start=start, defaults={"cursor": end})
+    if restart and not created:
+        checkpoint.cursor, checkpoint.candles, checkpoint.done = end, 0, False
+        checkpoint.save()
+    if checkpoint.done:
+        return 0
+
+    start_ms = _ms(start)
+    sent = 0
+    with requests.Session() as session:
+        while True:
+            raw = fetch_klines(session, limiter, symbol, _ms(checkpoint.cursor) - 1,
+                               base_url=base_url)
+            page = [k for k in raw if k[0] >= start_ms]
+            if page:
+                candles = [(float(k[4]), int(k[6]) / 1000) for k in page]
+                with transaction.atomic():
+                    # velas históricas: no se evalúan estrategias por página
+                    inserted = bulk_insert_candles(symbol, candles, notify=False)
+                    checkpoint.cursor = datetime.fromtimestamp(page[0][0] / 1000, tz=timezone.utc)
+                    checkpoint.candles += inserted
+                    checkpoint.save(update_fields=["cursor", "candles", "updated_at"])
+                sent += inserted
+            # página corta: se llegó a `start` o al inicio del histórico
+            if len(page) < PAGE_LIMIT:
+                break
+
+    checkpoint.done = True
+    checkpoint.save(update_fields=["done", "updated_at"])
+    # las velas nuevas son anteriores a los checkpoints de los indicadores
+    reset_indicator_state(symbol)
+    return sent
+
+
+def _backfill_in_thread(*args, **kwargs):
+    try:
+        return backfill_symbol(*args, **kwargs)
+    finally:
+        # cada hilo abre su propia conexión a la base
+        connection.close()
+
+
+def run_backfill(symbols, start: datetime, end: datetime = None, workers: int = 4,
+                 base_url: str = None, restart: bool = False, limiter: WeightLimiter = None):
+    """
+    Backfill de varios símbolos con un pool de `workers` hilos (workers=1
+    ejecuta en el hilo actual). Devuelve {symbol: nº de velas o excepción};
+    el fallo de un símbolo no detiene a los demás y su checkpoint se conserva.
+    """
+    end = end or datetime.now(tz=timezone.utc)
+    limiter = limiter or WeightLimiter(settings.BINANCE_WEIGHT_LIMIT)
+    kwargs = {"base_url": base_url, "restart": restart}
+
+    results = {}
+    if workers == 1:
+        for symbol in symbols:
+            try:
+                results[symbol] = backfill_symbol(symbol, start, end, limiter, **kwargs)
+            except Exception as exc:
+                results[symbol] = exc
+        return results
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {symbol: pool.submit(_backfill_in_thread, symbol, start, end, limiter, **kwargs)
+                   for symbol in symbols}
+        for symbol, future in futures.items():
+            try:
+                results[symbol] = future.result()
+            except Exception as exc:
+                results[symbol] = exc
+    return results
@@ -0,0 +1,144 @@
+# dashboard/utils/backtest_jobs.py
+"""
+Backtests como jobs de Celery.
+
+`submit_backtests` crea un BacktestJob por cada conjunto de parámetros y,
+al confirmar la transacción, los encola como un `group` de
+`ejecutar_backtest_job`, así que varios jobs se reparten entre los workers
+en paralelo. El id de la tarea se asigna al crear el job para poder
+revocarla mientras sigue en cola.
+
+Durante la ejecución `ProgressReporter` guarda el porcentaje y comprueba si
+se pidió cancelar, como mucho una vez cada `interval` segundos. La tarea
+tiene un límite de tiempo (BACKTEST_JOB_TIME_LIMIT) y `fail_stale_jobs`
+marca como fallidos los jobs que siguen "running" pasado ese límite (el
+worker murió sin poder guardar el resultado).
+"""
+import time
+import uuid
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from dashboard.backtest import BacktestCancelled
+from dashboard.models import BacktestJob, BacktestRun
+
+_DECIMAL_PARAMS = ("initial_usd", "fee_pct", "slippage_pct", "pct_take_profit", "pct_stop_loss")
+_DATE_PARAMS = ("start", "end")
+
+
+def encode_params(params: dict) -> dict:
+    """Argumentos de `run_backtest` → JSON (Decimal y fechas como texto)."""
+    encoded = {}
+    for key, value in params.items():
+        if isinstance(value, Decimal):
+            value = str(value)
+        elif isinstance(value, datetime):
+            value = value.isoformat()
+        encoded[key] = value
+    return encoded
+
+
+def decode_params(params: dict) -> dict:
+    decoded = dict(params)
+    for key in _DECIMAL_PARAMS:
+        if decoded.get(key) is not None:
+            decoded[key] = Decimal(decoded[key])
+    for key in _DATE_PARAMS:
+        if decoded.get(key) is not None:
+            decoded[key] = datetime.fromisoformat(decoded[key])
+    return decoded
+
+
+def submit_backtests(param_list) -> list:
+    """Crea y encola un job por cada dict de argumentos de `run_backtest`."""
+    from celery import group
+    from dashboard.tasks import ejecutar_backtest_job  # tasks importa este módulo
+
+    with transaction.atomic():
+        jobs = [BacktestJob.objects.create(params=encode_params(params),
+                                           task_id=str(uuid.uuid4()))
+                for params in param_list]
+        signatures = [ejecutar_backtest_job.si(job.id).set(task_id=job.task_id) for job in jobs]
+        transaction.on_commit(lambda: group(signatures).apply_async())
+    return jobs
+
+
+def submit_backtest(**params) -> BacktestJob:
+    return submit_backtests([params])[0]
+
+
+def rerun_params(run: BacktestRun):
+    """
+    Argumentos de `run_backtest` para repetir `run`; None si no es un
+    backtest simple (barridos y walk-forward no se repiten así). Los runs
+    anteriores a guardar sus parámetros usan los valores por defecto.
+    """
+    if run.kind != BacktestRun.SINGLE:
+        return None
+    params = decode_params({k: v for k, v in run.params.items()
+                            if k in _DECIMAL_PARAMS + ("qty_precision", "engine")})
+    return {**params, "symbol": run.symbol, "start": run.start, "end": run.end,
+            "initial_usd": run.initial_usd}
+
+
+def fail_stale_jobs() -> int:
+    """
+    Marca como fallidos los jobs "running" que empezaron hace más que el
+    límite de tiempo de la tarea (más un margen). Devuelve cuántos.
+    """
+    limit = timedelta(seconds=settings.BACKTEST_JOB_TIME_LIMIT + 300)
+    return BacktestJob.objects.filter(
+        status=BacktestJob.RUNNING, started_at__lt=timezone.now() - limit,
+    ).update(status=BacktestJob.FAILED, finished_at=timezone.now(),
+             error="El worker no terminó el job dentro del límite de tiempo")
+
+
+def cancel_job(job: BacktestJob) -> bool:
+    """
+    Pide cancelar el job. Si aún está en cola se marca cancelado y se revoca
+    la tarea; si está ejecutándose se detiene en el siguiente aviso de
+    progreso. Devuelve False si el job ya había terminado.
+    """
+    with transaction.atomic():
+        job = BacktestJob.objects.select_for_update().get(pk=job.pk)
+        if job.finished:
+            return False
+        job.cancel_requested = True
+        fields = ["cancel_requested"]
+        if job.status == BacktestJob.QUEUED:
+            job.status, job.finished_at = BacktestJob.CANCELLED, timezone.now()
+            fields += ["status", "finished_at"]
+        job.save(update_fields=fields)
+
+    if job.status == BacktestJob.CANCELLED and job.task_id:
+        from trader.celery import celery_app
+        celery_app.control.revoke(job.task_id)
+    return True
+
+
+class ProgressReporter:
+    """Callback `progress(done, total)` de `run_backtest` para un job."""
+
+    def __init__(self, job_id: int, interval: float = 1.0, clock=time.monotonic):
+        self.job_id = job_id
+        self.interval = interval
+        self._clock = clock
+        self._last = None
+        self._percent = 0
+
+    def __call__(self, done: int, total: int):
+        now = self._clock()
+        if self._last is not None and now - self._last < self.interval:
+            return
+        self._last = now
+        percent = min(99, int(100 * done / total)) if total else 0
+        jobs = BacktestJob.objects.filter(pk=self.job_id)
+        if jobs.filter(cancel_requested=True).exists():
+            raise BacktestCancelled(f"job #{self.job_id} cancelado")
+        if percent != self._percent:
+            self._percent = percent
+            jobs.update(progress=percent)
@@ -0,0 +1,80 @@
+# dashboard/utils/candles.py
+"""
+Velas OHLC por marco temporal para la API (/api/candles/).
+
+Se remuestrean en el servidor con `core.analysis.resample` sobre
+`load_price_arrays` (la caché memmap si está activada). El resultado de cada
+(symbol, timeframe, rango) se guarda en la caché de Django bajo una versión
+por símbolo que `bulk_insert_candles` incrementa al confirmar velas nuevas,
+así que nunca se sirve una respuesta anterior a la última vela guardada.
+Las velas las insertan candle_worker y celery_worker, no web: la caché
+debe ser compartida (CACHE_URL); con memoria local avisa el check
+dashboard.W001.
+"""
+import time
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from core.analysis.resample import resample_ohlc
+from dashboard.utils.timeseries import load_price_arrays
+
+TIMEFRAMES = {
+    "1m": timedelta(minutes=1),
+    "5m": timedelta(minutes=5),
+    "15m": timedelta(minutes=15),
+    "1h": timedelta(hours=1),
+    "1d": timedelta(days=1),
+}
+CACHE_TIMEOUT = 3600
+_US = timedelta(microseconds=1)
+
+
+def _version_key(symbol: str) -> str:
+    return f"candles:version:{symbol}"
+
+
+def candles_version(symbol: str) -> int:
+    version = cache.get(_version_key(symbol))
+    if version is None:
+        # valor inicial único: una versión expulsada de la caché no repite
+        # claves de respuestas que sigan guardadas
+        cache.add(_version_key(symbol), time.time_ns(), timeout=None)
+        version = cache.get(_version_key(symbol))
+    return version
+
+
+def bump_candles_version(symbol: str):
+    """Invalida las velas cacheadas de `symbol` cuando se confirme la transacción."""
+    def bump():
+        try:
+            cache.incr(_version_key(symbol))
+        except ValueError:
+            cache.add(_version_key(symbol), time.time_ns(), timeout=None)
+
+    transaction.on_commit(bump)
+
+
+def get_candles(symbol: str, timeframe: str, start=None, end=None, limit: int = 500) -> dict:
+    """
+    Velas de `symbol` en [start, end] como arrays paralelos:
+    {"t": apertura en epoch ms, "o", "h", "l", "c", "n": nº de velas de 1m}.
+    Sin `start` son las velas de los últimos `limit` intervalos hasta `end`
+    (o ahora); esa consulta, la habitual de los gráficos, también se cachea
+    hasta que llega una vela nueva.
+    """
+    key = (f"candles:{symbol}:{timeframe}:{start.isoformat() if start else limit}:"
+           f"{end.isoformat() if end else 'last'}:{candles_version(symbol)}")
+    data = cache.get(key)
+    if data is None:
+        step = TIMEFRAMES[timeframe]
+        since = start if start is not None else (end or timezone.now()) - step * (limit + 1)
+        closes, stamps = load_price_arrays(symbol, since, end)
+        t, o, h, l, c, n = resample_ohlc(stamps, closes, step // _US)
+        tail = slice(None) if start is not None else slice(-limit, None)
+        data = {"t": (t[tail] // 1000).tolist(), "o": o[tail].tolist(), "h": h[tail].tolist(),
+                "l": l[tail].tolist(), "c": c[tail].tolist(), "n": n[tail].tolist()}
+        cache.set(key, data, CACHE_TIMEOUT)
+    return data
@@ -0,0 +1,68 @@
+# dashboard/utils/columnar.py
+"""
+Formato binario columnar de las exportaciones (`dashboard.utils.export`).
+
+    b"TRDCOL1\\n"
+    uint32 LE  longitud de la cabecera
+    cabecera   JSON {"columns": [{"name": ..., "dtype": ...}, ...]}
+    bloques    uint32 LE nº de filas n (> 0) y, por columna, n valores en
+               su dtype de NumPy (little-endian) uno detrás de otro
+    fin        uint32 LE 0
+
+Cada bloque se escribe y se lee con un solo `tobytes` / `frombuffer` por
+columna. Las fechas son int64 en µs desde epoch y los textos bytes de
+ancho fijo (`S<n>`). No depende de Django: los notebooks solo necesitan
+`read_columnar`.
+"""
+import json
+import struct
+
+import numpy as np
+
+MAGIC = b"TRDCOL1\n"
+_U32 = struct.Struct("<I")
+
+
+def encode_header(columns) -> bytes:
+    """`columns`: [(nombre, dtype de NumPy)]."""
+    header = json.dumps({"columns": [{"name": name, "dtype": np.dtype(dtype).str}
+                                     for name, dtype in columns]}).encode()
+    return MAGIC + _U32.pack(len(header)) + header
+
+
+def encode_block(arrays) -> bytes:
+    """Un bloque con los arrays de cada columna (misma longitud y orden que la cabecera)."""
+    n = len(arrays[0]) if arrays else 0
+    if n == 0:
+        return b""
+    return _U32.pack(n) + b"".join(np.ascontiguousarray(a).tobytes() for a in arrays)
+
+
+def end_marker() -> bytes:
+    return _U32.pack(0)
+
+
+def _read_exact(stream, size: int) -> bytes:
+    data = stream.read(size)
+    if len(data) != size:
+        raise ValueError("exportación columnar truncada")
+    return data
+
+
+def read_columnar(stream) -> dict:
+    """{columna: np.ndarray} de un fichero o respuesta en formato columnar."""
+    if _read_exact(stream, len(MAGIC)) != MAGIC:
+        raise ValueError("no es una exportación columnar")
+    (size,) = _U32.unpack(_read_exact(stream, 4))
+    columns = [(c["name"], np.dtype(c["dtype"]))
+               for c in json.loads(_read_exact(stream, size))["columns"]]
+
+    blocks = {name: [] for name, _ in columns}
+    while True:
+        (n,) = _U32.unpack(_read_exact(stream, 4))
+        if n == 0:
+            break
+        for name, dtype in columns:
+            blocks[name].append(np.frombuffer(_read_exact(stream, n * dtype.itemsize), dtype=dtype))
+    return {name: (np.concatenate(blocks[name]) if blocks[name] else np.empty(0, dtype=dtype))
+            for name, dtype in columns}
@@ -0,0 +1,89 @@
+# dashboard/utils/equity_curve.py
+"""
+Curvas de equity de los BacktestRun para el admin.
+
+Cada run guarda su curva marcada a mercado en cada vela (`EquityCurve`).
+Para dibujarla o servirla como JSON se reduce con LTTB a un presupuesto de
+puntos, y el PNG renderizado se guarda en la caché de Django por
+(run, tamaño): la curva de un run no cambia, así que solo el primer request
+paga el render. Los runs sin EquityCurve (en curso o anteriores a ella)
+usan la curva aproximada en los fills, calculada a partir de sus trades;
+esa no se cachea, porque un run en curso aún puede añadir trades.
+"""
+from io import BytesIO
+
+import numpy as np
+from django.core.cache import cache
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from core.analysis.downsample import lttb
+from dashboard.models import EquityCurve, Trade
+from dashboard.utils.timeseries import to_epoch_us
+
+PNG_CACHE_TIMEOUT = 24 * 3600
+MAX_POINTS = 10_000
+
+
+def curve_arrays(run):
+    """(timestamps int64 µs, equity float64) del run."""
+    try:
+        return run.equity_curve.arrays()
+    except EquityCurve.DoesNotExist:
+        return _fill_curve(run)
+
+
+def _fill_curve(run):
+    stamps, balances = [to_epoch_us(run.start)], [float(run.initial_usd)]
+    balance, qty = float(run.initial_usd), 0.0
+    for side, price, trade_qty, ts_fill in (Trade.objects.filter(run=run).order_by("ts_fill", "id")
+                                            .values_list("side", "price", "qty", "ts_fill")):
+        if side == "BUY":
+            qty, balance = float(trade_qty), 0.0
+        else:
+            qty, balance = 0.0, float(price) * qty
+        stamps.append(to_epoch_us(ts_fill))
+        balances.append(balance)
+    return np.array(stamps, dtype=np.int64), np.array(balances, dtype=float)
+
+
+def downsampled(run, points: int):
+    """La curva del run reducida con LTTB a como mucho `points` puntos."""
+    stamps, equity = curve_arrays(run)
+    idx = lttb(stamps, equity, min(points, MAX_POINTS))
+    return stamps[idx], equity[idx], stamps.size
+
+
+def render_png(run, width: int, height: int, dpi: int = 100) -> bytes:
+    """
+    PNG de la curva del run de `width`×`height` píxeles, con un punto por
+    píxel de ancho. Se usa la API de Figure (backend Agg) en lugar de pyplot,
+    que guarda estado global y no es seguro entre hilos del servidor.
+    """
+    stamps, equity, _ = downsampled(run, width)
+    fig = Figure(figsize=(width / dpi, height / dpi), dpi=dpi)
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+    ax.plot(stamps.astype("datetime64[us]"), equity, linewidth=1)
+    ax.set_xlabel("Tiempo")
+    ax.set_ylabel("Equity (USD)")
+    ax.set_title(f"Curva de equity - Run #{run.id}")
+    ax.grid(True)
+    fig.autofmt_xdate()
+    fig.tight_layout()
+
+    buffer = BytesIO()
+    fig.savefig(buffer, format="png")
+    return buffer.getvalue()
+
+
+def cached_png(run, width: int, height: int) -> bytes:
+    key = f"equity_png:{run.id}:{width}x{height}"
+    png = cache.get(key)
+    if png is None:
+        # se comprueba antes del render: solo la curva definitiva se cachea
+        final = EquityCurve.objects.filter(run_id=run.id).exists()
+        png = render_png(run, width, height)
+        if final:
+            cache.set(key, png, PNG_CACHE_TIMEOUT)
+    return png
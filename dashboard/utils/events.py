@@ -0,0 +1,30 @@
+# dashboard/utils/events.py
+"""
+Eventos "vela cerrada" (symbol, timeframe).
+
+La ingesta (`bulk_insert_candles`: websocket, REST) publica uno cuando guarda
+velas nuevas de un símbolo. Si el símbolo tiene estrategias en
+STRATEGY_SUBSCRIPTIONS se encola `evaluar_estrategias` solo para él; un
+símbolo sin suscripciones no genera ninguna tarea.
+
+El evento se envía al confirmar la transacción, para que la tarea vea las
+velas recién insertadas.
+"""
+from django.conf import settings
+from django.db import transaction
+
+
+def subscriptions(symbol: str, timeframe: str = "1m"):
+    """Estrategias suscritas a las velas `timeframe` de `symbol`."""
+    subs = getattr(settings, "STRATEGY_SUBSCRIPTIONS", {}).get(symbol, [])
+    return [sub for sub in subs if sub.get("timeframe", "1m") == timeframe]
+
+
+def publish_bar_closed(symbol: str, timeframe: str = "1m") -> bool:
+    """Encola la evaluación de `symbol`; devuelve False si no hay suscripciones."""
+    if not subscriptions(symbol, timeframe):
+        return False
+    from dashboard.tasks import evaluar_estrategias  # tasks importa la ingesta
+
+    transaction.on_commit(lambda: evaluar_estrategias.delay(symbol, timeframe))
+    return True
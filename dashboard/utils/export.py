@@ -0,0 +1,183 @@
+# dashboard/utils/export.py
+"""
+Exportación en streaming de precios, señales y trades.
+
+Las filas se leen con `QuerySet.iterator()`, que en PostgreSQL usa un
+cursor del lado del servidor, y se escriben por bloques de `CHUNK` filas:
+la memoria no depende del tamaño de la exportación. Formatos:
+
+  - csv: con cabecera; fechas ISO 8601 y decimales exactos.
+  - ndjson: un objeto JSON por línea; decimales como número.
+  - bin: columnar (`dashboard.utils.columnar`), fechas en µs desde epoch y
+    decimales float64 (NaN si son nulos). Las columnas JSON no se incluyen.
+
+Lo usan la API (/api/export/<dataset>/) y el comando `export_data`.
+"""
+import csv
+import io
+import itertools
+import json
+from dataclasses import dataclass
+from datetime import datetime
+from decimal import Decimal
+
+import numpy as np
+
+from dashboard.models import HistoricalPrice, SimulatedTrade, Trade, TradingSignal
+from dashboard.utils import columnar
+from dashboard.utils.timeseries import to_epoch_us
+
+CHUNK = 10_000
+FORMATS = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+    "bin": "application/octet-stream",
+}
+
+# tipo de columna → dtype en el formato columnar (None = no se exporta en bin)
+_BIN_DTYPES = {"int": "<i8", "dec": "<f8", "dt": "<i8", "json": None}
+
+
+@dataclass(frozen=True)
+class Dataset:
+    model: type
+    time_field: str
+    columns: tuple   # ((nombre, tipo), ...); tipo "int", "dec", "dt", "json" o "S<n>"
+
+
+DATASETS = {
+    "prices": Dataset(HistoricalPrice, "timestamp",
+                      (("symbol", "S20"), ("timestamp", "dt"), ("close", "dec"))),
+    "signals": Dataset(TradingSignal, "timestamp",
+                       (("id", "int"), ("symbol", "S20"), ("signal_type", "S4"),
+                        ("timestamp", "dt"), ("price", "dec"), ("meta", "json"))),
+    "trades": Dataset(Trade, "ts_fill",
+                      (("id", "int"), ("run_id", "int"), ("symbol", "S20"), ("side", "S4"),
+                       ("ts_signal", "dt"), ("ts_fill", "dt"), ("price", "dec"), ("qty", "dec"),
+                       ("pnl", "dec"))),
+    "simulated-trades": Dataset(SimulatedTrade, "ts",
+                                (("id", "int"), ("symbol", "S20"), ("side", "S4"), ("ts", "dt"),
+                                 ("qty", "dec"), ("price", "dec"), ("total", "dec"),
+                                 ("remaining_qty", "dec"), ("realized_pnl", "dec"))),
+}
+
+
+def export_queryset(dataset: str, symbol: str = None, start: datetime = None,
+                    end: datetime = None, run: int = None):
+    """Filas de `dataset` filtradas por símbolo, rango [start, end] y run (solo trades)."""
+    spec = DATASETS[dataset]
+    qs = spec.model.objects.all()
+    if symbol:
+        qs = qs.filter(symbol=symbol)
+    if start is not None:
+        qs = qs.filter(**{f"{spec.time_field}__gte": start})
+    if end is not None:
+        qs = qs.filter(**{f"{spec.time_field}__lte": end})
+    if run is not None and dataset == "trades":
+        qs = qs.filter(run_id=run)
+    return qs.order_by(spec.time_field, "id").values_list(*(name for name, _ in spec.columns))
+
+
+def stream_export(dataset: str, fmt: str, **filters):
+    """Generador de bytes con la exportación completa en el formato `fmt`."""
+    if fmt not in FORMATS:
+        raise ValueError(f"formato desconocido: {fmt}")
+    spec = DATASETS[dataset]
+    rows = export_queryset(dataset, **filters).iterator(chunk_size=CHUNK)
+    encode = {"csv": _CsvEncoder, "ndjson": _NdjsonEncoder, "bin": _ColumnarEncoder}[fmt](spec.columns)
+
+    yield encode.header()
+    while True:
+        batch = list(itertools.islice(rows, CHUNK))
+        if not batch:
+            break
+        yield encode.batch(batch)
+    yield encode.footer()
+
+
+class _CsvEncoder:
+    def __init__(self, columns):
+        self.columns = columns
+        self.buffer = io.StringIO()
+        self.writer = csv.writer(self.buffer)
+
+    def _flush(self) -> bytes:
+        data = self.buffer.getvalue().encode()
+        self.buffer.seek(0)
+        self.buffer.truncate()
+        return data
+
+    def header(self) -> bytes:
+        self.writer.writerow([name for name, _ in self.columns])
+        return self._flush()
+
+    def batch(self, rows) -> bytes:
+        kinds = [kind for _, kind in self.columns]
+        self.writer.writerows([[_text(value, kind) for value, kind in zip(row, kinds)]
+                               for row in rows])
+        return self._flush()
+
+    def footer(self) -> bytes:
+        return b""
+
+
+def _text(value, kind):
+    if value is None:
+        return ""
+    if kind == "dt":
+        return value.isoformat()
+    if kind == "json":
+        return json.dumps(value)
+    return value
+
+
+class _NdjsonEncoder:
+    def __init__(self, columns):
+        self.names = [name for name, _ in columns]
+
+    def header(self) -> bytes:
+        return b""
+
+    def batch(self, rows) -> bytes:
+        lines = [json.dumps(dict(zip(self.names, row)), default=_json_default) for row in rows]
+        return ("\n".join(lines) + "\n").encode()
+
+    def footer(self) -> bytes:
+        return b""
+
+
+def _json_default(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} no serializable")
+
+
+class _ColumnarEncoder:
+    def __init__(self, columns):
+        # (posición en la fila, nombre, tipo, dtype) de las columnas exportables
+        self.columns = [(i, name, kind, _BIN_DTYPES.get(kind, kind))
+                        for i, (name, kind) in enumerate(columns)
+                        if _BIN_DTYPES.get(kind, kind) is not None]
+
+    def header(self) -> bytes:
+        return columnar.encode_header([(name, dtype) for _, name, _, dtype in self.columns])
+
+    def batch(self, rows) -> bytes:
+        values = list(zip(*rows))
+        return columnar.encode_block([_column(values[i], kind, dtype)
+                                      for i, _, kind, dtype in self.columns])
+
+    def footer(self) -> bytes:
+        return columnar.end_marker()
+
+
+def _column(values, kind, dtype) -> np.ndarray:
+    if kind == "dt":
+        return np.array([to_epoch_us(v) for v in values], dtype=dtype)
+    if kind == "dec":
+        return np.array([np.nan if v is None else float(v) for v in values], dtype=dtype)
+    if kind == "int":
+        return np.array(values, dtype=dtype)
+    return np.array([v.encode() for v in values], dtype=dtype)
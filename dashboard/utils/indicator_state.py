@@ -0,0 +1,40 @@
+# dashboard/utils/indicator_state.py
+"""
+Checkpoints de los indicadores incrementales (`core.analysis.incremental`).
+"""
+from dashboard.models import IndicatorState
+from dashboard.utils.timeseries import from_epoch_us, load_price_arrays
+
+
+def params_key(params: dict) -> str:
+    """{'short': 3, 'long': 5} → 'long=5,short=3' (orden estable)."""
+    return ",".join(f"{k}={params[k]}" for k in sorted(params))
+
+
+def lock_state(symbol: str, indicator: str, params: dict) -> IndicatorState:
+    """
+    Devuelve el estado del indicador bloqueado para esta transacción, para que
+    dos ejecuciones simultáneas no procesen las mismas velas.
+    Debe llamarse dentro de `transaction.atomic()`.
+    """
+    key = params_key(params)
+    IndicatorState.objects.get_or_create(symbol=symbol, indicator=indicator, params=key)
+    return (IndicatorState.objects
+            .select_for_update()
+            .get(symbol=symbol, indicator=indicator, params=key))
+
+
+def new_candles(state: IndicatorState):
+    """(closes, timestamps) de las velas posteriores al checkpoint de `state`."""
+    closes, stamps = load_price_arrays(state.symbol, after=state.last_timestamp)
+    return closes, [from_epoch_us(ts) for ts in stamps.tolist()]
+
+
+def reset_indicator_state(symbol: str) -> int:
+    """
+    Borra los checkpoints de `symbol`. Necesario cuando se insertan velas
+    anteriores al checkpoint (p. ej. un backfill), porque el estado ya no
+    refleja la serie completa.
+    """
+    deleted, _ = IndicatorState.objects.filter(symbol=symbol).delete()
+    return deleted
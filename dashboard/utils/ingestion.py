@@ -0,0 +1,71 @@
+# dashboard/utils/ingestion.py
+"""
+Ingesta de velas 1m en HistoricalPrice.
+
+Lee el último timestamp guardado por símbolo para pedir a Binance solo las
+velas que faltan y las escribe con un único INSERT masivo que ignora
+conflictos (symbol, timestamp).
+"""
+import math
+from datetime import datetime, timezone
+
+from dashboard.models import HistoricalPrice
+from dashboard.utils.candles import bump_candles_version
+from dashboard.utils.events import publish_bar_closed
+from dashboard.utils.timeseries import sync_price_cache, to_epoch_us
+
+INTERVAL_SECONDS = 60  # velas de 1 minuto
+TIMEFRAME = "1m"
+
+
+def latest_timestamp(symbol: str):
+    """Último `timestamp` guardado para `symbol` (o None si no hay filas)."""
+    return (HistoricalPrice.objects
+            .filter(symbol=symbol)
+            .order_by("-timestamp")
+            .values_list("timestamp", flat=True)
+            .first())
+
+
+def missing_candles(last, lookback: int, now: datetime = None) -> int:
+    """
+    Número de velas a pedir para cubrir el hueco entre la última vela
+    guardada (`last`) y `now`, acotado a `lookback`. Sin historial
+    (`last` None) devuelve `lookback`.
+    """
+    if last is None:
+        return lookback
+    now = now or datetime.now(tz=timezone.utc)
+    gap = math.ceil((now - last).total_seconds() / INTERVAL_SECONDS)
+    # +1 para incluir la vela aún abierta, que se descarta al insertar
+    return max(0, min(lookback, gap + 1))
+
+
+def bulk_insert_candles(symbol: str, candles, since=None, now: datetime = None,
+                        batch_size: int = 1000, notify: bool = True) -> int:
+    """
+    Inserta `candles` [(close, close_time_s), ...] en un solo bulk_create.
+
+    Descarta las velas que aún no han cerrado (close_time > now) y las que no
+    son posteriores a `since`. Devuelve el número de filas enviadas a la base;
+    los duplicados (symbol, timestamp) se ignoran en la propia base. Después
+    añade las velas nuevas a la caché de precios, invalida las velas
+    remuestreadas de la API (`dashboard.utils.candles`) y, con `notify`,
+    publica el evento de vela cerrada del símbolo (ver `dashboard.utils.events`).
+    """
+    now = now or datetime.now(tz=timezone.utc)
+    rows = []
+    for close_price, close_time_s in candles:
+        ts = datetime.fromtimestamp(close_time_s, tz=timezone.utc)
+        if ts > now or (since is not None and ts <= since):
+            continue
+        rows.append(HistoricalPrice(symbol=symbol, close=close_price, timestamp=ts))
+
+    if rows:
+        HistoricalPrice.objects.bulk_create(rows, batch_size=batch_size,
+                                            ignore_conflicts=True)
+        sync_price_cache(symbol, [to_epoch_us(row.timestamp) for row in rows])
+        bump_candles_version(symbol)
+        if notify:
+            publish_bar_closed(symbol, TIMEFRAME)
+    return len(rows)
@@ -0,0 +1,127 @@
+# dashboard/utils/price_cache.py
+"""
+Caché local columnar de precios por símbolo.
+
+Por cada símbolo hay dos ficheros binarios en PRICE_CACHE_DIR/<base de
+datos>, que se leen con np.memmap:
+
+    {symbol}.ts.i64     timestamps int64 (epoch µs, little-endian), ordenados
+    {symbol}.close.f64  cierres float64 (little-endian)
+
+Este módulo solo gestiona los ficheros; la validación contra la base de
+datos (que sigue siendo la fuente de verdad) está en
+`dashboard.utils.timeseries.load_price_arrays`.
+
+Los escritores toman un flock exclusivo y los lectores uno compartido
+mientras abren los mapas. Al añadir filas se escriben primero los cierres y
+después los timestamps, y los lectores usan la longitud del fichero de
+timestamps, así que nunca ven una fila a medias.
+"""
+import fcntl
+import os
+from contextlib import contextmanager
+
+import numpy as np
+from django.conf import settings
+from django.db import connection
+
+TS_DTYPE = np.dtype("<i8")
+CLOSE_DTYPE = np.dtype("<f8")
+
+
+def cache_dir():
+    """
+    Directorio de la caché o None si está desactivada. Cada base de datos
+    tiene su propio subdirectorio, así la base de tests no pisa la caché real.
+    """
+    base = getattr(settings, "PRICE_CACHE_DIR", None)
+    if not base:
+        return None
+    db_name = os.path.basename(str(connection.settings_dict["NAME"])) or "default"
+    return os.path.join(base, db_name)
+
+
+def enabled() -> bool:
+    return bool(cache_dir())
+
+
+def _paths(symbol: str):
+    base = os.path.join(cache_dir(), symbol.upper())
+    return base + ".ts.i64", base + ".close.f64", base + ".lock"
+
+
+@contextmanager
+def _locked(symbol: str, exclusive: bool):
+    os.makedirs(cache_dir(), exist_ok=True)
+    with open(_paths(symbol)[2], "a") as fh:
+        fcntl.flock(fh, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        try:
+            yield
+        finally:
+            fcntl.flock(fh, fcntl.LOCK_UN)
+
+
+def _map(path: str, dtype, n: int):
+    if n == 0:
+        return np.empty(0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode="r", shape=(n,))
+
+
+def read(symbol: str):
+    """(closes, timestamps) mapeados en memoria, o None si no hay caché."""
+    ts_path, close_path, _ = _paths(symbol)
+    with _locked(symbol, exclusive=False):
+        if not (os.path.exists(ts_path) and os.path.exists(close_path)):
+            return None
+        n = min(os.path.getsize(ts_path) // TS_DTYPE.itemsize,
+                os.path.getsize(close_path) // CLOSE_DTYPE.itemsize)
+        return _map(close_path, CLOSE_DTYPE, n), _map(ts_path, TS_DTYPE, n)
+
+
+def append(symbol: str, closes: np.ndarray, stamps: np.ndarray) -> int:
+    """
+    Añade filas al final. Solo acepta timestamps posteriores al último
+    guardado (las demás se ignoran); devuelve cuántas se añadieron.
+    """
+    ts_path, close_path, _ = _paths(symbol)
+    closes = np.asarray(closes, dtype=CLOSE_DTYPE)
+    stamps = np.asarray(stamps, dtype=TS_DTYPE)
+    with _locked(symbol, exclusive=True):
+        tail = _tail(ts_path)
+        if tail is not None:
+            keep = stamps > tail
+            closes, stamps = closes[keep], stamps[keep]
+        if stamps.size:
+            with open(close_path, "ab") as fh:
+                fh.write(closes.tobytes())
+            with open(ts_path, "ab") as fh:
+                fh.write(stamps.tobytes())
+    return int(stamps.size)
+
+
+def write(symbol: str, closes: np.ndarray, stamps: np.ndarray):
+    """Reemplaza la caché completa de `symbol` (ficheros temporales + rename)."""
+    ts_path, close_path, _ = _paths(symbol)
+    with _locked(symbol, exclusive=True):
+        for path, values, dtype in ((close_path, closes, CLOSE_DTYPE), (ts_path, stamps, TS_DTYPE)):
+            tmp = path + ".tmp"
+            np.asarray(values, dtype=dtype).tofile(tmp)
+            os.replace(tmp, path)
+
+
+def invalidate(symbol: str):
+    """Borra la caché de `symbol`; la siguiente lectura la reconstruye."""
+    ts_path, close_path, _ = _paths(symbol)
+    with _locked(symbol, exclusive=True):
+        for path in (ts_path, close_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+
+def _tail(ts_path: str):
+    size = os.path.getsize(ts_path) if os.path.exists(ts_path) else 0
+    if size < TS_DTYPE.itemsize:
+        return None
+    with open(ts_path, "rb") as fh:
+        fh.seek(size - size % TS_DTYPE.itemsize - TS_DTYPE.itemsize)
+        return int(np.frombuffer(fh.read(TS_DTYPE.itemsize), dtype=TS_DTYPE)[0])
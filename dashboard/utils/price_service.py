@@ -0,0 +1,113 @@
+# dashboard/utils/price_service.py
+"""
+Precios en vivo desde Redis.
+
+El listener guarda por símbolo el hash compacto px:{symbol} con el último
+precio (`p`) y la hora del evento en el exchange (`E`, epoch ms). Este
+servicio lee varios símbolos en un solo round trip (pipeline de HMGET) sin
+parsear el JSON del ticker, y guarda lo leído en una caché en proceso
+durante `ttl` segundos, para el paper trading y los controles de riesgo que
+lo consultan continuamente.
+
+Con `max_age` se descartan los precios cuyo evento es más antiguo que esos
+segundos (listener caído, símbolo sin actividad).
+"""
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class LivePrice:
+    symbol: str
+    price: Decimal
+    event_ms: int   # hora del evento en el exchange (epoch ms)
+
+    def age(self, now: float = None) -> float:
+        """Segundos desde el evento."""
+        return (now if now is not None else time.time()) - self.event_ms / 1000
+
+    def is_stale(self, max_age: float, now: float = None) -> bool:
+        return self.age(now) > max_age
+
+
+class PriceService:
+    def __init__(self, client, ttl: float = 0.5, clock=time.monotonic, wall_clock=time.time):
+        self.client = client
+        self.ttl = ttl
+        self._clock = clock
+        self._wall_clock = wall_clock
+        self._lock = threading.Lock()
+        self._cache = {}   # symbol -> (leído en, LivePrice | None)
+
+    def get_many(self, symbols, max_age: float = None) -> dict:
+        """
+        {symbol: LivePrice | None} para `symbols`. Los que no están en la
+        caché local (o caducaron) se piden a Redis en un solo pipeline.
+        """
+        now = self._clock()
+        result, missing = {}, []
+        with self._lock:
+            for symbol in symbols:
+                cached = self._cache.get(symbol)
+                if cached is not None and now - cached[0] < self.ttl:
+                    result[symbol] = cached[1]
+                else:
+                    missing.append(symbol)
+
+        if missing:
+            pipe = self.client.pipeline(transaction=False)
+            for symbol in missing:
+                pipe.hmget(f"px:{symbol}", "p", "E")
+            fetched = {symbol: _parse(symbol, fields)
+                       for symbol, fields in zip(missing, pipe.execute())}
+            result.update(fetched)
+            if self.ttl > 0:
+                with self._lock:
+                    self._cache.update((s, (now, price)) for s, price in fetched.items())
+
+        if max_age is not None:
+            wall = self._wall_clock()
+            result = {s: (p if p is not None and not p.is_stale(max_age, wall) else None)
+                      for s, p in result.items()}
+        return result
+
+    def get(self, symbol: str, max_age: float = None):
+        return self.get_many([symbol], max_age=max_age)[symbol]
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+
+def _parse(symbol: str, fields):
+    price, event_ms = fields
+    if price is None:
+        return None
+    try:
+        return LivePrice(symbol, Decimal(_text(price)), int(_text(event_ms) or 0))
+    except (InvalidOperation, ValueError) as e:
+        logger.error("Precio inválido en Redis para %s: %s", symbol, e)
+        return None
+
+
+def _text(value):
+    return value.decode() if isinstance(value, bytes) else value
+
+
+_service = None
+
+
+def price_service() -> PriceService:
+    """Servicio compartido del proceso, con el cliente de `redis_service`."""
+    global _service
+    if _service is None:
+        from dashboard.utils.redis_service import r
+        _service = PriceService(r, ttl=settings.LIVE_PRICE_TTL)
+    return _service
@@ -3,9 +3,10 @@
 import redis
 import os
 import logging
-import json
 from decimal import Decimal, InvalidOperation
 
+from dashboard.utils.price_service import price_service
+
 logger = logging.getLogger(__name__)
 
 # Configuración de Redis
@@ -31,8 +32,8 @@ def get_price_from_redis(symbol):
         if price is None:
             logger.warning(f"No hay precio en Redis para {symbol}")
             return None
-        return Decimal(price.decode("utf-8"))
-    except (InvalidOperation, AttributeError) as e:
+        return Decimal(price)
+    except InvalidOperation as e:
         logger.error(f"Error al convertir el precio de {symbol}: {e}")
         return None
     except Exception as e:
@@ -40,19 +41,18 @@ def get_price_from_redis(symbol):
         return None
 
 
-def get_live_price(symbol):
+def get_live_price(symbol, max_age=None):
     """
-    Obtiene el precio 'c' desde el ticker en Redis.
-    Este valor representa el precio de cierre más reciente (last price).
+    Obtiene el último precio de `symbol` (hash px:{symbol} que escribe el
+    listener, vía `price_service`). Con `max_age` (segundos) devuelve None
+    si el evento del exchange es más antiguo.
     """
     try:
-        key = f"ticker:{symbol}"  # clave donde se guarda el ticker completo
-        raw = r.get(key)
-        if raw is None:
-            logger.warning(f"No hay ticker en Redis para {symbol}")
-            return None
-        data = json.loads(raw)
-        return Decimal(data.get("c")) if "c" in data else None
-    except (InvalidOperation, json.JSONDecodeError) as e:
+        live = price_service().get(symbol, max_age=max_age)
+    except redis.RedisError as e:
         logger.error(f"Error al leer precio en tiempo real para {symbol}: {e}")
         return None
+    if live is None:
+        logger.warning(f"No hay precio reciente en Redis para {symbol}")
+        return None
+    return live.price
@@ -0,0 +1,212 @@
+# dashboard/utils/timeseries.py
+"""
+Carga de precios y señales como arrays de NumPy.
+
+Los timestamps se representan como enteros int64 en µs desde epoch (UTC),
+que es exacto para los DateTimeField de Django y permite `searchsorted`.
+
+`load_price_arrays` es el único punto de lectura de precios para tareas,
+backtests y API: usa la caché memmap (`price_cache`) si está activada y la
+valida contra la base de datos, que sigue siendo la fuente de verdad.
+"""
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+from django.db import connection
+from django.db.models import Max, Min
+
+from dashboard.models import HistoricalPrice, TradingSignal
+from dashboard.utils import price_cache
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_US = timedelta(microseconds=1)
+# filas por viaje a la base en la lectura con iterador
+_CHUNK = 5000
+
+
+def to_epoch_us(dt: datetime) -> int:
+    return (dt - EPOCH) // _US
+
+
+def from_epoch_us(us: int) -> datetime:
+    return EPOCH + timedelta(microseconds=int(us))
+
+
+def load_price_arrays(symbol: str, start=None, end=None, after=None):
+    """
+    (closes float64, timestamps int64 µs) de HistoricalPrice ordenados, con
+    start <= timestamp <= end y timestamp > after (cada límite es opcional).
+    """
+    if price_cache.enabled():
+        closes, stamps = cached_price_arrays(symbol)
+        lo, hi = 0, stamps.size
+        if start is not None:
+            lo = max(lo, int(np.searchsorted(stamps, to_epoch_us(start), side="left")))
+        if after is not None:
+            lo = max(lo, int(np.searchsorted(stamps, to_epoch_us(after), side="right")))
+        if end is not None:
+            hi = int(np.searchsorted(stamps, to_epoch_us(end), side="right"))
+        return closes[lo:hi], stamps[lo:hi]
+    return db_price_arrays(symbol, start, end, after)
+
+
+def db_price_arrays(symbol: str, start=None, end=None, after=None):
+    """
+    Como `load_price_arrays` pero leyendo siempre de la base de datos.
+
+    En PostgreSQL las filas llegan con `COPY ... TO STDOUT` en formato
+    binario directamente a un buffer reservado de antemano y se interpretan
+    con un dtype estructurado, sin crear un objeto Python por vela. En otros
+    motores (SQLite en tests) se recorre un iterador por bloques que rellena
+    arrays reservados con el nº de filas.
+    """
+    qs = HistoricalPrice.objects.filter(symbol=symbol)
+    if start is not None:
+        qs = qs.filter(timestamp__gte=start)
+    if after is not None:
+        qs = qs.filter(timestamp__gt=after)
+    if end is not None:
+        qs = qs.filter(timestamp__lte=end)
+    if connection.vendor == "postgresql":
+        return _copy_price_arrays(qs)
+    return _iter_price_arrays(qs)
+
+
+def _iter_price_arrays(qs):
+    n = qs.count()
+    closes = np.empty(n, dtype=float)
+    stamps = np.empty(n, dtype=np.int64)
+    rows = qs.order_by("timestamp").values_list("close", "timestamp").iterator(chunk_size=_CHUNK)
+    i = 0
+    for close, ts in rows:
+        if i == closes.size:
+            # filas insertadas entre el COUNT y la lectura
+            closes = np.resize(closes, max(1, 2 * i))
+            stamps = np.resize(stamps, max(1, 2 * i))
+        closes[i] = close
+        stamps[i] = to_epoch_us(ts)
+        i += 1
+    return closes[:i], stamps[:i]
+
+
+# formato binario de COPY: cabecera fija de 19 bytes (firma, flags, longitud
+# de la extensión), y por fila nº de campos (int16) más longitud (int32) y
+# valor de cada campo; termina con un int16 = -1
+_COPY_HEADER = 19
+_COPY_TRAILER = 2
+_COPY_ROW = np.dtype([("fields", ">i2"),
+                      ("close_len", ">i4"), ("close", ">f8"),
+                      ("ts_len", ">i4"), ("ts", ">i8")])
+
+
+class _CopyBuffer:
+    """Destino de `copy_expert`: escribe en un bytearray reservado."""
+
+    def __init__(self, size: int):
+        self.data = bytearray(size)
+        self.pos = 0
+
+    def write(self, chunk):
+        end = self.pos + len(chunk)
+        if end > len(self.data):
+            self.data.extend(bytes(max(end, 2 * len(self.data)) - len(self.data)))
+        self.data[self.pos:end] = chunk
+        self.pos = end
+        return len(chunk)
+
+
+def _copy_price_arrays(qs):
+    table = connection.ops.quote_name(HistoricalPrice._meta.db_table)
+    close_col = connection.ops.quote_name("close")
+    ts_col = connection.ops.quote_name("timestamp")
+    where, params = qs.query.get_compiler(using=qs.db).compile(qs.query.where)
+
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT COUNT(*) FROM {table} WHERE {where}", params)
+        n = cursor.fetchone()[0]
+        sql = cursor.mogrify(
+            f"COPY (SELECT {close_col}::float8,"
+            f" (EXTRACT(EPOCH FROM {ts_col}) * 1000000)::int8"
+            f" FROM {table} WHERE {where} ORDER BY {ts_col})"
+            f" TO STDOUT WITH (FORMAT binary)", params)
+        buf = _CopyBuffer(_COPY_HEADER + n * _COPY_ROW.itemsize + _COPY_TRAILER)
+        cursor.copy_expert(sql, buf)
+
+    return _parse_copy_binary(buf.data, buf.pos)
+
+
+def _parse_copy_binary(data, size: int):
+    """(closes, timestamps) desde los `size` primeros bytes de un COPY binario."""
+    rows = (size - _COPY_HEADER - _COPY_TRAILER) // _COPY_ROW.itemsize
+    parsed = np.frombuffer(data, dtype=_COPY_ROW, count=rows, offset=_COPY_HEADER)
+    return (np.ascontiguousarray(parsed["close"], dtype="<f8"),
+            np.ascontiguousarray(parsed["ts"], dtype="<i8"))
+
+
+def cached_price_arrays(symbol: str):
+    """
+    Serie completa de `symbol` desde la caché memmap, validada contra la base:
+    si la primera vela no coincide (o la caché no existe) se reconstruye, y
+    si a la caché le faltan las últimas velas se le añaden.
+    """
+    bounds = HistoricalPrice.objects.filter(symbol=symbol).aggregate(
+        first=Min("timestamp"), last=Max("timestamp"))
+    if bounds["first"] is None:
+        return np.empty(0), np.empty(0, dtype=np.int64)
+    first, last = to_epoch_us(bounds["first"]), to_epoch_us(bounds["last"])
+
+    cached = price_cache.read(symbol)
+    if cached is None or not cached[1].size or cached[1][0] != first or cached[1][-1] > last:
+        rebuild_price_cache(symbol)
+    elif cached[1][-1] < last:
+        closes, stamps = db_price_arrays(symbol, after=from_epoch_us(cached[1][-1]))
+        price_cache.append(symbol, closes, stamps)
+    else:
+        return cached
+    return price_cache.read(symbol)
+
+
+def rebuild_price_cache(symbol: str) -> int:
+    """Reescribe la caché de `symbol` desde la base; devuelve el nº de velas."""
+    closes, stamps = db_price_arrays(symbol)
+    price_cache.write(symbol, closes, stamps)
+    return int(stamps.size)
+
+
+def sync_price_cache(symbol: str, inserted_us: np.ndarray):
+    """
+    Actualiza la caché tras insertar velas con timestamps `inserted_us`.
+    Las posteriores a la caché se añaden leyendo solo esas filas de la base;
+    si alguna cae en medio de la serie cacheada (backfill, reparación de
+    huecos) y no estaba, la caché se invalida.
+    """
+    if not price_cache.enabled() or not len(inserted_us):
+        return
+    cached = price_cache.read(symbol)
+    if cached is None or not cached[1].size:
+        return  # se construirá en la próxima lectura
+    stamps = cached[1]
+    inserted_us = np.asarray(inserted_us, dtype=np.int64)
+    old = inserted_us[inserted_us <= stamps[-1]]
+    if old.size:
+        pos = np.clip(np.searchsorted(stamps, old), 0, stamps.size - 1)
+        if not np.array_equal(stamps[pos], old):
+            price_cache.invalidate(symbol)
+            return
+    closes, new_stamps = db_price_arrays(symbol, after=from_epoch_us(stamps[-1]))
+    price_cache.append(symbol, closes, new_stamps)
+
+
+def load_signal_arrays(symbol: str, start=None, end=None):
+    """(timestamps int64 µs, es_buy bool, precio float64) de TradingSignal ordenadas."""
+    qs = TradingSignal.objects.filter(symbol=symbol)
+    if start is not None:
+        qs = qs.filter(timestamp__gte=start)
+    if end is not None:
+        qs = qs.filter(timestamp__lte=end)
+    rows = list(qs.order_by("timestamp").values_list("timestamp", "signal_type", "price"))
+
+    stamps = np.array([to_epoch_us(ts) for ts, _, _ in rows], dtype=np.int64)
+    is_buy = np.array([kind == TradingSignal.BUY for _, kind, _ in rows], dtype=bool)
+    prices = np.array([price for _, _, price in rows], dtype=float)
+    return stamps, is_buy, prices
@@ -1,13 +1,128 @@
-from dashboard.models import SimulatedTrade
+from django.db import transaction
+
+from dashboard.models import Position, SimulatedTrade
 from decimal import Decimal
 
+
+def match_fifo(lots, qty, price):
+    """
+    Consume `qty` de los lotes abiertos `lots` (BUY con remaining_qty, en
+    orden FIFO) a precio `price`. Descuenta remaining_qty en los lotes y
+    devuelve (PnL realizado, lotes modificados); el PnL es None si no había
+    nada que vender. La parte de una venta sin lotes no genera PnL.
+    """
+    pnl = Decimal("0")
+    matched = Decimal("0")
+    touched = []
+    for lot in lots:
+        if qty <= 0:
+            break
+        take = min(lot.remaining_qty, qty)
+        if take <= 0:
+            continue
+        lot.remaining_qty -= take
+        qty -= take
+        matched += take
+        pnl += (price - lot.price) * take
+        touched.append(lot)
+    return (pnl if matched > 0 else None), touched
+
+
+def open_lots_summary(lots):
+    """(cantidad abierta, precio medio de entrada) de los lotes abiertos."""
+    qty = sum((lot.remaining_qty for lot in lots), Decimal("0"))
+    if qty <= 0:
+        return Decimal("0"), Decimal("0")
+    cost = sum((lot.remaining_qty * lot.price for lot in lots), Decimal("0"))
+    return qty, cost / qty
+
+
+def record_simulated_trade(symbol, side, qty, price, total):
+    """
+    Guarda el SimulatedTrade y actualiza la Position del símbolo en la misma
+    transacción; la fila de la posición se bloquea para que dos órdenes
+    simultáneas no pisen la cantidad. Las ventas se emparejan FIFO con las
+    compras abiertas y guardan su PnL realizado.
+    """
+    with transaction.atomic():
+        Position.objects.get_or_create(symbol=symbol)
+        position = Position.objects.select_for_update().get(symbol=symbol)
+        lots = list(SimulatedTrade.objects.select_for_update()
+                    .filter(symbol=symbol, side=SimulatedTrade.BUY, remaining_qty__gt=0)
+                    .order_by("ts", "id"))
+
+        if side == SimulatedTrade.BUY:
+            trade = SimulatedTrade.objects.create(
+                symbol=symbol, side=side, qty=qty, price=price, total=total,
+                remaining_qty=qty)
+            lots.append(trade)
+            position.open_lot = trade
+        else:
+            pnl, touched = match_fifo(lots, qty, price)
+            SimulatedTrade.objects.bulk_update(touched, ["remaining_qty"])
+            trade = SimulatedTrade.objects.create(
+                symbol=symbol, side=side, qty=qty, price=price, total=total,
+                realized_pnl=pnl)
+
+        position.qty, position.avg_price = open_lots_summary(lots)
+        if position.qty == 0:
+            position.open_lot = None
+        position.save()
+    return trade
+
+
+def replay_trades(trades):
+    """
+    Reproduce `trades` (de un símbolo, en orden) fijando remaining_qty y
+    realized_pnl de cada uno. Devuelve (lotes abiertos, última compra). Solo
+    usa los campos, así que sirve también con los modelos de las migraciones.
+    """
+    lots, last_buy = [], None
+    for trade in trades:
+        if trade.side == SimulatedTrade.BUY:
+            trade.remaining_qty, trade.realized_pnl = trade.qty, None
+            lots.append(trade)
+            last_buy = trade
+        else:
+            trade.remaining_qty = Decimal("0")
+            trade.realized_pnl, _ = match_fifo(lots, trade.qty, trade.price)
+            lots = [lot for lot in lots if lot.remaining_qty > 0]
+    return lots, last_buy
+
+
+def recompute_trades(symbol):
+    """
+    Recalcula remaining_qty/realized_pnl de todos los trades de `symbol`
+    reproduciéndolos en orden, y reconstruye su Position. Devuelve el nº de
+    trades actualizados.
+    """
+    with transaction.atomic():
+        Position.objects.get_or_create(symbol=symbol)
+        position = Position.objects.select_for_update().get(symbol=symbol)
+        trades = list(SimulatedTrade.objects.filter(symbol=symbol).order_by("ts", "id"))
+
+        lots, last_buy = replay_trades(trades)
+        SimulatedTrade.objects.bulk_update(trades, ["remaining_qty", "realized_pnl"],
+                                           batch_size=1000)
+
+        position.qty, position.avg_price = open_lots_summary(lots)
+        position.open_lot = last_buy if position.qty > 0 else None
+        position.save()
+    return len(trades)
+
+
+def get_position(symbol):
+    return Position.objects.select_related("open_lot").filter(symbol=symbol).first()
+
+
 def get_last_buy(symbol):
-    return SimulatedTrade.objects.filter(symbol=symbol, side="BUY").order_by("-ts").first()
+    """Última compra de la posición abierta (None si no hay posición)."""
+    position = get_position(symbol)
+    return position.open_lot if position is not None else None
+
 
 def is_holding(symbol):
     """
-    Devuelve True si existe una BUY sin su SELL correspondiente.
+    Devuelve True si hay cantidad abierta en la Position del símbolo.
     """
-    buys = SimulatedTrade.objects.filter(symbol=symbol, side="BUY").count()
-    sells = SimulatedTrade.objects.filter(symbol=symbol, side="SELL").count()
-    return buys > sells
+    return Position.objects.filter(symbol=symbol, qty__gt=0).exists()
@@ -0,0 +1,230 @@
+# realtime/async_listener.py
+"""
+Listener de mercado sobre asyncio.
+
+Una sola conexión de combined streams (/stream?streams=a@ticker/b@ticker)
+para todos los símbolos. El receptor solo decodifica y encola; el escritor
+vacía la cola cada `flush_interval` segundos con un pipeline de redis.asyncio
+(MSET + hash `ws:stats`).
+
+Entre ambos hay una `ConflatingQueue` acotada: guarda el último tick de cada
+símbolo, así que si Redis va lento los ticks intermedios se descartan en vez
+de acumularse. Al reconectar (con espera exponencial y jitter) la URL se
+construye de nuevo a partir del conjunto de símbolos, que también recibe
+los añadidos con `subscribe` mientras la conexión estaba caída.
+
+Con `stream_maxlen` cada tick (sin agrupar) se añade además a su Redis
+Stream en el mismo pipeline (ver `realtime.tick_stream`).
+"""
+import asyncio
+import collections
+import json
+import logging
+import random
+import time
+
+import websockets
+from websockets.asyncio.client import connect
+
+from realtime.tick_buffer import STATS_KEY, write_latest
+from realtime.tick_stream import kline_tick, xadd_ticks
+
+logger = logging.getLogger(__name__)
+
+
+class ConflatingQueue:
+    """
+    Cola acotada de `maxsize` símbolos con el último tick de cada uno.
+    Un tick de un símbolo ya pendiente reemplaza al anterior (conflated);
+    con la cola llena, los ticks de símbolos nuevos se descartan (dropped).
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._pending = {}
+        self._ready = asyncio.Event()
+        self.conflated = 0
+        self.dropped = 0
+
+    def __len__(self):
+        return len(self._pending)
+
+    def put(self, symbol: str, msg: dict) -> bool:
+        if symbol in self._pending:
+            self.conflated += 1
+        elif len(self._pending) >= self.maxsize:
+            self.dropped += 1
+            return False
+        self._pending[symbol] = msg
+        self._ready.set()
+        return True
+
+    async def get_batch(self) -> dict:
+        """Espera a que haya algo pendiente y devuelve todo {symbol: tick}."""
+        await self._ready.wait()
+        return self.drain()
+
+    def drain(self) -> dict:
+        batch, self._pending = self._pending, {}
+        self._ready.clear()
+        return batch
+
+
+def backoff_delay(attempt: int, base: float = 0.5, cap: float = 30.0) -> float:
+    """Espera antes del reintento `attempt` (0, 1, ...): full jitter exponencial."""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+def stream_url(base_url: str, symbols, stream: str = "ticker") -> str:
+    streams = "/".join(f"{s.lower()}@{stream}" for s in sorted(symbols))
+    return f"{base_url.rstrip('/')}/stream?streams={streams}"
+
+
+class MarketDataListener:
+    def __init__(self, symbols, redis_client, base_url: str,
+                 queue_size: int = 1000, flush_interval: float = 0.25,
+                 stream: str = "ticker", stream_maxlen: int = None, stream_shards: int = 0,
+                 log_size: int = 100_000):
+        self.symbols = {s.upper() for s in symbols}
+        self.redis = redis_client
+        self.base_url = base_url
+        self.stream = stream
+        self.flush_interval = flush_interval
+        self.queue = ConflatingQueue(queue_size)
+        # ticks pendientes de XADD; si Redis no da abasto se pierden los más antiguos
+        self.stream_maxlen = stream_maxlen
+        self.stream_shards = stream_shards
+        self._log = collections.deque(maxlen=log_size)
+        self.log_dropped = 0
+
+        self._ws = None
+        self._request_id = 0
+        self.ticks = 0
+        self.invalid = 0
+        self.flushes = 0
+        self.reconnects = 0
+        self.last_flush_ms = 0.0
+        self.max_flush_ms = 0.0
+
+    async def subscribe(self, *symbols):
+        """Añade símbolos; si hay conexión se suscriben sin reconectar."""
+        new = {s.upper() for s in symbols} - self.symbols
+        self.symbols |= new
+        if new and self._ws is not None:
+            self._request_id += 1
+            await self._ws.send(json.dumps({
+                "method": "SUBSCRIBE",
+                "params": [f"{s.lower()}@{self.stream}" for s in sorted(new)],
+                "id": self._request_id,
+            }))
+
+    async def run(self, stop: asyncio.Event = None):
+        """Recibe y escribe hasta que se active `stop` (o para siempre)."""
+        stop = stop or asyncio.Event()
+        tasks = [asyncio.create_task(self._receive(stop)), asyncio.create_task(self._persist(stop))]
+        try:
+            await stop.wait()
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            await self.flush()
+
+    async def _receive(self, stop: asyncio.Event):
+        attempt = 0
+        while not stop.is_set():
+            try:
+                async with connect(stream_url(self.base_url, self.symbols, self.stream)) as ws:
+                    self._ws = ws
+                    attempt = 0
+                    logger.info("[WS] Conectado a %d streams", len(self.symbols))
+                    async for raw in ws:
+                        try:
+                            self.on_message(raw)
+                        except Exception:
+                            # un frame corrupto no debe tumbar la conexión
+                            self.invalid += 1
+                            logger.warning("[WS] Mensaje inválido descartado: %.200r", raw,
+                                           exc_info=True)
+            except (OSError, websockets.ConnectionClosed, websockets.InvalidHandshake) as e:
+                logger.warning("[WS] Conexión perdida: %s", e)
+            except Exception:
+                logger.exception("[WS] Error inesperado en la conexión")
+            finally:
+                self._ws = None
+            if stop.is_set():
+                break
+            self.reconnects += 1
+            delay = backoff_delay(attempt)
+            attempt += 1
+            logger.info("[WS] Reconectando en %.2f s", delay)
+            await asyncio.sleep(delay)
+
+    def on_message(self, raw):
+        """Decodifica un mensaje del combined stream y lo encola."""
+        data = json.loads(raw)
+        msg = data.get("data", data)
+        if isinstance(msg, dict) and "k" in msg:
+            msg = kline_tick(msg)
+        symbol = msg.get("s") if isinstance(msg, dict) else None
+        if not symbol or not msg.get("c"):
+            # respuestas a SUBSCRIBE y mensajes sin precio
+            self.invalid += 1
+            return
+        self.ticks += 1
+        self.queue.put(symbol, msg)
+        if self.stream_maxlen:
+            if len(self._log) == self._log.maxlen:
+                self.log_dropped += 1
+            self._log.append(msg)
+
+    async def _persist(self, stop: asyncio.Event, report_every: float = 60.0):
+        loop = asyncio.get_running_loop()
+        next_report, reported_ticks = loop.time() + report_every, 0
+        while not stop.is_set():
+            try:
+                await self.flush(await self.queue.get_batch())
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("[WS] Error al escribir ticks en Redis")
+            if loop.time() >= next_report:
+                logger.info("[WS] %.1f ticks/s, último flush %.2f ms (máx %.2f ms), %d descartados",
+                            (self.ticks - reported_ticks) / report_every, self.last_flush_ms,
+                            self.max_flush_ms, self.queue.dropped)
+                next_report, reported_ticks = next_report + report_every, self.ticks
+            await asyncio.sleep(self.flush_interval)
+
+    async def flush(self, batch: dict = None) -> int:
+        """Escribe `batch` (o lo pendiente en la cola) en un solo round trip."""
+        if batch is None:
+            batch = self.queue.drain()
+        if not batch:
+            return 0
+        log = list(self._log)
+        self._log.clear()
+        started = time.perf_counter()
+        pipe = self.redis.pipeline(transaction=False)
+        write_latest(pipe, batch)
+        if log:
+            xadd_ticks(pipe, log, self.stream_maxlen, self.stream_shards)
+        pipe.hset(STATS_KEY, mapping=self.stats())
+        await pipe.execute()
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self.flushes += 1
+        self.last_flush_ms = elapsed_ms
+        self.max_flush_ms = max(self.max_flush_ms, elapsed_ms)
+        return len(batch)
+
+    def stats(self) -> dict:
+        return {
+            "ticks": self.ticks,
+            "invalid": self.invalid,
+            "conflated": self.queue.conflated,
+            "dropped": self.queue.dropped,
+            "log_dropped": self.log_dropped,
+            "flushes": self.flushes,
+            "reconnects": self.reconnects,
+            "last_flush_ms": round(self.last_flush_ms, 3),
+            "max_flush_ms": round(self.max_flush_ms, 3),
+        }
@@ -0,0 +1,146 @@
+# realtime/candle_worker.py
+"""
+Worker de velas: consume los streams de ticks (consumer group "candles"),
+construye velas de 1 minuto con `CandleBuilder` y guarda las cerradas en
+HistoricalPrice con un bulk insert por símbolo, normalmente menos de un
+segundo después del cierre del minuto.
+
+La API REST solo se usa para reparar huecos: si entre dos velas cerradas
+faltan minutos (o es la primera vela del símbolo desde que arrancó el
+worker) se llama a `load_recent_prices` antes de insertar, que descarga lo
+que falta desde la última vela guardada.
+
+Las velas de un símbolo deben salir de un solo proceso: para repartir la
+carga, cada worker recibe sus símbolos con CANDLE_SYMBOLS (con
+TICK_STREAM_SHARDS, shards completos: se procesa todo lo que traiga el stream).
+
+Un tick solo se confirma (XACK) cuando su vela ya está en la base: los de
+la vela abierta y los de velas cuyo insert falló siguen pendientes, así que
+si el proceso cae se re-entregan al arrancar y la vela se reconstruye. Un
+error en una iteración se registra y se reintenta con espera exponencial;
+las velas cerradas que no se pudieron guardar vuelven al builder.
+
+    python realtime/candle_worker.py
+"""
+import logging
+import os
+import socket
+import time
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'trader.settings')
+django.setup()
+
+import redis
+from django.conf import settings
+
+from dashboard.tasks import load_recent_prices
+from dashboard.utils.ingestion import bulk_insert_candles
+from realtime.candles import MINUTE_MS, CandleBuilder
+from realtime.tick_stream import TickConsumer, stream_keys
+
+logger = logging.getLogger(__name__)
+
+GROUP = "candles"
+SYMBOLS = os.getenv("CANDLE_SYMBOLS", ",".join(settings.WATCHED_SYMBOLS)).split(",")
+TICK_STREAM_SHARDS = int(os.getenv("TICK_STREAM_SHARDS", "0"))
+# las entradas de la vela abierta quedan pendientes hasta ~1 min: con un
+# min_idle mayor, XAUTOCLAIM no las re-entrega mientras se esperan
+CLAIM_IDLE_MS = 5 * MINUTE_MS
+RETRY_CAP = 30.0
+
+
+def apply_entries(builder: CandleBuilder, entries) -> dict:
+    """
+    Pasa al builder las entradas [(key, id, fields)] leídas del stream.
+    Devuelve {(key, id): (symbol, minuto)}; None en las entradas corruptas,
+    que se descartan.
+    """
+    applied = {}
+    for key, entry_id, fields in entries:
+        try:
+            open_ms = int(fields["t"]) if "t" in fields else None
+            event_ms = int(fields["E"])
+            builder.add_tick(fields["s"], float(fields["c"]), event_ms,
+                             open_ms=open_ms, final=fields.get("x") == "1")
+        except (KeyError, ValueError) as e:
+            logger.warning("[candles] Tick %s de %s descartado (%s): %s", entry_id, key, e, fields)
+            applied[(key, entry_id)] = None
+            continue
+        minute = (open_ms if open_ms is not None else event_ms) // MINUTE_MS
+        applied[(key, entry_id)] = (fields["s"], minute)
+    return applied
+
+
+def settled(held: dict, builder: CandleBuilder):
+    """
+    Saca de `held` y devuelve como [(key, id, None)] las entradas que ya no
+    pertenecen a una vela abierta; se llama tras guardar las cerradas.
+    """
+    open_minutes = {symbol: minute for symbol, (minute, _) in builder.open_candles().items()}
+    done = [k for k, tick in held.items() if tick is None or open_minutes.get(tick[0]) != tick[1]]
+    for k in done:
+        del held[k]
+    return [(key, entry_id, None) for key, entry_id in done]
+
+
+def persist(builder: CandleBuilder) -> int:
+    """
+    Guarda las velas cerradas del builder; antes repara por REST los
+    símbolos con huecos. Devuelve el nº de velas enviadas a la base.
+    Si un insert falla, las velas aún no guardadas vuelven al builder y se
+    propaga la excepción.
+    """
+    by_symbol, gaps = builder.drain()
+    for symbol in gaps:
+        try:
+            load_recent_prices(symbol)
+        except Exception:
+            logger.exception("[candles] No se pudo reparar el hueco de %s", symbol)
+
+    total = 0
+    pending = dict(by_symbol)
+    try:
+        for symbol, candles in by_symbol.items():
+            total += bulk_insert_candles(symbol, candles)
+            del pending[symbol]
+    except Exception:
+        builder.requeue(pending, set())
+        raise
+    return total
+
+
+def run(client, symbols, consumer_name: str, stop=None):
+    builder = CandleBuilder()
+    consumer = TickConsumer(client, GROUP, consumer_name,
+                            stream_keys(symbols, TICK_STREAM_SHARDS), block_ms=500,
+                            min_idle_ms=CLAIM_IDLE_MS)
+    logger.info("[candles] %s consumiendo %d streams", consumer_name, len(consumer.keys))
+    held = {}   # entradas aplicadas cuya vela aún no está guardada
+    failures = 0
+    while stop is None or not stop.is_set():
+        try:
+            entries = [e for e in consumer.read() if e[:2] not in held]
+            held.update(apply_entries(builder, entries))
+            builder.close_due(int(time.time() * 1000))
+            persist(builder)
+            consumer.ack(settled(held, builder))
+            failures = 0
+        except Exception:
+            delay = min(RETRY_CAP, 0.5 * 2 ** failures)
+            failures += 1
+            logger.exception("[candles] Error en el ciclo (reintento en %.1f s)", delay)
+            if stop is not None:
+                stop.wait(delay)
+            else:
+                time.sleep(delay)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=os.getenv("LOG_LEVEL", "INFO").upper(),
+        format='[%(asctime)s] %(levelname)s in %(module)s: %(message)s'
+    )
+    run(redis.Redis(host="redis", port=6379, db=0), SYMBOLS,
+        os.getenv("CANDLE_CONSUMER", socket.gethostname()))
@@ -0,0 +1,95 @@
+# realtime/candles.py
+"""
+Construcción de velas de 1 minuto a partir de ticks en vivo.
+
+Cada símbolo tiene como mucho una vela abierta en memoria (minuto y último
+precio). La vela se cierra cuando llega un tick de un minuto posterior,
+cuando `close_due` ve que su minuto terminó hace más de `grace_ms` (símbolos
+sin actividad), o directamente con el evento final (x=1) del stream kline.
+
+Las velas cerradas usan la misma convención que la API REST: el timestamp
+es el close_time, minuto + 59.999 s, así que coinciden con las filas de
+`load_recent_prices` y los duplicados se ignoran al insertar.
+
+El módulo no depende de Django; `candle_worker` conecta el builder con los
+streams de ticks y la base de datos.
+"""
+MINUTE_MS = 60_000
+
+
+def close_time_s(minute: int) -> float:
+    """close_time (en s) de la vela que abre en `minute` (minutos desde epoch)."""
+    return ((minute + 1) * MINUTE_MS - 1) / 1000
+
+
+class CandleBuilder:
+    def __init__(self, grace_ms: int = 1000):
+        self.grace_ms = grace_ms
+        self._open = {}          # symbol -> [minute, close]
+        self._last_closed = {}   # symbol -> último minuto cerrado
+        self._closed = []        # [(symbol, close, close_time_s)]
+        self.gaps = set()        # símbolos con minutos sin vela
+        self.late = 0
+
+    def add_tick(self, symbol: str, price: float, event_ms: int,
+                 open_ms: int = None, final: bool = False):
+        """
+        Aplica un tick. `open_ms` (apertura de la vela, en el stream kline)
+        tiene prioridad sobre `event_ms` para decidir el minuto; `final`
+        cierra la vela en el acto.
+        """
+        minute = (open_ms if open_ms is not None else event_ms) // MINUTE_MS
+        last_closed = self._last_closed.get(symbol)
+        if last_closed is not None and minute <= last_closed:
+            self.late += 1
+            return
+
+        current = self._open.get(symbol)
+        if current is not None and minute < current[0]:
+            self.late += 1
+            return
+        if current is not None and minute > current[0]:
+            self._close(symbol)
+
+        self._open[symbol] = [minute, float(price)]
+        if final:
+            self._close(symbol)
+
+    def close_due(self, now_ms: int) -> int:
+        """Cierra las velas cuyo minuto terminó antes de now_ms - grace_ms."""
+        due = [symbol for symbol, (minute, _) in self._open.items()
+               if (minute + 1) * MINUTE_MS + self.grace_ms <= now_ms]
+        for symbol in due:
+            self._close(symbol)
+        return len(due)
+
+    def _close(self, symbol: str):
+        minute, close = self._open.pop(symbol)
+        last_closed = self._last_closed.get(symbol)
+        # el primer cierre de un símbolo también se revisa: no sabemos qué
+        # hay en la base desde la última ejecución
+        if last_closed is None or minute > last_closed + 1:
+            self.gaps.add(symbol)
+        self._last_closed[symbol] = minute
+        self._closed.append((symbol, close, close_time_s(minute)))
+
+    def drain(self):
+        """
+        Velas cerradas desde la última llamada, agrupadas por símbolo
+        {symbol: [(close, close_time_s), ...]}, y los símbolos con huecos.
+        """
+        closed, self._closed = self._closed, []
+        gaps, self.gaps = self.gaps, set()
+        by_symbol = {}
+        for symbol, close, ts in closed:
+            by_symbol.setdefault(symbol, []).append((close, ts))
+        return by_symbol, gaps
+
+    def requeue(self, by_symbol: dict, gaps):
+        """Devuelve a la cola velas de `drain` que no se pudieron guardar."""
+        self._closed = [(symbol, close, ts) for symbol, candles in by_symbol.items()
+                        for close, ts in candles] + self._closed
+        self.gaps |= set(gaps)
+
+    def open_candles(self) -> dict:
+        return {symbol: tuple(candle) for symbol, candle in self._open.items()}
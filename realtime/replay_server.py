@@ -0,0 +1,105 @@
+# realtime/replay_server.py
+"""
+Servidor websocket local que imita los combined streams de Binance
+reproduciendo ticks grabados, para probar el listener sin red.
+
+Los ticks son dicts de ticker (campos `s`, `c`, `E`, ...) o un fichero
+JSONL con uno por línea. Solo se envían los de los símbolos pedidos en
+?streams=..., envueltos como {"stream": "btcusdt@ticker", "data": {...}}.
+
+    python -m realtime.replay_server ticks.jsonl --port 8765 --rate 5000
+"""
+import argparse
+import asyncio
+import json
+from urllib.parse import parse_qs, urlparse
+
+from websockets.asyncio.server import serve
+
+
+def load_ticks(path: str):
+    with open(path) as fh:
+        return [json.loads(line) for line in fh if line.strip()]
+
+
+class ReplayServer:
+    """
+    rate: mensajes por segundo por conexión (None = sin pausa).
+    close_after: cierra cada conexión tras enviar ese nº de mensajes, para
+    probar reconexiones. loop: repite los ticks indefinidamente.
+    """
+
+    def __init__(self, ticks, rate: float = None, close_after: int = None, loop: bool = False):
+        self.ticks = list(ticks)
+        self.rate = rate
+        self.close_after = close_after
+        self.loop = loop
+        self.connections = []   # streams pedidos por cada conexión
+        self.sent = 0
+        self._server = None
+
+    @property
+    def url(self):
+        host, port = self._server.sockets[0].getsockname()[:2]
+        return f"ws://{host}:{port}"
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0):
+        self._server = await serve(self._handler, host, port)
+        return self
+
+    async def stop(self):
+        self._server.close()
+        await self._server.wait_closed()
+
+    async def _handler(self, ws):
+        query = parse_qs(urlparse(ws.request.path).query)
+        streams = query.get("streams", [""])[0].split("/")
+        self.connections.append(streams)
+        wanted = {s.split("@")[0].upper(): s for s in streams if s}
+        subscriber = asyncio.create_task(self._subscriptions(ws, wanted))
+
+        delay = 1 / self.rate if self.rate else 0
+        sent = 0
+        try:
+            while True:
+                for tick in self.ticks:
+                    stream = wanted.get(tick["s"])
+                    if stream is None:
+                        continue
+                    await ws.send(json.dumps({"stream": stream, "data": tick}))
+                    sent += 1
+                    self.sent += 1
+                    if self.close_after and sent >= self.close_after:
+                        return
+                    await asyncio.sleep(delay)
+                if not self.loop:
+                    await ws.wait_closed()
+                    return
+        finally:
+            subscriber.cancel()
+
+    async def _subscriptions(self, ws, wanted: dict):
+        """Atiende SUBSCRIBE como Binance: añade streams y responde {result, id}."""
+        async for raw in ws:
+            request = json.loads(raw)
+            if request.get("method") == "SUBSCRIBE":
+                for stream in request.get("params", []):
+                    wanted[stream.split("@")[0].upper()] = stream
+                await ws.send(json.dumps({"result": None, "id": request.get("id")}))
+
+
+async def _main(args):
+    server = await ReplayServer(load_ticks(args.ticks), rate=args.rate, loop=args.loop).start(
+        args.host, args.port)
+    print(f"Reproduciendo {len(server.ticks)} ticks en {server.url}")
+    await asyncio.Future()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("ticks", help="fichero JSONL con un tick por línea")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--rate", type=float, default=None, help="mensajes/s por conexión")
+    parser.add_argument("--loop", action="store_true", help="repetir los ticks indefinidamente")
+    asyncio.run(_main(parser.parse_args()))
@@ -0,0 +1,135 @@
+import asyncio
+import json
+
+from websockets.asyncio.server import serve
+
+from realtime.async_listener import ConflatingQueue, MarketDataListener, stream_url
+from realtime.replay_server import ReplayServer
+
+
+class FakePipeline:
+    def __init__(self, client):
+        self.client = client
+        self.ops = []
+
+    def mset(self, mapping):
+        self.ops.append(mapping)
+
+    def hset(self, key, mapping):
+        self.ops.append({key: mapping})
+
+    async def execute(self):
+        for mapping in self.ops:
+            self.client.data.update(mapping)
+        self.client.writes += 1
+
+
+class FakeAsyncRedis:
+    def __init__(self):
+        self.data = {}
+        self.writes = 0
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+
+def make_ticks(symbols, n):
+    return [{"e": "24hrTicker", "s": s, "c": f"{i}.5", "E": i}
+            for i in range(n) for s in symbols]
+
+
+async def wait_for(condition, timeout=5.0):
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while not condition():
+        assert loop.time() < deadline, "timeout"
+        await asyncio.sleep(0.01)
+
+
+def test_conflating_queue():
+    async def scenario():
+        queue = ConflatingQueue(2)
+        queue.put("A", 1)
+        queue.put("A", 2)
+        queue.put("B", 3)
+        assert queue.put("C", 4) is False
+        assert (queue.conflated, queue.dropped) == (1, 1)
+        assert await queue.get_batch() == {"A": 2, "B": 3}
+        assert len(queue) == 0
+
+    asyncio.run(scenario())
+
+
+def test_stream_url():
+    assert (stream_url("wss://x/", ["ETHUSDT", "BTCUSDT"])
+            == "wss://x/stream?streams=btcusdt@ticker/ethusdt@ticker")
+
+
+def test_replay_guarda_el_ultimo_precio_por_simbolo():
+    async def scenario():
+        server = await ReplayServer(make_ticks(["BTCUSDT", "ETHUSDT", "XRPUSDT"], 200)).start()
+        redis = FakeAsyncRedis()
+        listener = MarketDataListener(["BTCUSDT", "ETHUSDT"], redis, server.url, flush_interval=0.01)
+        stop = asyncio.Event()
+        task = asyncio.create_task(listener.run(stop))
+        await wait_for(lambda: listener.ticks == 400)
+        stop.set()
+        await task
+        await server.stop()
+        return redis, listener
+
+    redis, listener = asyncio.run(scenario())
+    assert redis.data["price:BTCUSDT"] == "199.5"
+    assert redis.data["price:ETHUSDT"] == "199.5"
+    assert redis.data["px:BTCUSDT"] == {"p": "199.5", "E": 199}
+    assert "price:XRPUSDT" not in redis.data
+    # menos escrituras que ticks: la cola agrupa por símbolo
+    assert redis.writes < listener.ticks
+
+
+def test_reconecta_y_conserva_suscripciones():
+    async def scenario():
+        server = await ReplayServer(make_ticks(["BTCUSDT", "ETHUSDT"], 50), close_after=10).start()
+        listener = MarketDataListener(["BTCUSDT"], FakeAsyncRedis(), server.url, flush_interval=0.01)
+        stop = asyncio.Event()
+        task = asyncio.create_task(listener.run(stop))
+        await wait_for(lambda: listener.ticks >= 1)
+        await listener.subscribe("ethusdt")
+        await wait_for(lambda: len(server.connections) >= 2)
+        stop.set()
+        await task
+        await server.stop()
+        return server, listener
+
+    server, listener = asyncio.run(scenario())
+    assert server.connections[0] == ["btcusdt@ticker"]
+    assert server.connections[1] == ["btcusdt@ticker", "ethusdt@ticker"]
+    assert listener.reconnects >= 1
+
+
+def test_frame_invalido_no_detiene_el_listener():
+    frames = ["no es json", "[1, 2]", "3",
+              json.dumps({"stream": "btcusdt@ticker", "data": {"s": "BTCUSDT", "c": "1.5", "E": 1}})]
+
+    async def handler(ws):
+        for frame in frames:
+            await ws.send(frame)
+        await ws.wait_closed()
+
+    async def scenario():
+        async with serve(handler, "127.0.0.1", 0) as server:
+            host, port = server.sockets[0].getsockname()[:2]
+            redis = FakeAsyncRedis()
+            listener = MarketDataListener(["BTCUSDT"], redis, f"ws://{host}:{port}",
+                                          flush_interval=0.01)
+            stop = asyncio.Event()
+            task = asyncio.create_task(listener.run(stop))
+            await wait_for(lambda: listener.ticks == 1)
+            stop.set()
+            await task
+        return redis, listener
+
+    redis, listener = asyncio.run(scenario())
+    assert listener.invalid == 3
+    assert listener.reconnects == 0
+    assert redis.data["price:BTCUSDT"] == "1.5"
@@ -0,0 +1,54 @@
+from datetime import datetime, timezone
+from unittest import mock
+
+from django.test import TestCase
+
+from dashboard.models import HistoricalPrice
+from realtime import candle_worker
+from realtime.candles import MINUTE_MS, CandleBuilder
+
+T0 = 28_000_000 * MINUTE_MS
+
+
+class TestPersist(TestCase):
+    def test_guarda_velas_cerradas_y_repara_huecos_antes(self):
+        builder = CandleBuilder()
+        candle_worker.apply_entries(builder, [
+            ("ticks:BTCUSDT", "1-0", {"s": "BTCUSDT", "c": "100.5", "E": str(T0 + 10)}),
+            ("ticks:BTCUSDT", "2-0", {"s": "BTCUSDT", "c": "101.5", "E": str(T0 + MINUTE_MS + 10)}),
+        ])
+        calls = []
+        with mock.patch.object(candle_worker, "load_recent_prices",
+                               side_effect=lambda symbol: calls.append(
+                                   (symbol, HistoricalPrice.objects.count()))):
+            self.assertEqual(candle_worker.persist(builder), 1)
+
+        # la reparación REST va antes del insert, así parte de la última vela guardada
+        self.assertEqual(calls, [("BTCUSDT", 0)])
+        row = HistoricalPrice.objects.get(symbol="BTCUSDT")
+        self.assertEqual(float(row.close), 100.5)
+        self.assertEqual(row.timestamp,
+                         datetime.fromtimestamp((T0 + 59_999) / 1000, tz=timezone.utc))
+
+    def test_insert_fallido_devuelve_las_velas_y_no_confirma_los_ticks(self):
+        builder = CandleBuilder()
+        held = candle_worker.apply_entries(builder, [
+            ("ticks:BTCUSDT", "1-0", {"s": "BTCUSDT", "c": "100.5", "E": str(T0 + 10)}),
+            ("ticks:BTCUSDT", "2-0", {"s": "BTCUSDT", "c": "roto", "E": str(T0 + 20)}),
+            ("ticks:BTCUSDT", "3-0", {"s": "BTCUSDT", "c": "101.5", "E": str(T0 + MINUTE_MS + 10)}),
+        ])
+        self.assertIsNone(held[("ticks:BTCUSDT", "2-0")])
+
+        with mock.patch.object(candle_worker, "load_recent_prices"), \
+                mock.patch.object(candle_worker, "bulk_insert_candles",
+                                  side_effect=RuntimeError("db caída")):
+            with self.assertRaises(RuntimeError):
+                candle_worker.persist(builder)
+        self.assertFalse(HistoricalPrice.objects.exists())
+
+        with mock.patch.object(candle_worker, "load_recent_prices"):
+            self.assertEqual(candle_worker.persist(builder), 1)
+        # el tick corrupto y el de la vela guardada se confirman; el de la abierta no
+        self.assertEqual(candle_worker.settled(held, builder),
+                         [("ticks:BTCUSDT", "1-0", None), ("ticks:BTCUSDT", "2-0", None)])
+        self.assertEqual(list(held), [("ticks:BTCUSDT", "3-0")])
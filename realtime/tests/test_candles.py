@@ -0,0 +1,56 @@
+from realtime.candles import MINUTE_MS, CandleBuilder, close_time_s
+
+T0 = 28_000_000 * MINUTE_MS   # inicio de un minuto
+
+
+def test_cierra_al_llegar_el_minuto_siguiente():
+    b = CandleBuilder()
+    b.add_tick("BTCUSDT", 100, T0 + 1_000)
+    b.add_tick("BTCUSDT", 101, T0 + 59_000)
+    assert b.drain() == ({}, set())
+
+    b.add_tick("BTCUSDT", 102, T0 + MINUTE_MS + 500)
+    closed, gaps = b.drain()
+    assert closed == {"BTCUSDT": [(101.0, close_time_s(T0 // MINUTE_MS))]}
+    assert close_time_s(T0 // MINUTE_MS) == (T0 + 59_999) / 1000
+    # primera vela del símbolo: se revisa el hueco con la base
+    assert gaps == {"BTCUSDT"}
+
+
+def test_hueco_y_ticks_tardios():
+    b = CandleBuilder()
+    b.add_tick("BTCUSDT", 1, T0)
+    b.add_tick("BTCUSDT", 2, T0 + MINUTE_MS)
+    b.drain()
+    b.add_tick("BTCUSDT", 3, T0 + 4 * MINUTE_MS)    # faltan los minutos 2 y 3
+    b.add_tick("BTCUSDT", 9, T0 + 10)               # tardío: ya cerrado
+    closed, gaps = b.drain()
+    assert closed == {"BTCUSDT": [(2.0, close_time_s(T0 // MINUTE_MS + 1))]}
+    assert gaps == set()
+    assert b.late == 1
+
+    b.close_due(T0 + 5 * MINUTE_MS + 1_000)
+    closed, gaps = b.drain()
+    assert closed["BTCUSDT"][0][0] == 3.0 and gaps == {"BTCUSDT"}
+
+
+def test_kline_final_cierra_en_el_acto():
+    b = CandleBuilder()
+    b.add_tick("ETHUSDT", 10, T0 + 30_000, open_ms=T0)
+    b.add_tick("ETHUSDT", 11, T0 + MINUTE_MS + 5, open_ms=T0, final=True)
+    closed, _ = b.drain()
+    assert closed == {"ETHUSDT": [(11.0, close_time_s(T0 // MINUTE_MS))]}
+    assert b.open_candles() == {}
+
+
+def test_requeue_devuelve_las_velas_al_siguiente_drain():
+    b = CandleBuilder()
+    b.add_tick("BTCUSDT", 1, T0)
+    b.add_tick("BTCUSDT", 2, T0 + MINUTE_MS)
+    closed, gaps = b.drain()
+    b.requeue(closed, gaps)
+    b.add_tick("BTCUSDT", 3, T0 + 2 * MINUTE_MS)
+    again, again_gaps = b.drain()
+    assert again == {"BTCUSDT": [(1.0, close_time_s(T0 // MINUTE_MS)),
+                                 (2.0, close_time_s(T0 // MINUTE_MS + 1))]}
+    assert again_gaps == {"BTCUSDT"}
@@ -0,0 +1,112 @@
+import json
+
+from realtime.tick_buffer import STATS_KEY, TickBuffer
+
+
+class FakePipeline:
+    def __init__(self, client):
+        self.client = client
+        self.ops = []
+
+    def mset(self, mapping):
+        self.ops.append(("mset", dict(mapping)))
+
+    def hset(self, key, mapping):
+        self.ops.append(("hset", key, dict(mapping)))
+
+    def xadd(self, key, fields, maxlen=None, approximate=True):
+        self.ops.append(("xadd", key, dict(fields), maxlen))
+
+    def execute(self):
+        self.client.executed.append(self.ops)
+
+
+class FakeRedis:
+    def __init__(self):
+        self.executed = []
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+
+def test_coalesce_por_simbolo_y_un_round_trip_por_flush():
+    clock = {"now": 0.0}
+    client = FakeRedis()
+    buf = TickBuffer(client, interval=1.0, max_pending=10, clock=lambda: clock["now"])
+
+    buf.add({"s": "BTCUSDT", "c": "100"})
+    buf.add({"s": "BTCUSDT", "c": "101"})
+    buf.add({"s": "ETHUSDT", "c": "10"})
+    assert buf.add({"s": "ETHUSDT"}) is False
+    assert client.executed == []
+
+    clock["now"] = 1.0
+    buf.add({"s": "BTCUSDT", "c": "102"})
+
+    assert len(client.executed) == 1
+    ops = client.executed[0]
+    mapping = ops[0][1]
+    assert mapping["price:BTCUSDT"] == "102"
+    assert mapping["price:ETHUSDT"] == "10"
+    assert json.loads(mapping["ticker:BTCUSDT"])["c"] == "102"
+    hashes = {op[1]: op[2] for op in ops if op[0] == "hset"}
+    assert hashes["px:BTCUSDT"] == {"p": "102", "E": 0}
+    assert hashes[STATS_KEY]["ticks"] == 4 and hashes[STATS_KEY]["invalid"] == 1
+    assert buf.flushes == 1 and buf.keys_written == 6
+    assert buf.ticks_per_second() == 4.0
+
+
+def test_flush_por_tamano():
+    client = FakeRedis()
+    buf = TickBuffer(client, interval=60, max_pending=2, clock=lambda: 0.0)
+    buf.add({"s": "A", "c": "1"})
+    assert client.executed == []
+    buf.add({"s": "B", "c": "2"})
+    assert len(client.executed) == 1
+    assert buf.flush() == 0
+
+
+def test_stream_recibe_cada_tick_sin_agrupar():
+    client = FakeRedis()
+    buf = TickBuffer(client, interval=60, max_pending=10, clock=lambda: 0.0, stream_maxlen=1000)
+    for price in ("1", "2", "3"):
+        buf.add({"s": "BTCUSDT", "c": price, "E": int(price)})
+    buf.flush()
+
+    ops = client.executed[0]
+    assert ops[0][0] == "mset" and ops[0][1]["price:BTCUSDT"] == "3"
+    xadds = [op for op in ops if op[0] == "xadd"]
+    assert [op[2]["c"] for op in xadds] == ["1", "2", "3"]
+    assert {op[1] for op in xadds} == {"ticks:BTCUSDT"} and xadds[0][3] == 1000
+
+
+def test_flush_fallido_devuelve_el_lote_al_buffer():
+    import pytest
+
+    class FailingRedis(FakeRedis):
+        fail = True
+
+        def pipeline(self, transaction=True):
+            pipe = FakePipeline(self)
+            if self.fail:
+                def execute():
+                    raise ConnectionError("redis caído")
+                pipe.execute = execute
+            return pipe
+
+    client = FailingRedis()
+    buf = TickBuffer(client, interval=60, max_pending=10, clock=lambda: 0.0, stream_maxlen=1000)
+    buf.add({"s": "BTCUSDT", "c": "1"})
+    buf.add({"s": "ETHUSDT", "c": "10"})
+    with pytest.raises(ConnectionError):
+        buf.flush()
+
+    # llega un tick más nuevo antes del reintento: prevalece sobre el del lote
+    buf.add({"s": "BTCUSDT", "c": "2"})
+    client.fail = False
+    assert buf.flush() == 2
+
+    ops = client.executed[0]
+    assert ops[0][1]["price:BTCUSDT"] == "2" and ops[0][1]["price:ETHUSDT"] == "10"
+    assert [op[2]["c"] for op in ops if op[0] == "xadd"] == ["1", "10", "2"]
+    assert buf.flushes == 1
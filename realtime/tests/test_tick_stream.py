@@ -0,0 +1,118 @@
+import os
+import threading
+
+import pytest
+import redis
+
+from realtime.tick_stream import (TickConsumer, dead_letter_key, stream_key, stream_keys,
+                                  xadd_ticks)
+
+
+def test_stream_key_por_simbolo_y_por_shard():
+    assert stream_key("BTCUSDT") == "ticks:BTCUSDT"
+    shard = stream_key("BTCUSDT", shards=4)
+    assert shard.startswith("ticks:shard:") and 0 <= int(shard.rsplit(":", 1)[1]) < 4
+    assert stream_key("BTCUSDT", shards=4) == shard
+    assert len(stream_keys(["A", "B", "C", "D", "E"], shards=2)) <= 2
+
+
+@pytest.fixture
+def client():
+    """Redis real (REDIS_URL, por defecto la base 15 local); sin servidor se omite."""
+    r = redis.Redis.from_url(os.getenv("REDIS_URL", "redis://localhost:6379/15"))
+    try:
+        r.ping()
+    except redis.ConnectionError:
+        pytest.skip("Redis no disponible")
+    r.delete("ticks:TESTUSDT", "ticks:TESTUSDT:dead")
+    yield r
+    r.delete("ticks:TESTUSDT", "ticks:TESTUSDT:dead")
+
+
+def test_consumer_group_at_least_once(client):
+    key = stream_key("TESTUSDT")
+    first = TickConsumer(client, "candles", "c1", [key], block_ms=10, min_idle_ms=0)
+
+    pipe = client.pipeline()
+    xadd_ticks(pipe, [{"s": "TESTUSDT", "c": str(i), "E": i} for i in range(5)], maxlen=100)
+    pipe.execute()
+
+    entries = first.read()
+    assert [fields["c"] for _, _, fields in entries] == ["0", "1", "2", "3", "4"]
+
+    # c1 cae sin confirmar: otro consumidor del grupo reclama las pendientes
+    second = TickConsumer(client, "candles", "c2", [key], block_ms=10, min_idle_ms=0)
+    claimed = second.read()
+    assert [e[1] for e in claimed] == [e[1] for e in entries]
+    assert second.ack(claimed) == 5
+    assert second.read() == []
+
+
+def _add(client, prices):
+    pipe = client.pipeline()
+    xadd_ticks(pipe, [{"s": "TESTUSDT", "c": str(p), "E": p} for p in prices], maxlen=100)
+    pipe.execute()
+
+
+def _consume(client, handler, until):
+    """Ejecuta consumer.run(handler) hasta que se cumpla `until(procesados)`."""
+    consumer = TickConsumer(client, "signals", "c1", [stream_key("TESTUSDT")], block_ms=10,
+                            start_id="0", max_deliveries=3, retry_base=0, retry_cap=0)
+    stop = threading.Event()
+    done = []
+
+    def wrapped(entries):
+        handler(entries)
+        done.extend(fields["c"] for _, _, fields in entries)
+        if until(done):
+            stop.set()
+
+    thread = threading.Thread(target=consumer.run, args=(wrapped, stop))
+    thread.start()
+    thread.join(timeout=5)
+    stop.set()
+    assert not thread.is_alive()
+    return consumer, done
+
+
+def test_fallo_puntual_se_reintenta_antes_que_los_ticks_nuevos(client):
+    _add(client, [0, 1])
+    calls = []
+
+    def handler(entries):
+        calls.append([fields["c"] for _, _, fields in entries])
+        if len(calls) == 1:
+            _add(client, [2, 3])   # llegan ticks nuevos mientras falla el lote
+            raise RuntimeError("fallo puntual")
+
+    consumer, done = _consume(client, handler, lambda done: len(done) == 4)
+    assert calls[0] == ["0", "1"]
+    assert done == ["0", "1", "2", "3"]
+    assert consumer.dead_lettered == 0
+    assert client.xpending("ticks:TESTUSDT", "signals")["pending"] == 0
+
+
+def test_entrada_que_siempre_falla_va_a_la_cola_muerta(client):
+    _add(client, [0, 1, 2])
+
+    def handler(entries):
+        if any(fields["c"] == "1" for _, _, fields in entries):
+            raise RuntimeError("entrada corrupta")
+
+    consumer, done = _consume(client, handler, lambda done: "2" in done)
+    assert done == ["0", "2"]
+    assert consumer.dead_lettered == 1
+    dead = client.xrange(dead_letter_key("ticks:TESTUSDT"))
+    assert [fields[b"c"] for _, fields in dead] == [b"1"]
+    assert client.xpending("ticks:TESTUSDT", "signals")["pending"] == 0
+
+
+def test_xautoclaim_solo_cada_min_idle(client):
+    consumer = TickConsumer(client, "candles", "c1", [stream_key("TESTUSDT")], block_ms=1,
+                            min_idle_ms=60_000)
+    calls = []
+    claim = consumer.claim_stale
+    consumer.claim_stale = lambda: calls.append(1) or claim()
+    for _ in range(5):
+        assert consumer.read() == []
+    assert len(calls) == 1
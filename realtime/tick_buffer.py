@@ -0,0 +1,176 @@
+# realtime/tick_buffer.py
+"""
+Buffer de ticks para el listener de websocket.
+
+Cada tick solo reemplaza la entrada de su símbolo en un dict; `flush` escribe
+todas las pendientes con un único MSET (price:{symbol} y ticker:{symbol}) y
+el hash px:{symbol} en un pipeline junto con los contadores en `ws:stats`. Se vacía cuando
+hay `max_pending` símbolos pendientes o ha pasado `interval` segundos, así
+que Redis recibe un round trip por intervalo en vez de dos por tick.
+
+Con `stream_maxlen` cada tick se añade también a su Redis Stream en el mismo
+pipeline (ver `realtime.tick_stream`).
+
+Si el pipeline falla, lo que no se pudo escribir vuelve al buffer (sin
+pisar ticks más nuevos del mismo símbolo) y se reintenta en el siguiente
+flush; el log de ticks se acota a `log_size` descartando los más antiguos.
+"""
+import collections
+import json
+import logging
+import threading
+import time
+
+from realtime.tick_stream import xadd_ticks
+
+logger = logging.getLogger(__name__)
+
+STATS_KEY = "ws:stats"
+
+
+def tick_mapping(pending: dict) -> dict:
+    """{symbol: ticker} → claves price:{symbol} y ticker:{symbol} para MSET."""
+    mapping = {}
+    for symbol, msg in pending.items():
+        mapping[f"price:{symbol}"] = msg["c"]
+        mapping[f"ticker:{symbol}"] = json.dumps(msg)
+    return mapping
+
+
+def write_latest(pipe, pending: dict):
+    """
+    Encola en `pipe` el último valor de cada símbolo: MSET de las claves de
+    `tick_mapping` y el hash compacto px:{symbol} (p = precio, E = hora del
+    evento en ms) que lee `dashboard.utils.price_service`.
+    """
+    pipe.mset(tick_mapping(pending))
+    for symbol, msg in pending.items():
+        pipe.hset(f"px:{symbol}", mapping={"p": msg["c"], "E": msg.get("E", 0)})
+
+
+class TickBuffer:
+    def __init__(self, client, interval: float = 0.25, max_pending: int = 500,
+                 clock=time.monotonic, stream_maxlen: int = None, stream_shards: int = 0,
+                 log_size: int = 100_000):
+        self.client = client
+        self.stream_maxlen = stream_maxlen
+        self.stream_shards = stream_shards
+        self._log = collections.deque(maxlen=log_size)
+        self.interval = interval
+        self.max_pending = max_pending
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._last_flush = clock()
+
+        # contadores acumulados
+        self.ticks = 0
+        self.invalid = 0
+        self.log_dropped = 0
+        self.flushes = 0
+        self.keys_written = 0
+        self.last_flush_ms = 0.0
+        self.max_flush_ms = 0.0
+        # ventana para ticks/s
+        self._window_start = clock()
+        self._window_ticks = 0
+
+    def add(self, msg: dict) -> bool:
+        """
+        Registra un tick de ticker (campos `s` y `c`). Devuelve False si el
+        mensaje no trae precio. Puede vaciar el buffer si toca.
+        """
+        symbol = msg.get("s")
+        if not symbol or not msg.get("c"):
+            with self._lock:
+                self.invalid += 1
+            return False
+        with self._lock:
+            self._pending[symbol] = msg
+            if self.stream_maxlen:
+                if len(self._log) == self._log.maxlen:
+                    self.log_dropped += 1
+                self._log.append(msg)
+            self.ticks += 1
+            self._window_ticks += 1
+            due = (len(self._pending) >= self.max_pending
+                   or self._clock() - self._last_flush >= self.interval)
+        if due:
+            self.flush()
+        return True
+
+    def flush(self) -> int:
+        """Escribe los ticks pendientes; devuelve cuántos símbolos se escribieron."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            log, self._log = self._log, collections.deque(maxlen=self._log.maxlen)
+            self._last_flush = self._clock()
+        if not pending:
+            return 0
+
+        started = time.perf_counter()
+        try:
+            pipe = self.client.pipeline(transaction=False)
+            write_latest(pipe, pending)
+            if log:
+                xadd_ticks(pipe, log, self.stream_maxlen, self.stream_shards)
+            pipe.hset(STATS_KEY, mapping=self.stats())
+            pipe.execute()
+        except Exception:
+            self._restore(pending, log)
+            raise
+        elapsed_ms = (time.perf_counter() - started) * 1000
+
+        with self._lock:
+            self.flushes += 1
+            self.keys_written += 3 * len(pending)
+            self.last_flush_ms = elapsed_ms
+            self.max_flush_ms = max(self.max_flush_ms, elapsed_ms)
+        return len(pending)
+
+    def _restore(self, pending: dict, log):
+        """Devuelve al buffer un lote que no se pudo escribir."""
+        with self._lock:
+            # los ticks llegados durante el flush son más nuevos: prevalecen
+            self._pending = {**pending, **self._pending}
+            self.log_dropped += max(0, len(log) + len(self._log) - self._log.maxlen)
+            log.extend(self._log)
+            self._log = log
+
+    def ticks_per_second(self) -> float:
+        """Ticks por segundo desde la última llamada (reinicia la ventana)."""
+        now = self._clock()
+        with self._lock:
+            elapsed = now - self._window_start
+            rate = self._window_ticks / elapsed if elapsed > 0 else 0.0
+            self._window_start, self._window_ticks = now, 0
+        return rate
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "ticks": self.ticks,
+                "invalid": self.invalid,
+                "log_dropped": self.log_dropped,
+                "flushes": self.flushes,
+                "keys_written": self.keys_written,
+                "last_flush_ms": round(self.last_flush_ms, 3),
+                "max_flush_ms": round(self.max_flush_ms, 3),
+            }
+
+    def run_flusher(self, stop: threading.Event, report_every: float = 60.0):
+        """
+        Bucle para un hilo aparte: vacía el buffer cada `interval` aunque no
+        lleguen ticks y registra un resumen (INFO) cada `report_every` s.
+        """
+        next_report = self._clock() + report_every
+        while not stop.wait(self.interval):
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("[WS] Error al escribir ticks en Redis")
+            if self._clock() >= next_report:
+                next_report += report_every
+                logger.info("[WS] %.1f ticks/s, último flush %.2f ms (máx %.2f ms), %d inválidos",
+                            self.ticks_per_second(), self.last_flush_ms,
+                            self.max_flush_ms, self.invalid)
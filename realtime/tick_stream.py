@@ -0,0 +1,231 @@
+# realtime/tick_stream.py
+"""
+Log de ticks en Redis Streams.
+
+Además de las claves price:/ticker: (último valor), el listener añade cada
+tick a un stream acotado con XADD MAXLEN ~ (`ticks:{symbol}`, o
+`ticks:shard:{n}` si se reparten los símbolos en `shards` streams). Los
+consumidores (velas, señales, paper trading) leen con consumer groups:
+cada grupo recibe todos los ticks en orden y, dentro de un grupo, cada
+entrada va a un solo consumidor. Las entradas se confirman con XACK después
+de procesarlas; las que un consumidor caído dejó pendientes las reclama otro
+con XAUTOCLAIM (entrega at-least-once, el handler debe ser idempotente).
+
+Si el handler falla, el consumidor reintenta sus pendientes de una en una,
+en orden y con espera exponencial, antes de leer ticks nuevos. Las entradas
+que superan `max_deliveries` entregas se mueven al stream `{key}:dead` y se
+confirman, para que una entrada corrupta no bloquee el grupo.
+"""
+import logging
+import time
+import zlib
+
+import redis
+
+logger = logging.getLogger(__name__)
+
+STREAM_PREFIX = "ticks"
+DEAD_LETTER_MAXLEN = 10_000
+# campos que se guardan en el stream: símbolo, precio, hora del evento y,
+# en el stream kline, apertura de la vela y si es el evento final
+TICK_FIELDS = ("s", "c", "E", "t", "x")
+
+
+def kline_tick(msg: dict) -> dict:
+    """Evento del stream kline_1m → tick con los campos de TICK_FIELDS."""
+    k = msg["k"]
+    return {"s": msg["s"], "c": k["c"], "E": msg["E"], "t": k["t"], "x": int(k["x"])}
+
+
+def stream_key(symbol: str, shards: int = 0) -> str:
+    """Stream de `symbol`: uno por símbolo, o uno de `shards` por hash estable."""
+    if shards:
+        return f"{STREAM_PREFIX}:shard:{zlib.crc32(symbol.encode()) % shards}"
+    return f"{STREAM_PREFIX}:{symbol}"
+
+
+def stream_keys(symbols, shards: int = 0):
+    return sorted({stream_key(s, shards) for s in symbols})
+
+
+def dead_letter_key(key: str) -> str:
+    return f"{key}:dead"
+
+
+def xadd_ticks(pipe, ticks, maxlen: int, shards: int = 0):
+    """Encola en `pipe` un XADD por tick (en orden de llegada)."""
+    for msg in ticks:
+        fields = {k: msg[k] for k in TICK_FIELDS if k in msg}
+        pipe.xadd(stream_key(msg["s"], shards), fields, maxlen=maxlen, approximate=True)
+
+
+def _text(value):
+    return value.decode() if isinstance(value, bytes) else value
+
+
+def ensure_group(client, key: str, group: str, start_id: str = "$"):
+    """
+    Crea el consumer group (y el stream si no existe). `start_id`="$" solo
+    recibe ticks nuevos; "0" recorre también lo que quede en el stream.
+    """
+    try:
+        client.xgroup_create(key, group, id=start_id, mkstream=True)
+    except redis.ResponseError as e:
+        if "BUSYGROUP" not in str(e):
+            raise
+
+
+class TickConsumer:
+    """
+    Lector de un consumer group sobre uno o varios streams de ticks.
+
+        consumer = TickConsumer(r, "candles", "worker-1", stream_keys(symbols))
+        consumer.run(handler)   # handler(entries) con [(key, id, fields), ...]
+    """
+
+    def __init__(self, client, group: str, consumer: str, keys,
+                 count: int = 500, block_ms: int = 1000, min_idle_ms: int = 30000,
+                 start_id: str = "$", max_deliveries: int = 5,
+                 retry_base: float = 0.5, retry_cap: float = 30.0):
+        self.client = client
+        self.group = group
+        self.consumer = consumer
+        self.keys = list(keys)
+        self.count = count
+        self.block_ms = block_ms
+        self.min_idle_ms = min_idle_ms
+        self.max_deliveries = max_deliveries
+        self.retry_base = retry_base
+        self.retry_cap = retry_cap
+        # al arrancar se re-entregan primero las pendientes de este consumidor
+        self._recovering = True
+        # fallos seguidos del handler; mientras haya, las pendientes van de una en una
+        self.failures = 0
+        self.dead_lettered = 0
+        # XAUTOCLAIM solo cada min_idle_ms: antes no puede haber nada que reclamar
+        self._next_claim = 0.0
+        for key in self.keys:
+            ensure_group(client, key, group, start_id)
+
+    def claim_stale(self):
+        """
+        Entradas pendientes de otros consumidores inactivos > min_idle_ms, con
+        un XAUTOCLAIM por stream en un solo round trip.
+        """
+        pipe = self.client.pipeline(transaction=False)
+        for key in self.keys:
+            pipe.xautoclaim(key, self.group, self.consumer,
+                            self.min_idle_ms, "0-0", count=self.count)
+        entries = []
+        for key, reply in zip(self.keys, pipe.execute()):
+            entries += [(key, _text(entry_id), _decode(fields))
+                        for entry_id, fields in reply[1] if fields]
+        return entries
+
+    def read(self):
+        """
+        Entradas a procesar: primero las pendientes propias (tras reiniciar o
+        tras un fallo del handler), luego las abandonadas por otros
+        consumidores (comprobadas como mucho cada `min_idle_ms`) y, si no
+        hay, las nuevas. Las re-entregadas más de `max_deliveries` veces se
+        desvían a la cola muerta.
+        """
+        while self._recovering:
+            # después de un fallo, de una en una para aislar la entrada culpable
+            entries = self._read_group("0", block=None, count=1 if self.failures else self.count)
+            if not entries:
+                self._recovering = False
+                break
+            entries = self._drop_poisoned(entries)
+            if entries:
+                return entries
+        now = time.monotonic()
+        if now >= self._next_claim:
+            self._next_claim = now + self.min_idle_ms / 1000
+            entries = self._drop_poisoned(self.claim_stale())
+            if entries:
+                return entries
+        return self._read_group(">", block=self.block_ms)
+
+    def failed(self) -> float:
+        """
+        Registra un fallo del handler: las entradas siguen pendientes y se
+        reintentan antes que las nuevas. Devuelve la espera recomendada (s).
+        """
+        self._recovering = True
+        self.failures += 1
+        return min(self.retry_cap, self.retry_base * 2 ** (self.failures - 1))
+
+    def _drop_poisoned(self, entries):
+        """Mueve a `{key}:dead` (y confirma) las entradas con demasiadas entregas."""
+        if not entries:
+            return entries
+        delivered = {}
+        for key in {key for key, _, _ in entries}:
+            ids = [entry_id for k, entry_id, _ in entries if k == key]
+            for info in self.client.xpending_range(key, self.group, min=ids[0], max=ids[-1],
+                                                   count=len(ids), consumername=self.consumer):
+                delivered[(key, _text(info["message_id"]))] = info["times_delivered"]
+
+        poisoned = [e for e in entries if delivered.get(e[:2], 0) > self.max_deliveries]
+        if not poisoned:
+            return entries
+        pipe = self.client.pipeline(transaction=False)
+        for key, entry_id, fields in poisoned:
+            logger.error("[%s] Entrada %s de %s descartada tras %d entregas: %s", self.group,
+                         entry_id, key, delivered[(key, entry_id)], fields)
+            pipe.xadd(dead_letter_key(key), {**fields, "id": entry_id, "group": self.group},
+                      maxlen=DEAD_LETTER_MAXLEN, approximate=True)
+        pipe.execute()
+        self.ack(poisoned)
+        self.dead_lettered += len(poisoned)
+        return [e for e in entries if e not in poisoned]
+
+    def _read_group(self, last_id: str, block, count: int = None):
+        reply = self.client.xreadgroup(self.group, self.consumer,
+                                       {key: last_id for key in self.keys},
+                                       count=count or self.count, block=block)
+        entries = []
+        for key, items in reply or []:
+            entries += [(_text(key), _text(entry_id), _decode(fields))
+                        for entry_id, fields in items if fields]
+        return entries
+
+    def ack(self, entries):
+        if not entries:
+            return 0
+        pipe = self.client.pipeline(transaction=False)
+        by_key = {}
+        for key, entry_id, _ in entries:
+            by_key.setdefault(key, []).append(entry_id)
+        for key, ids in by_key.items():
+            pipe.xack(key, self.group, *ids)
+        return sum(pipe.execute())
+
+    def run(self, handler, stop=None):
+        """
+        Bucle de consumo: handler(entries) y XACK si no lanza excepción. Si
+        falla, las entradas quedan pendientes y se reintentan (ver `failed`)
+        antes de leer ticks nuevos. `stop` es un threading.Event opcional.
+        """
+        while stop is None or not stop.is_set():
+            entries = self.read()
+            if not entries:
+                continue
+            try:
+                handler(entries)
+            except Exception:
+                delay = self.failed()
+                logger.exception("[%s] Error procesando %d ticks (reintento en %.1f s)",
+                                 self.group, len(entries), delay)
+                if stop is not None:
+                    stop.wait(delay)
+                else:
+                    time.sleep(delay)
+                continue
+            self.failures = 0
+            self.ack(entries)
+
+
+def _decode(fields: dict) -> dict:
+    return {_text(k): _text(v) for k, v in fields.items()}
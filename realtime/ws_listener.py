@@ -4,21 +4,29 @@ import os
 import django
 import time
 import logging
+import asyncio
+import threading
 import redis
-import json
+from redis import asyncio as aioredis
 from binance import ThreadedWebsocketManager
+from django.conf import settings
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'trader.settings')
 django.setup()
 
 #from dashboard.models import Symbol  
 
+from realtime.async_listener import MarketDataListener
+from realtime.tick_buffer import TickBuffer
+
 logging.basicConfig(
-    level=logging.DEBUG,  # Cambia a DEBUG para más detalles
+    level=os.getenv("LOG_LEVEL", "INFO").upper(),  # DEBUG registra cada tick
     format='[%(asctime)s] %(levelname)s in %(module)s: %(message)s'
 )
 
 logger = logging.getLogger(__name__)
+# se consulta una vez: en el camino caliente no se formatea nada por tick
+LOG_TICKS = logger.isEnabledFor(logging.DEBUG)
 
 BINANCE_API_KEY = os.getenv("BINANCE_TESTNET_API_KEY", "")
 BINANCE_API_SECRET = os.getenv("BINANCE_TESTNET_API_SECRET", "")
@@ -28,31 +36,45 @@ REDIS_PORT =  6379
 
 #WATCHED_SYMBOLS = list(Symbol.objects.values_list('symbol', flat=True))   
 #logger.info(WATCHED_SYMBOLS)
-WATCHED_SYMBOLS = ["BTCUSDT", "ETHUSDT", "ETHBTC"]
+WATCHED_SYMBOLS = settings.WATCHED_SYMBOLS
 
-# --- INICIALIZACIÓN DE REDIS ---
-r = redis.Redis(host=REDIS_HOST, port=REDIS_PORT, db=0)
+# Ticks acumulados antes de escribir en Redis: flush cada FLUSH_INTERVAL
+# segundos o cuando hay FLUSH_MAX_PENDING símbolos pendientes.
+FLUSH_INTERVAL = float(os.getenv("WS_FLUSH_INTERVAL", "0.25"))
+FLUSH_MAX_PENDING = int(os.getenv("WS_FLUSH_MAX_PENDING", "500"))
 
+# Listener asyncio: combined streams y cola acotada de QUEUE_SIZE símbolos.
+BINANCE_WS_URL = os.getenv("BINANCE_WS_URL", "wss://stream.testnet.binance.vision")
+# "ticker" (último precio cada segundo) o "kline_1m" (cierre exacto de cada vela)
+WS_STREAM = os.getenv("WS_STREAM", "ticker")
+QUEUE_SIZE = int(os.getenv("WS_QUEUE_SIZE", "1000"))
 
-def handle_socket_message(msg):
-    symbol = msg.get("s")
-    last_price = msg.get("c")
-
-    if symbol and last_price:
-        logger.warning(f"actualizando precio para {symbol} ::: {last_price}")
+# Log de ticks en Redis Streams (realtime/tick_stream.py): entradas por
+# stream (0 lo desactiva) y nº de streams compartidos (0 = uno por símbolo).
+TICK_STREAM_MAXLEN = int(os.getenv("TICK_STREAM_MAXLEN", "100000"))
+TICK_STREAM_SHARDS = int(os.getenv("TICK_STREAM_SHARDS", "0"))
 
-        # Guardamos solo el precio en price:{symbol}
-        r.set(f"price:{symbol}", last_price)
+# --- INICIALIZACIÓN DE REDIS ---
+r = redis.Redis(host=REDIS_HOST, port=REDIS_PORT, db=0)
+buffer = TickBuffer(r, interval=FLUSH_INTERVAL, max_pending=FLUSH_MAX_PENDING,
+                    stream_maxlen=TICK_STREAM_MAXLEN, stream_shards=TICK_STREAM_SHARDS)
 
-        # Guardamos el JSON completo del ticker en ticker:{symbol}
-        try:
-            r.set(f"ticker:{symbol}", json.dumps(msg))
-        except Exception as e:
-            logger.error(f"[WS] No se pudo guardar el ticker completo para {symbol}: {e}")
 
-        logger.info(f"[WS] Actualizado {symbol} => {last_price}")
-    else:
-        logger.warning(f"[WS] Mensaje recibido sin datos de precio válidos: {msg}")
+def handle_socket_message(msg):
+    """
+    Guarda el tick en el buffer; price:{symbol} y ticker:{symbol} se
+    escriben en Redis en el siguiente flush.
+    """
+    try:
+        ok = buffer.add(msg)
+    except Exception as e:
+        logger.error("[WS] Error al escribir ticks en Redis: %s", e)
+        return
+    if LOG_TICKS:
+        if ok:
+            logger.debug("[WS] Tick %s => %s", msg.get("s"), msg.get("c"))
+        else:
+            logger.debug("[WS] Mensaje recibido sin datos de precio válidos: %s", msg)
 
 
 
@@ -62,6 +84,9 @@ def start_websocket():
     Inicia la conexión WebSocket a Binance y se suscribe
     a los streams de ticker para cada símbolo definido en WATCHED_SYMBOLS. y  se van almacenando los precios en redis
     """
+    stop = threading.Event()
+    threading.Thread(target=buffer.run_flusher, args=(stop,), daemon=True).start()
+
     while True:
         try:
             twm = ThreadedWebsocketManager(api_key=BINANCE_API_KEY, api_secret=BINANCE_API_SECRET, testnet=True)
@@ -76,7 +101,25 @@ def start_websocket():
             logger.error(f"Error en WebSocket: {e}. Reconectando en 5 segundos...")
             time.sleep(5)
 
+def start_async_listener():
+    """
+    Listener asyncio (realtime/async_listener.py): una sola conexión de
+    combined streams para WATCHED_SYMBOLS y escrituras en Redis por lotes.
+    """
+    client = aioredis.Redis(host=REDIS_HOST, port=REDIS_PORT, db=0)
+    listener = MarketDataListener(WATCHED_SYMBOLS, client, BINANCE_WS_URL,
+                                  queue_size=QUEUE_SIZE, flush_interval=FLUSH_INTERVAL,
+                                  stream=WS_STREAM,
+                                  stream_maxlen=TICK_STREAM_MAXLEN,
+                                  stream_shards=TICK_STREAM_SHARDS)
+    asyncio.run(listener.run())
+
+
 if __name__ == "__main__":
-    start_websocket()
+    # WS_LISTENER=threaded vuelve al ThreadedWebsocketManager de python-binance
+    if os.getenv("WS_LISTENER", "async") == "threaded":
+        start_websocket()
+    else:
+        start_async_listener()
 
 
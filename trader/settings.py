@@ -145,6 +145,38 @@ STATICFILES_DIRS = [
     BASE_DIR / 'static',
 ]
 
+# Caché memmap de precios por símbolo (dashboard/utils/price_cache.py).
+# Desactivada si no se define; la base de datos sigue siendo la fuente de verdad.
+PRICE_CACHE_DIR = os.getenv("PRICE_CACHE_DIR") or None
+
+# API REST de Binance para el backfill histórico y su límite de peso por
+# minuto (cabecera X-MBX-USED-WEIGHT-1M); se deja margen para el resto de tareas.
+BINANCE_REST_URL = os.getenv("BINANCE_REST_URL", "https://api.binance.com")
+BINANCE_WEIGHT_LIMIT = int(os.getenv("BINANCE_WEIGHT_LIMIT", "4800"))
+
+# Símbolos del websocket (realtime/ws_listener.py) y del constructor de velas
+# (realtime/candle_worker.py).
+WATCHED_SYMBOLS = os.getenv("WATCHED_SYMBOLS", "BTCUSDT,ETHUSDT,ETHBTC").split(",")
+
+# Precios en vivo (dashboard/utils/price_service.py): segundos que un precio
+# leído de Redis se reutiliza en el proceso, y antigüedad máxima (según la
+# hora del evento en el exchange) para operar con él.
+LIVE_PRICE_TTL = float(os.getenv("LIVE_PRICE_TTL", "0.5"))
+LIVE_PRICE_MAX_AGE = float(os.getenv("LIVE_PRICE_MAX_AGE", "10"))
+
+# Caché de Django (PNG de las curvas de equity, dashboard/utils/equity_curve.py,
+# y velas de /api/candles/, dashboard/utils/candles.py): Redis si se define
+# CACHE_URL (p. ej. redis://redis:6379/1), memoria local del proceso si no.
+# La versión de las velas la incrementan los procesos que insertan velas
+# (candle_worker, celery_worker), así que todos deben usar el mismo CACHE_URL
+# que web; con memoria local el check dashboard.W001 lo avisa.
+CACHE_URL = os.getenv("CACHE_URL")
+CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.redis.RedisCache", "LOCATION": CACHE_URL}
+    if CACHE_URL else
+    {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+}
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
@@ -182,37 +214,38 @@ CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = 'UTC'
 
+# Límite (s) de un backtest encolado (dashboard.tasks.ejecutar_backtest_job);
+# pasado el límite más un margen, `marcar_jobs_colgados` da el job por fallido.
+BACKTEST_JOB_TIME_LIMIT = int(os.getenv("BACKTEST_JOB_TIME_LIMIT", "3600"))
+
 
 CELERY_BEAT_SCHEDULE = {
-    # cada minuto ejecuta el cruce para BTCUSDT (SMA 3/5)
+    # las velas llegan del websocket (realtime/candle_worker.py); REST solo
+    # repara huecos por si el worker está caído
     "btc_load_prices": {
         "task": "dashboard.tasks.load_recent_prices",
-        "schedule": 60.0,
-        "args": ("BTCUSDT", 60),          # los últimos 60 candles (~1 h)
-    },
-    "btc_ma_cross": {
-        "task": "dashboard.tasks.detectar_ma_cross",
-        "schedule": 60.0,            # en segundos
-        "args": ("BTCUSDT", 3, 5),
-    },
-    # ejemplo extra: cada 5 min para ETH
-    "eth_ma_cross": {
-        "task": "dashboard.tasks.detectar_ma_cross",
-        "schedule": 300.0,
-        "args": ("ETHUSDT", 5, 20),
+        "schedule": 900.0,
+        "args": ("BTCUSDT", 60),          # hasta 60 candles (~1 h)
     },
-
-    "btc_rsi_extremos": {
-        "task": "dashboard.tasks.detectar_rsi_extremos",
-        "schedule": 60.0,                 # cada minuto
-        "args": ("BTCUSDT", 14, 30, 70),
+    # jobs de backtest cuyo worker murió a mitad de ejecución
+    "backtest_jobs_colgados": {
+        "task": "dashboard.tasks.marcar_jobs_colgados",
+        "schedule": 600.0,
     },
+    # los detectores y el auto-trade ya no van por beat: se ejecutan con
+    # `evaluar_estrategias` al cerrarse cada vela (STRATEGY_SUBSCRIPTIONS)
+}
 
-    "btc_auto_trade": {
-    "task": "dashboard.tasks.ejecutar_ordenes_por_senal",
-    "schedule": 60.0,
-    "args": ("BTCUSDT",),
-},
-
-    
+# Estrategias de cada símbolo que evalúa `dashboard.tasks.evaluar_estrategias`
+# al llegar velas nuevas (dashboard/utils/events.py). Los símbolos que no
+# aparecen no lanzan ninguna tarea.
+STRATEGY_SUBSCRIPTIONS = {
+    "BTCUSDT": [
+        {"strategy": "ma_cross", "short": 3, "long": 5},
+        {"strategy": "rsi", "period": 14, "low": 30, "high": 70},
+        {"strategy": "auto_trade"},
+    ],
+    "ETHUSDT": [
+        {"strategy": "ma_cross", "short": 5, "long": 20},
+    ],
 }
@@ -3,7 +3,7 @@ from django.urls import path, include
 from django.http import JsonResponse
 
 from rest_framework.routers import DefaultRouter
-from dashboard.api import TradingSignalViewSet
+from dashboard.api import CandlesView, ExportView, TradingSignalViewSet, SimulatedTradeViewSet
 from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView, SpectacularRedocView
 
 
@@ -12,12 +12,15 @@ def health_check(request):
 
 router = DefaultRouter()
 router.register(r"trading-signals", TradingSignalViewSet, basename="trading-signal")
+router.register(r"simulated-trades", SimulatedTradeViewSet, basename="simulated-trade")
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('', include('dashboard.urls')),
     path('health/', health_check),
     path("api/", include(router.urls)),
+    path("api/export/<str:dataset>/", ExportView.as_view(), name="export"),
+    path("api/candles/", CandlesView.as_view(), name="candles"),
     path("api/schema/", SpectacularAPIView.as_view(), name="schema"),
     path("api/docs/", SpectacularSwaggerView.as_view(url_name="schema"), name="swagger-ui"),
     path("api/redoc/", SpectacularRedocView.as_view(url_name="schema"), name="redoc"),